@@ -0,0 +1,140 @@
+"""
+Génération de requêtes en flux pour de grandes populations d'utilisateurs.
+
+Le recalcul hebdomadaire de tous les utilisateurs ne doit pas boucler en Python sur
+generate_user_query_with_weights ni matérialiser toute la population. Ici :
+- les profils (catégories, poids) arrivent par un itérateur et les phrases sont
+  produites paresseusement, dans l'ordre ;
+- les profils identiques (clé canonique, cf. user_query.canonical_profile_key)
+  sont dédupliqués dans une fenêtre LRU bornée ;
+- le travail peut être réparti par lots sur un pool de processus, avec un nombre
+  borné de lots en vol.
+
+La mémoire reste constante (fenêtre + lots en vol), quel que soit le nombre de profils.
+"""
+
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from user_query import ProfileKey, canonical_profile_key, generate_user_query_from_key
+
+logger = logging.getLogger(__name__)
+
+Profile = Tuple[List[str], Optional[Dict[str, int]]]
+
+DEFAULT_WINDOW = 10_000
+DEFAULT_CHUNKSIZE = 512
+
+
+def _generate_from_keys(keys: List[ProfileKey]) -> List[str]:
+    """Tâche d'un worker : phrases des clés canoniques d'un lot."""
+    return [generate_user_query_from_key(key) for key in keys]
+
+
+def generate_queries_stream(
+    profiles: Iterable[Profile],
+    window: int = DEFAULT_WINDOW,
+    processes: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Produit la phrase de chaque profil, dans l'ordre d'entrée.
+
+    Les phrases sont celles de generate_user_query_from_key (tags triés), identiques
+    à QueryMemo.sentence.
+
+    Args:
+        profiles: Itérateur de (catégories, poids) ; poids None ou {} = génération sans poids
+        window: Nombre de clés récentes mémorisées pour la déduplication
+        processes: Nombre de processus (None ou <= 1 : génération dans le processus courant)
+        chunksize: Profils par lot
+        max_in_flight: Lots soumis au pool sans avoir été consommés (défaut 2 × processes)
+
+    Yields:
+        Une phrase par profil
+    """
+    if window < 1 or chunksize < 1:
+        raise ValueError("window et chunksize doivent être >= 1")
+
+    recent: "OrderedDict[ProfileKey, str]" = OrderedDict()
+    profiles = iter(profiles)
+
+    def next_chunk() -> Optional[Tuple[List[ProfileKey], List[ProfileKey]]]:
+        """(clés du lot, clés à générer : uniques et absentes de la fenêtre)"""
+        chunk = list(islice(profiles, chunksize))
+        if not chunk:
+            return None
+        keys = [canonical_profile_key(categories, weights) for categories, weights in chunk]
+        missing = [key for key in dict.fromkeys(keys) if key not in recent]
+        return keys, missing
+
+    def emit(keys: List[ProfileKey], missing: List[ProfileKey], sentences: List[str]) -> Iterator[str]:
+        by_key = dict(zip(missing, sentences))
+        # Lire les clés déjà dans la fenêtre avant d'y insérer celles du lot (qui peuvent les évincer)
+        for key in keys:
+            if key not in by_key:
+                by_key[key] = recent[key]
+                recent.move_to_end(key)
+        for key, sentence in zip(missing, sentences):
+            recent[key] = sentence
+            if len(recent) > window:
+                recent.popitem(last=False)
+        for key in keys:
+            yield by_key[key]
+
+    if not processes or processes <= 1:
+        while True:
+            batch = next_chunk()
+            if batch is None:
+                return
+            keys, missing = batch
+            yield from emit(keys, missing, _generate_from_keys(missing))
+
+    max_in_flight = max_in_flight or 2 * processes
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                batch = next_chunk()
+                if batch is None:
+                    exhausted = True
+                    break
+                keys, missing = batch
+                pending.append((keys, missing, executor.submit(_generate_from_keys, missing)))
+
+            if not pending:
+                return
+
+            keys, missing, future = pending.popleft()
+            # Les clés de la fenêtre au moment de la soumission peuvent en être sorties depuis
+            submitted = set(missing)
+            resolved = [key for key in dict.fromkeys(keys) if key not in recent and key not in submitted]
+            sentences = future.result()
+            if resolved:
+                missing = missing + resolved
+                sentences = sentences + _generate_from_keys(resolved)
+            yield from emit(keys, missing, sentences)
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    base_profiles = [
+        (["beach", "natural.water", "catering.restaurant.italian"], {"beach": 5}),
+        (["heritage", "tourism.sights.castle", "religion"], None),
+        (["ski", "adult.nightclub", "commercial.shopping_mall"], {"ski": 4, "adult.nightclub": 2}),
+    ]
+    population = (base_profiles[i % len(base_profiles)] for i in range(100_000))
+
+    start = time.perf_counter()
+    count = sum(1 for _ in generate_queries_stream(population, processes=2))
+    elapsed = time.perf_counter() - start
+    print(f"{count} phrases en {elapsed:.2f} s ({count / elapsed:.0f} profils/s)")
@@ -0,0 +1,189 @@
+"""
+Chargement du catalogue des villes (ids, noms, matrice d'embeddings), version du catalogue
+et écriture en masse des embeddings dans la table cities.
+
+La version est une empreinte du contenu (ids + embeddings) : tout artefact dérivé
+(graphe de voisins, exports, projections) est indexé par cette version et peut
+donc être invalidé dès que les embeddings changent.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EMBEDDINGS_JSON = os.path.join(os.path.dirname(V2_DIR), "V1", "cities_embeddings.json")
+
+
+def load_catalog_from_db(conn_params: Dict[str, Any]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Charge le catalogue depuis la table cities.
+
+    Returns:
+        (ids int64, noms, matrice float32 (n_villes, dim)), triés par id
+    """
+    with psycopg2.connect(**conn_params) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, name, embedding
+                FROM cities
+                WHERE embedding IS NOT NULL
+                ORDER BY id;
+            """)
+            rows = cursor.fetchall()
+
+    logger.info(f"✓ {len(rows)} villes chargées depuis PostgreSQL")
+    return _to_arrays([{"id": r[0], "name": r[1], "embedding": r[2]} for r in rows])
+
+
+def load_catalog_from_json(json_path: str = DEFAULT_EMBEDDINGS_JSON) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Charge le catalogue depuis un fichier au format cities_embeddings.json :
+    [{"id": 1, "name": "Paris", "embedding": [...]}, ...]
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        cities = json.load(f)
+
+    logger.info(f"✓ {len(cities)} villes chargées depuis '{json_path}'")
+    return _to_arrays(sorted(cities, key=lambda c: c["id"]))
+
+
+def _to_arrays(cities: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    ids = np.asarray([c["id"] for c in cities], dtype=np.int64)
+    names = [c["name"] for c in cities]
+    matrix = np.asarray([c["embedding"] for c in cities], dtype=np.float32)
+    return ids, names, matrix
+
+
+def catalog_version(ids: np.ndarray, matrix: np.ndarray) -> str:
+    """
+    Empreinte du catalogue (12 caractères hexadécimaux), stable entre exécutions.
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+    return digest.hexdigest()[:12]
+
+
+class _CopyStream:
+    """Fichier en lecture pour COPY ... FROM STDIN, alimenté ligne par ligne (mémoire constante)."""
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            data, self._buffer = self._buffer, ""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _copy_lines(rows: Iterable[Tuple[int, Sequence[float]]], counter: List[int]) -> Iterator[str]:
+    # Format texte de COPY : id<TAB>{v1,v2,...} ; repr() garde la précision float8
+    for city_id, embedding in rows:
+        counter[0] += 1
+        values = ",".join(repr(float(v)) for v in embedding)
+        yield f"{int(city_id)}\t{{{values}}}\n"
+
+
+def bulk_update_embeddings(
+    conn_params: Dict[str, Any],
+    rows: Iterable[Tuple[int, Sequence[float]]],
+    conn: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Écrit les embeddings de nombreuses villes en une seule transaction.
+
+    Les vecteurs sont chargés par COPY dans une table temporaire, puis appliqués
+    par un seul UPDATE ... FROM. Idempotent : seules les lignes dont l'embedding
+    change sont réécrites (un second passage met à jour 0 ligne). Pour un même
+    id présent plusieurs fois, le dernier vecteur l'emporte.
+
+    Args:
+        conn_params: Paramètres de connexion PostgreSQL (ignorés si conn est fourni)
+        rows: Itérable de (id de ville, embedding)
+        conn: Connexion existante (optionnelle) ; la transaction est validée à la fin
+
+    Returns:
+        {"rows", "updated", "unchanged", "missing", "missing_ids", "seconds", "rows_per_s"}
+        missing = nombre d'ids absents de la table cities (non écrits), listés dans missing_ids
+    """
+    start = time.perf_counter()
+    counter = [0]
+    own_conn = conn is None
+    if own_conn:
+        conn = psycopg2.connect(**conn_params)
+
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TEMP TABLE tmp_city_embeddings (
+                        seq bigserial,
+                        id integer NOT NULL,
+                        embedding float8[] NOT NULL
+                    ) ON COMMIT DROP;
+                """)
+                cursor.copy_expert(
+                    "COPY tmp_city_embeddings (id, embedding) FROM STDIN",
+                    _CopyStream(_copy_lines(rows, counter)),
+                )
+                cursor.execute("""
+                    CREATE TEMP TABLE tmp_city_embeddings_last ON COMMIT DROP AS
+                    SELECT DISTINCT ON (id) id, embedding
+                    FROM tmp_city_embeddings
+                    ORDER BY id, seq DESC;
+                """)
+                cursor.execute("""
+                    SELECT t.id
+                    FROM tmp_city_embeddings_last t
+                    LEFT JOIN cities c ON c.id = t.id
+                    WHERE c.id IS NULL
+                    ORDER BY t.id;
+                """)
+                missing_ids = [row[0] for row in cursor.fetchall()]
+                missing = len(missing_ids)
+                cursor.execute("""
+                    UPDATE cities c
+                    SET embedding = t.embedding
+                    FROM tmp_city_embeddings_last t
+                    WHERE c.id = t.id
+                      AND c.embedding IS DISTINCT FROM t.embedding;
+                """)
+                updated = cursor.rowcount
+                cursor.execute("SELECT count(*) FROM tmp_city_embeddings_last;")
+                distinct = cursor.fetchone()[0]
+    finally:
+        if own_conn:
+            conn.close()
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "rows": counter[0],
+        "updated": updated,
+        "unchanged": distinct - missing - updated,
+        "missing": missing,
+        "missing_ids": missing_ids,
+        "seconds": seconds,
+        "rows_per_s": counter[0] / seconds if seconds > 0 else 0.0,
+    }
+    logger.info(
+        f"✓ Embeddings écrits en une transaction: {stats['updated']} mis à jour, {stats['unchanged']} inchangés, "
+        f"{stats['missing']} ids inconnus ({stats['rows_per_s']:.0f} lignes/s)"
+    )
+    return stats
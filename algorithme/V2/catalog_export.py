@@ -0,0 +1,268 @@
+"""
+Export du catalogue des villes dans plusieurs formats, en une seule passe.
+
+Le catalogue (ids, noms, embeddings, et descriptions si disponibles) est lu une
+fois (catalog.py), puis chaque ville est écrite dans tous les artefacts à la fois :
+- catalog_<version>.f32.npy / catalog_<version>.ids.npy : matrice float32 et ids
+  int64 pour le serveur (np.load(..., mmap_mode="r")) ;
+- catalog_<version>.f16.bin : bloc compact pour le mobile (en-tête, ids int32,
+  lignes float16, little-endian), deux fois plus petit que le float32 ;
+- catalog_<version>.sqlite : table cities (id, nom, description, embedding float32)
+  pour les lectures par id.
+
+Les artefacts sont écrits sous des noms temporaires puis renommés (os.replace) une
+fois complets ; le manifeste catalog_manifest.json, écrit en dernier, donne la version
+du catalogue, les dimensions et, pour chaque artefact, son fichier, sa taille et son
+sha256 : un consommateur ne voit jamais un export à moitié écrit, même quand un
+export de la même version remplace les fichiers référencés par le manifeste courant.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from catalog import catalog_version, load_catalog_from_db, load_catalog_from_json
+
+logger = logging.getLogger(__name__)
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(V2_DIR))
+DEFAULT_OUTPUT_DIR = os.path.join(REPO_ROOT, "backend", "data", "catalog")
+DEFAULT_DESCRIPTIONS_PATH = os.path.join(REPO_ROOT, "frontend", "src", "data", "cityDescriptions.json")
+MANIFEST_NAME = "catalog_manifest.json"
+FORMAT_VERSION = 1
+
+# En-tête du bloc float16 : magic, version du format, octets par valeur, nb de villes, dimension
+F16_MAGIC = b"CEMB"
+F16_HEADER = struct.Struct("<4sHHII")
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_descriptions(path: str = DEFAULT_DESCRIPTIONS_PATH) -> Dict[int, str]:
+    """
+    Descriptions des villes au format cityDescriptions.json : [{"id", "name", "categories_gpt"}, ...]
+    (dictionnaire vide si le fichier n'existe pas).
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {int(city["id"]): city.get("categories_gpt") or "" for city in json.load(f)}
+
+
+def read_f16_blob(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lecteur de référence du bloc float16 (même disposition que côté mobile).
+
+    Returns:
+        (ids int32 (n,), embeddings float16 (n, dim))
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, itemsize, n, dim = F16_HEADER.unpack_from(data, 0)
+    if magic != F16_MAGIC or version != FORMAT_VERSION or itemsize != 2:
+        raise ValueError(f"Bloc float16 invalide: {path}")
+    offset = F16_HEADER.size
+    ids = np.frombuffer(data, dtype="<i4", count=n, offset=offset)
+    matrix = np.frombuffer(data, dtype="<f2", count=n * dim, offset=offset + 4 * n).reshape(n, dim)
+    return ids, matrix
+
+
+def export_catalog(
+    ids: np.ndarray,
+    names: List[str],
+    matrix: np.ndarray,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    descriptions: Optional[Dict[int, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Écrit les trois artefacts en une seule passe sur les villes, puis le manifeste.
+
+    Args:
+        ids: Ids des villes (int64)
+        names: Noms des villes
+        matrix: Embeddings (n_villes, dim)
+        output_dir: Dossier de sortie
+        descriptions: Descriptions par id (optionnel, stockées dans le bundle SQLite)
+
+    Returns:
+        Le manifeste écrit
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    n, dim = matrix.shape
+    if ids.shape[0] != n or len(names) != n:
+        raise ValueError("ids, names et matrix doivent avoir le même nombre de lignes")
+    if n and (ids.min() < np.iinfo(np.int32).min or ids.max() > np.iinfo(np.int32).max):
+        raise ValueError("Ids hors de l'intervalle int32 du bloc float16")
+    descriptions = descriptions or {}
+
+    version = catalog_version(ids, matrix)
+    os.makedirs(output_dir, exist_ok=True)
+    files = {
+        "embeddings_f32": f"catalog_{version}.f32.npy",
+        "city_ids": f"catalog_{version}.ids.npy",
+        "embeddings_f16": f"catalog_{version}.f16.bin",
+        "bundle": f"catalog_{version}.sqlite",
+    }
+    paths = {name: os.path.join(output_dir, file) for name, file in files.items()}
+    # Noms temporaires (même extension, exigée par np.save / open_memmap), renommés une fois complets
+    tmp_paths = {name: "{0}.tmp{1}".format(*os.path.splitext(path)) for name, path in paths.items()}
+    for tmp in tmp_paths.values():
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    f32 = f16 = db = None
+    max_f16_error = 0.0
+    complete = False
+    try:
+        # Serveur : .npy préalloués, remplis ligne par ligne
+        np.save(tmp_paths["city_ids"], ids)
+        f32 = np.lib.format.open_memmap(tmp_paths["embeddings_f32"], mode="w+", dtype=np.float32, shape=(n, dim))
+
+        # Mobile : en-tête et ids, puis les lignes float16 à la suite
+        f16 = open(tmp_paths["embeddings_f16"], "wb")
+        f16.write(F16_HEADER.pack(F16_MAGIC, FORMAT_VERSION, 2, n, dim))
+        f16.write(ids.astype("<i4").tobytes())
+
+        # Bundle SQLite : reconstruit à chaque export
+        db = sqlite3.connect(tmp_paths["bundle"])
+        db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        db.execute("""
+            CREATE TABLE cities (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                description TEXT,
+                embedding BLOB NOT NULL
+            )
+        """)
+
+        with db:
+            for row in range(n):
+                vector = matrix[row]
+                f32[row] = vector
+                half = vector.astype("<f2")
+                f16.write(half.tobytes())
+                if dim:
+                    max_f16_error = max(max_f16_error, float(np.max(np.abs(half.astype(np.float32) - vector))))
+                city_id = int(ids[row])
+                db.execute(
+                    "INSERT INTO cities (id, name, description, embedding) VALUES (?, ?, ?, ?)",
+                    (city_id, names[row], descriptions.get(city_id), vector.astype("<f4").tobytes()),
+                )
+            db.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ("catalog_version", version),
+                ("format_version", str(FORMAT_VERSION)),
+                ("count", str(n)),
+                ("dim", str(dim)),
+                ("embedding_dtype", "float32-le"),
+            ])
+        f32.flush()
+        complete = True
+    finally:
+        f32 = None
+        for handle in (f16, db):
+            if handle is not None:
+                handle.close()
+        if not complete:
+            for tmp in tmp_paths.values():
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+    # Tous les artefacts sont complets : renommage, puis manifeste
+    for name in files:
+        os.replace(tmp_paths[name], paths[name])
+
+    def describe(name: str, **extra: Any) -> Dict[str, Any]:
+        return {"file": files[name], "bytes": os.path.getsize(paths[name]), "sha256": _sha256_file(paths[name]), **extra}
+
+    manifest = {
+        "catalog_version": version,
+        "format_version": FORMAT_VERSION,
+        "count": int(n),
+        "dim": int(dim),
+        "artifacts": {
+            "embeddings_f32": describe("embeddings_f32", format="npy", dtype="float32", shape=[int(n), int(dim)]),
+            "city_ids": describe("city_ids", format="npy", dtype="int64", shape=[int(n)]),
+            "embeddings_f16": describe(
+                "embeddings_f16", format="blob", dtype="float16-le", header=F16_HEADER.format,
+                ids_offset=F16_HEADER.size, data_offset=F16_HEADER.size + 4 * int(n),
+                max_abs_error=max_f16_error,
+            ),
+            "bundle": describe("bundle", format="sqlite", tables=["meta", "cities"]),
+        },
+    }
+    # Projections ACP (pca_projection.py) : conservées tant que le catalogue ne change pas
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("catalog_version") == version and previous.get("projections"):
+            manifest["projections"] = previous["projections"]
+    tmp_path = os.path.join(output_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    sizes = ", ".join(f"{name} {info['bytes'] / 1024:.0f} Ko" for name, info in manifest["artifacts"].items())
+    logger.info(f"✓ Catalogue {version} exporté dans {output_dir}: {n} villes ({sizes})")
+    return manifest
+
+
+def load_manifest(output_dir: str = DEFAULT_OUTPUT_DIR, verify: bool = True) -> Dict[str, Any]:
+    """
+    Charge le manifeste de l'export courant.
+
+    Raises:
+        ValueError: Si verify et qu'un artefact ne correspond pas à son sha256
+    """
+    with open(os.path.join(output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if verify:
+        for name, info in manifest["artifacts"].items():
+            if _sha256_file(os.path.join(output_dir, info["file"])) != info["sha256"]:
+                raise ValueError(f"Artefact '{name}' corrompu ou modifié: {info['file']}")
+    return manifest
+
+
+def build_catalog_export(
+    conn_params: Dict[str, Any] = None,
+    json_path: str = None,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    descriptions_path: str = DEFAULT_DESCRIPTIONS_PATH,
+) -> Dict[str, Any]:
+    """
+    Job batch : lit le catalogue une fois (PostgreSQL ou JSON) et écrit tous les artefacts.
+    """
+    if conn_params is not None:
+        ids, names, matrix = load_catalog_from_db(conn_params)
+    else:
+        ids, names, matrix = load_catalog_from_json(json_path) if json_path else load_catalog_from_json()
+    return export_catalog(ids, names, matrix, output_dir, load_descriptions(descriptions_path))
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Option 1 : Embeddings V2 depuis la base de données
+    # conn_params = {"host": "localhost", "dbname": "cities", "user": "postgres", "password": "postgres", "port": 5432}
+    # build_catalog_export(conn_params=conn_params)
+
+    # Option 2 : Embeddings exportés en JSON (algorithme/V1/cities_embeddings.json)
+    manifest = build_catalog_export()
+    load_manifest()
+    for name, info in manifest["artifacts"].items():
+        print(f"{name:<15} {info['file']:<32} {info['bytes']:>9} octets  sha256 {info['sha256'][:12]}")
@@ -0,0 +1,220 @@
+"""
+Dictionnaire des catégories : chaque tag reçoit un identifiant entier dense.
+
+Les tags circulent partout sous forme de chaînes (catégories utilisateur, dislikes,
+catégories des villes). Ce module les interne une seule fois par processus dans un
+CategoryDictionary partagé (get_category_dictionary) : les profils de villes et
+d'utilisateurs deviennent des tableaux d'ids triés (np.int32) ou des bitsets (int
+Python), et les ancêtres de chaque id (notation pointée + categories.parent_id) sont
+pré-calculés, ce qui évite hachage de chaînes et construction d'ensembles dans les
+calculs de pénalités et de thèmes.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+TAXONOMY_JSON_PATH = os.path.join(os.path.dirname(os.path.dirname(V2_DIR)), "dataS5", "DONNE_V1_ALGO", "categories.json")
+
+
+class CategoryDictionary:
+    """
+    Correspondance tag <-> id dense (0..n-1), avec les ancêtres de chaque id.
+
+    Les ids sont attribués dans l'ordre d'internement ; un tag est toujours interné
+    après ses ancêtres. Un tag inconnu peut être ajouté à tout moment (intern).
+
+    Example:
+        >>> d = CategoryDictionary(["adult.nightclub", "museum"])
+        >>> d.names
+        ['adult', 'adult.nightclub', 'museum']
+        >>> d.encode(["museum", "adult.nightclub", "museum"])
+        array([1, 2], dtype=int32)
+    """
+
+    def __init__(self, names: Iterable[str] = (), parents: Optional[Mapping[str, Optional[str]]] = None):
+        """
+        Args:
+            names: Tags à interner
+            parents: Hiérarchie {catégorie: parent} issue de categories.parent_id (optionnelle).
+                     Elle est fusionnée avec la notation pointée.
+        """
+        self.names: List[str] = []
+        self.id_of: Dict[str, int] = {}
+        self._ancestor_ids: List[Tuple[int, ...]] = []
+        self._parents = dict(parents) if parents else {}
+        self._lock = threading.Lock()
+        self.source = "memory"
+        for name in names:
+            self.intern(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _ancestor_names(self, tag: str) -> List[str]:
+        # Notation pointée + chaîne parent_id (même fusion que l'ancien CategoryPenaltyIndex)
+        parts = tag.split(".")
+        ancestors = [".".join(parts[: i + 1]) for i in range(len(parts))]
+        current = self._parents.get(tag)
+        while current is not None and current not in ancestors:
+            ancestors.insert(0, current)
+            current = self._parents.get(current)
+        return ancestors
+
+    def intern(self, tag: str) -> int:
+        """Id du tag (ajouté avec ses ancêtres s'il est inconnu)."""
+        tag_id = self.id_of.get(tag)
+        if tag_id is not None:
+            return tag_id
+
+        with self._lock:
+            return self._intern_locked(tag, set())
+
+    def _intern_locked(self, tag: str, in_progress: set) -> Optional[int]:
+        tag_id = self.id_of.get(tag)
+        if tag_id is not None or tag in in_progress:
+            # in_progress : cycle dans parent_id, le tag est déjà en cours d'ajout
+            return tag_id
+
+        in_progress.add(tag)
+        ancestor_ids = []
+        for name in self._ancestor_names(tag)[:-1]:
+            name_id = self._intern_locked(name, in_progress)
+            if name_id is not None:
+                ancestor_ids.append(name_id)
+
+        tag_id = len(self.names)
+        self.names.append(tag)
+        self.id_of[tag] = tag_id
+        self._ancestor_ids.append(tuple(ancestor_ids) + (tag_id,))
+        return tag_id
+
+    def ancestors(self, tag_id: int) -> Tuple[int, ...]:
+        """Ids des ancêtres du tag, lui-même inclus (du plus général au plus précis)."""
+        return self._ancestor_ids[tag_id]
+
+    def encode(self, tags: Iterable[str], intern: bool = True) -> np.ndarray:
+        """
+        Profil trié et dédupliqué d'ids (np.int32).
+
+        Args:
+            tags: Tags du profil
+            intern: Si False, les tags inconnus sont ignorés au lieu d'être ajoutés
+        """
+        if intern:
+            ids = {self.intern(tag) for tag in tags}
+        else:
+            id_of = self.id_of
+            ids = {id_of[tag] for tag in tags if tag in id_of}
+        return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids))
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        return [self.names[i] for i in ids]
+
+    @staticmethod
+    def to_bits(ids: Iterable[int]) -> int:
+        """Bitset (int Python) d'un profil d'ids."""
+        bits = 0
+        for i in ids:
+            bits |= 1 << int(i)
+        return bits
+
+    @staticmethod
+    def from_bits(bits: int) -> np.ndarray:
+        """Profil trié d'ids depuis un bitset."""
+        ids = []
+        while bits:
+            low = bits & -bits
+            ids.append(low.bit_length() - 1)
+            bits ^= low
+        return np.asarray(ids, dtype=np.int32)
+
+    def closure_bits(self, ids: Iterable[int]) -> int:
+        """Bitset du profil fermé par ancêtres (un tag couvre tous ses ancêtres)."""
+        bits = 0
+        for i in ids:
+            for ancestor in self._ancestor_ids[int(i)]:
+                bits |= 1 << ancestor
+        return bits
+
+    @classmethod
+    def from_db(cls, conn_params: Dict[str, str]) -> "CategoryDictionary":
+        """
+        Dictionnaire de la table categories (ordre des ids SQL, hiérarchie parent_id incluse).
+        """
+        with psycopg2.connect(**conn_params) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.name, parent.name
+                    FROM categories c
+                    LEFT JOIN categories parent ON parent.id = c.parent_id
+                    ORDER BY c.id
+                """)
+                rows = cursor.fetchall()
+
+        dictionary = cls((name for name, _ in rows), parents={name: parent for name, parent in rows if parent})
+        dictionary.source = "db"
+        logger.info(f"✓ Dictionnaire des catégories chargé depuis la base: {len(dictionary)} tags")
+        return dictionary
+
+    @classmethod
+    def from_taxonomy_json(cls, path: str = TAXONOMY_JSON_PATH) -> "CategoryDictionary":
+        """
+        Dictionnaire de la taxonomie exportée (dataS5/DONNE_V1_ALGO/categories.json).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        dictionary = cls(c["name"] for c in data["categories"])
+        dictionary.source = "json"
+        return dictionary
+
+
+_shared_dictionary: Optional[CategoryDictionary] = None
+_shared_lock = threading.Lock()
+
+
+def get_category_dictionary(conn_params: Optional[Dict[str, str]] = None) -> CategoryDictionary:
+    """
+    Dictionnaire partagé du processus.
+
+    Chargé au premier appel : depuis la table categories si conn_params est fourni,
+    sinon depuis la taxonomie JSON (vide si le fichier est absent). Un appel ultérieur
+    avec conn_params remplace un dictionnaire qui ne vient pas de la base.
+    """
+    global _shared_dictionary
+    with _shared_lock:
+        if conn_params is not None and (_shared_dictionary is None or _shared_dictionary.source != "db"):
+            _shared_dictionary = CategoryDictionary.from_db(conn_params)
+        elif _shared_dictionary is None:
+            if os.path.exists(TAXONOMY_JSON_PATH):
+                _shared_dictionary = CategoryDictionary.from_taxonomy_json()
+            else:
+                _shared_dictionary = CategoryDictionary()
+        return _shared_dictionary
+
+
+def set_category_dictionary(dictionary: CategoryDictionary) -> None:
+    """Remplace le dictionnaire partagé (ex: chargé depuis une autre source)."""
+    global _shared_dictionary
+    with _shared_lock:
+        _shared_dictionary = dictionary
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    dictionary = get_category_dictionary()
+    print(f"{len(dictionary)} catégories internées (source: {dictionary.source})")
+
+    profile = dictionary.encode(["tourism.sights.castle", "catering.restaurant.italian", "beach"])
+    bits = dictionary.to_bits(profile)
+    print(f"Profil: {profile.tolist()} -> {dictionary.decode(profile)}")
+    print(f"Aller-retour bitset: {np.array_equal(dictionary.from_bits(bits), profile)}")
+    print(f"Ancêtres de castle: {dictionary.decode(dictionary.ancestors(dictionary.id_of['tourism.sights.castle']))}")
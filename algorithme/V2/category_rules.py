@@ -0,0 +1,471 @@
+"""
+Moteur de règles compilé depuis dataS5/DONNEE_V2_ALGO/categories_gpt_keys.json.
+
+Les deux générateurs de phrases (côté utilisateur : user_query.py, côté ville :
+dataS5/DONNEE_V2_ALGO/scripts/add_categories_gpt.py) passent par ce moteur :
+la configuration est chargée une seule fois et compilée en tables de recherche
+(préfixes/tags exacts suivis par thème, préfixes de feuilles indexés par leur
+première lettre, listes blanches/noires de feuilles, modèles de phrases par poids).
+Chaque appel ne fait ensuite qu'un seul passage sur les tags : les informations
+de règle de chaque tag (préfixes suivis parmi ses ancêtres, tag exact suivi,
+feuilles) sont calculées une fois par id du dictionnaire partagé (category_ids),
+puis relues par id.
+
+Sémantique (identique aux anciens générateurs codés en dur) :
+- un préfixe p est présent si un tag vaut p ou commence par "p." ;
+- les feuilles sont extraites avec un `startswith(prefix)` brut, puis la dernière
+  partie après le dernier point est gardée.
+
+Ce moteur remplace le filtrage par préfixes en trie de user_query.py et le
+répartiteur à un seul passage (seuils de poids par thème) partagé avec
+add_categories_gpt.py : la table compilée couvre les deux rôles, les deux
+implémentations ont été supprimées.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from category_ids import CategoryDictionary, get_category_dictionary
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(V2_DIR)), "dataS5", "DONNEE_V2_ALGO", "categories_gpt_keys.json"
+)
+
+
+def _dedupe_keep_order(items: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+def _join_natural(items: List[str]) -> str:
+    items = [i for i in items if i]
+    if not items:
+        return ""
+    if len(items) == 1:
+        return items[0]
+    if len(items) == 2:
+        return f"{items[0]} and {items[1]}"
+    return ", ".join(items[:-1]) + f", and {items[-1]}"
+
+
+class _LeafList(NamedTuple):
+    name: str
+    prefixes: Tuple[str, ...]
+    # Préfixes dont le mot lui-même est ajouté (et les feuilles gardées) seulement si le préfixe est présent
+    prefix_items: FrozenSet[str]
+    blacklist: FrozenSet[str]
+    # Feuilles humanisées (minuscules) placées en tête
+    preferred: FrozenSet[str]
+    max_items: int
+
+
+class _Bit(NamedTuple):
+    text: str
+    prefix: Optional[str] = None
+    exact: Optional[str] = None
+    leaves: Optional[str] = None
+    else_text: Optional[str] = None
+    else_prefix: Optional[str] = None
+    unless: Optional[str] = None
+    group: Tuple["_Bit", ...] = ()
+
+
+class _Theme(NamedTuple):
+    name: str
+    order: int
+    any_prefixes: Tuple[str, ...]
+    any_exact: Tuple[str, ...]
+    leaf_lists: Tuple[_LeafList, ...]
+    bits: Tuple[_Bit, ...]
+    fallback: str
+    weight_suffixes: Tuple[str, ...]
+
+
+def _compile_bit(raw: Dict[str, Any]) -> _Bit:
+    if "group" in raw:
+        return _Bit(text=raw["all_text"], group=tuple(_compile_bit(member) for member in raw["group"]))
+    return _Bit(
+        text=raw["text"],
+        prefix=raw.get("prefix"),
+        exact=raw.get("exact"),
+        leaves=raw.get("leaves"),
+        else_text=raw.get("else_text"),
+        else_prefix=raw.get("else_prefix"),
+        unless=raw.get("unless"),
+    )
+
+
+class _TagInfo(NamedTuple):
+    """Ce que les règles retiennent d'un tag (calculé une fois par tag)."""
+    prefixes: Tuple[str, ...]
+    exact: Optional[str]
+    leaves: Tuple[Tuple[str, str], ...]
+
+
+class CompiledCategoryRules:
+    """
+    Configuration categories_gpt_keys.json compilée en tables de recherche.
+    """
+
+    def __init__(self, config: Dict[str, Any], dictionary: Optional[CategoryDictionary] = None):
+        """
+        Args:
+            config: Contenu de categories_gpt_keys.json
+            dictionary: Dictionnaire des catégories (par défaut le dictionnaire partagé du processus)
+        """
+        sentence_rules = config["sentence_rules"]
+        self.version = config.get("version")
+        self.template = sentence_rules.get("template", "A destination featuring {chunks}.")
+        self.max_chunks = int(sentence_rules.get("max_chunks", 3))
+        self.fallback = sentence_rules["fallback"]
+        self.humanize_map = {k.lower(): v for k, v in sentence_rules.get("humanize", {}).items()}
+
+        themes: List[_Theme] = []
+        for order, (name, theme) in enumerate(config["include_themes"].items(), 1):
+            phrases = theme["phrases"]
+            suffixes = tuple(phrases["weight_suffixes"])
+            if len(suffixes) != 5:
+                raise ValueError(f"Thème '{name}': weight_suffixes doit contenir 5 entrées (poids 1..5)")
+            themes.append(_Theme(
+                name=name,
+                order=order,
+                any_prefixes=tuple(theme.get("any_prefixes", ())),
+                any_exact=tuple(theme.get("any_exact", ())),
+                leaf_lists=self._compile_leaf_lists(theme),
+                bits=tuple(_compile_bit(bit) for bit in phrases["bits"]),
+                fallback=phrases["fallback"],
+                weight_suffixes=suffixes,
+            ))
+        self.themes: Tuple[_Theme, ...] = tuple(themes)
+
+        # Tables de recherche : seuls les préfixes/tags exacts utilisés par une règle sont suivis
+        tracked_prefixes: Set[str] = set()
+        tracked_exact: Set[str] = set()
+        leaf_prefixes: List[str] = []
+        for theme in self.themes:
+            tracked_prefixes.update(theme.any_prefixes)
+            tracked_exact.update(theme.any_exact)
+            for leaf_list in theme.leaf_lists:
+                tracked_prefixes.update(leaf_list.prefix_items)
+                leaf_prefixes.extend(leaf_list.prefixes)
+            for bit in theme.bits:
+                for member in bit.group or (bit,):
+                    for prefix in (member.prefix, member.else_prefix):
+                        if prefix:
+                            tracked_prefixes.add(prefix)
+                    if member.exact:
+                        tracked_exact.add(member.exact)
+
+        self.tracked_prefixes: FrozenSet[str] = frozenset(tracked_prefixes)
+        self.tracked_exact: FrozenSet[str] = frozenset(tracked_exact)
+        self.leaf_prefixes: Tuple[str, ...] = tuple(dict.fromkeys(leaf_prefixes))
+        # Préfixes de feuilles candidats par première lettre : chaque tag ne teste que ceux qu'il peut matcher
+        by_initial: Dict[str, Tuple[str, ...]] = {}
+        for prefix in self.leaf_prefixes:
+            by_initial[prefix[0]] = by_initial.get(prefix[0], ()) + (prefix,)
+        self._leaf_prefixes_by_initial = by_initial
+
+        self.dictionary = dictionary if dictionary is not None else get_category_dictionary()
+        # Informations de règle par id du dictionnaire (remplies à la demande)
+        self._info_by_id: List[Optional[_TagInfo]] = []
+
+    def _compile_leaf_lists(self, theme: Dict[str, Any]) -> Tuple[_LeafList, ...]:
+        lists: List[_LeafList] = []
+        if "leaf_extraction_prefixes" in theme:
+            lists.append(_LeafList(
+                name="leaf_items",
+                prefixes=tuple(theme["leaf_extraction_prefixes"]),
+                prefix_items=frozenset(theme.get("prefix_items", ())),
+                blacklist=frozenset(),
+                preferred=frozenset(),
+                max_items=int(theme.get("max_leaf_items", 3)),
+            ))
+        if "sights_leaf_extraction_prefix" in theme:
+            lists.append(_LeafList(
+                name="sights",
+                prefixes=(theme["sights_leaf_extraction_prefix"],),
+                prefix_items=frozenset(),
+                blacklist=frozenset(),
+                preferred=frozenset(self.humanize(s).lower() for s in theme.get("preferred_sights", ())),
+                max_items=int(theme.get("max_sights", 3)),
+            ))
+        if "restaurants_prefix" in theme:
+            lists.append(_LeafList(
+                name="cuisines",
+                prefixes=(theme["restaurants_prefix"],),
+                prefix_items=frozenset(),
+                blacklist=frozenset(theme.get("cuisines_blacklist", ())),
+                preferred=frozenset(),
+                max_items=int(theme.get("max_cuisines", 3)),
+            ))
+        return tuple(lists)
+
+    @classmethod
+    def from_json(cls, path: str = DEFAULT_RULES_PATH) -> "CompiledCategoryRules":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def humanize(self, token: str) -> str:
+        token = token.replace("_", " ")
+        return self.humanize_map.get(token.lower(), token)
+
+    def _tag_info(self, cat: str) -> _TagInfo:
+        # Le tag et chacun de ses ancêtres pointés, limités aux préfixes suivis
+        prefixes = [cat] if cat in self.tracked_prefixes else []
+        dot = cat.rfind(".")
+        while dot != -1:
+            ancestor = cat[:dot]
+            if ancestor in self.tracked_prefixes:
+                prefixes.append(ancestor)
+            dot = cat.rfind(".", 0, dot)
+
+        leaves = []
+        for prefix in self._leaf_prefixes_by_initial.get(cat[:1], ()):
+            if not cat.startswith(prefix):
+                continue
+            leaf = cat[len(prefix):]
+            if leaf.startswith("."):
+                leaf = leaf[1:]
+            if leaf:
+                leaves.append((prefix, leaf.rsplit(".", 1)[-1]))
+
+        return _TagInfo(tuple(prefixes), cat if cat in self.tracked_exact else None, tuple(leaves))
+
+    def _info_for_id(self, tag_id: int) -> _TagInfo:
+        table = self._info_by_id
+        if tag_id >= len(table):
+            table.extend([None] * (len(self.dictionary) - len(table)))
+        info = table[tag_id]
+        if info is None:
+            info = table[tag_id] = self._tag_info(self.dictionary.names[tag_id])
+        return info
+
+    def _scan(
+        self, tagged: Iterable[Tuple[_TagInfo, int]]
+    ) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, List[str]]]:
+        """
+        Un seul passage sur les tags (informations de règle + poids).
+
+        Returns:
+            (poids max par préfixe suivi, poids par tag exact suivi, feuilles brutes par préfixe de feuille)
+        """
+        prefix_weight: Dict[str, int] = {}
+        exact_weight: Dict[str, int] = {}
+        raw_leaves: Dict[str, List[str]] = {prefix: [] for prefix in self.leaf_prefixes}
+
+        for info, weight in tagged:
+            if info.exact is not None:
+                exact_weight[info.exact] = weight
+            for prefix in info.prefixes:
+                if weight > prefix_weight.get(prefix, 0):
+                    prefix_weight[prefix] = weight
+            for prefix, leaf in info.leaves:
+                raw_leaves[prefix].append(leaf)
+
+        return prefix_weight, exact_weight, raw_leaves
+
+    def _leaf_items(self, leaf_list: _LeafList, prefix_weight: Dict[str, int], raw_leaves: Dict[str, List[str]]) -> List[str]:
+        values: List[str] = []
+        for prefix in leaf_list.prefixes:
+            if prefix in leaf_list.prefix_items:
+                if prefix not in prefix_weight:
+                    continue
+                values.append(prefix)
+            values.extend(raw_leaves[prefix])
+
+        items = _dedupe_keep_order(self.humanize(v) for v in values if v not in leaf_list.blacklist)
+        if leaf_list.preferred:
+            items = (
+                [i for i in items if i.lower() in leaf_list.preferred]
+                + [i for i in items if i.lower() not in leaf_list.preferred]
+            )
+        return items[: leaf_list.max_items]
+
+    @staticmethod
+    def _bit_text(
+        bit: _Bit,
+        emitted: List[str],
+        prefix_weight: Dict[str, int],
+        exact_weight: Dict[str, int],
+        leaves: Dict[str, List[str]],
+    ) -> Optional[str]:
+        if bit.group:
+            present = [
+                member for member in bit.group
+                if (member.prefix is None or member.prefix in prefix_weight)
+                and (member.exact is None or member.exact in exact_weight)
+            ]
+            if not present:
+                return None
+            return bit.text if len(present) == len(bit.group) else present[0].text
+
+        gated = bit.prefix is not None or bit.exact is not None
+        if bit.prefix is not None and bit.prefix not in prefix_weight:
+            return None
+        if bit.exact is not None and bit.exact not in exact_weight:
+            return None
+        if bit.unless is not None and bit.unless in emitted:
+            return None
+
+        if bit.leaves is None:
+            return bit.text
+        items = leaves.get(bit.leaves)
+        if items:
+            return bit.text.format(items=_join_natural(items))
+        if gated or bit.else_prefix is None or bit.else_prefix in prefix_weight:
+            return bit.else_text
+        return None
+
+    def _tagged(self, categories: Iterable[str], weights: Optional[Mapping[str, int]]) -> List[Tuple[_TagInfo, int]]:
+        id_of = self.dictionary.id_of
+        tagged = []
+        for cat in categories:
+            tag_id = id_of.get(cat)
+            # Tag hors dictionnaire (rare) : calculé à la volée, sans l'interner
+            info = self._info_for_id(tag_id) if tag_id is not None else self._tag_info(cat)
+            tagged.append((info, weights.get(cat, 1) if weights is not None else 1))
+        return tagged
+
+    def describe(self, categories: Iterable[str], weights: Optional[Mapping[str, int]] = None) -> str:
+        """
+        Phrase décrivant une liste de tags.
+
+        Args:
+            categories: Tags pointés (déjà nettoyés par l'appelant)
+            weights: None pour la génération simple ; sinon tag -> poids 1..5 (déjà bornés, défaut 1).
+                     Les thèmes sont alors triés par poids et leur formulation intensifiée.
+
+        Returns:
+            Une phrase ("A destination featuring ...") ou la phrase de repli
+        """
+        return self._describe(self._tagged(categories, weights), weighted=weights is not None)
+
+    def describe_ids(self, ids: Sequence[int], weights: Optional[Sequence[int]] = None) -> str:
+        """
+        Comme describe, pour un profil d'ids du dictionnaire (l'ordre des ids fixe l'ordre des feuilles).
+
+        Args:
+            ids: Ids des tags
+            weights: None pour la génération simple ; sinon poids 1..5 alignés sur ids
+        """
+        info_for_id = self._info_for_id
+        if weights is None:
+            return self._describe([(info_for_id(int(i)), 1) for i in ids], weighted=False)
+        return self._describe([(info_for_id(int(i)), int(w)) for i, w in zip(ids, weights)], weighted=True)
+
+    def _theme_bits(self, tagged: List[Tuple[_TagInfo, int]]) -> List[Tuple[_Theme, int, List[str]]]:
+        """(thème, poids du thème, morceaux de phrase) pour chaque thème présent, dans l'ordre des thèmes."""
+        prefix_weight, exact_weight, raw_leaves = self._scan(tagged)
+
+        present: List[Tuple[_Theme, int, List[str]]] = []
+        for theme in self.themes:
+            theme_weight = max(
+                [prefix_weight.get(p, 0) for p in theme.any_prefixes]
+                + [exact_weight.get(e, 0) for e in theme.any_exact]
+                or [0]
+            )
+            if theme_weight <= 0:
+                continue
+
+            leaves = {
+                leaf_list.name: self._leaf_items(leaf_list, prefix_weight, raw_leaves)
+                for leaf_list in theme.leaf_lists
+            }
+            bits: List[str] = []
+            for bit in theme.bits:
+                text = self._bit_text(bit, bits, prefix_weight, exact_weight, leaves)
+                if text:
+                    bits.append(text)
+            present.append((theme, theme_weight, _dedupe_keep_order(bits)))
+        return present
+
+    def _assemble(self, present: List[Tuple[_Theme, int, List[str]]], weighted: bool) -> str:
+        weighted_chunks: List[Tuple[int, int, str]] = []
+        for theme, theme_weight, bits in present:
+            if not weighted:
+                if bits:
+                    weighted_chunks.append((1, theme.order, _join_natural(bits)))
+                continue
+
+            base = _join_natural(bits) if bits else theme.fallback
+            suffix = theme.weight_suffixes[min(max(theme_weight, 1), 5) - 1]
+            weighted_chunks.append((theme_weight, theme.order, f"{base}{suffix}"))
+
+        if not weighted_chunks:
+            return self.fallback
+
+        if not weighted:
+            chunks = _dedupe_keep_order(c for _, _, c in weighted_chunks)[: self.max_chunks]
+        else:
+            # Préférences les plus fortes d'abord, ordre des thèmes en cas d'égalité
+            weighted_chunks.sort(key=lambda x: (-x[0], x[1]))
+            chunks = _dedupe_keep_order([c for _, _, c in weighted_chunks][: self.max_chunks])
+
+        return self.template.format(chunks=_join_natural(chunks))
+
+    def _describe(self, tagged: List[Tuple[_TagInfo, int]], weighted: bool) -> str:
+        return self._assemble(self._theme_bits(tagged), weighted)
+
+    # --- Treillis des thèmes (cf. theme_lattice.py) ---
+    # Un profil est "au niveau des thèmes" si chaque thème présent n'a que sa formulation
+    # générique (fallback, ex: "historical heritage") : sa phrase ne dépend alors que du
+    # poids (0 = absent, 1..5) de chacun des thèmes, soit au plus 6^nb_thèmes phrases.
+    LATTICE_LEVELS = 6
+
+    @property
+    def lattice_size(self) -> int:
+        return self.LATTICE_LEVELS ** len(self.themes)
+
+    def theme_lattice_index(self, categories: Iterable[str], weights: Optional[Mapping[str, int]] = None) -> Optional[int]:
+        """
+        Index du profil dans le treillis des thèmes, ou None si une feuille ou un morceau
+        spécifique apparaît dans la phrase (encodage en direct nécessaire).
+
+        Mêmes arguments que describe ; pour un index i, lattice_sentence(i) == describe(...).
+        """
+        weighted = weights is not None
+        index = 0
+        for theme, theme_weight, bits in self._theme_bits(self._tagged(categories, weights)):
+            generic = bits == [theme.fallback] or (weighted and not bits)
+            if not generic:
+                return None
+            index += min(max(theme_weight, 1), 5) * self.LATTICE_LEVELS ** (theme.order - 1)
+        return index
+
+    def lattice_weights(self, index: int) -> Tuple[int, ...]:
+        """Poids (0..5) de chaque thème, dans l'ordre des thèmes, pour un index du treillis."""
+        if not 0 <= index < self.lattice_size:
+            raise ValueError(f"Index hors du treillis: {index}")
+        weights = []
+        for _ in self.themes:
+            index, weight = divmod(index, self.LATTICE_LEVELS)
+            weights.append(weight)
+        return tuple(weights)
+
+    def lattice_sentence(self, index: int) -> str:
+        """Phrase d'un point du treillis (thèmes présents avec leur formulation générique)."""
+        present = [
+            (theme, weight, [theme.fallback])
+            for theme, weight in zip(self.themes, self.lattice_weights(index))
+            if weight > 0
+        ]
+        # Poids tous à 1 : identique à la génération simple (suffixe vide, ordre des thèmes)
+        return self._assemble(present, weighted=True)
+
+
+@lru_cache(maxsize=None)
+def load_rules(path: str = DEFAULT_RULES_PATH) -> CompiledCategoryRules:
+    """Règles compilées (chargées et compilées une seule fois par chemin)."""
+    return CompiledCategoryRules.from_json(path)
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    rules = load_rules()
+    example = ["beach", "natural.water", "heritage", "tourism.sights.castle", "catering.restaurant.italian", "ski"]
+    print(f"Règles version {rules.version} : {len(rules.themes)} thèmes, "
+          f"{len(rules.tracked_prefixes)} préfixes suivis, {len(rules.leaf_prefixes)} préfixes de feuilles")
+    print(rules.describe(example))
+    print(rules.describe(example, {tag: (5 if tag == "ski" else 1) for tag in example}))
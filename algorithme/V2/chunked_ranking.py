@@ -0,0 +1,308 @@
+"""
+Classement exact top-K en mémoire bornée.
+
+Pour les grands catalogues (POI, extension au-delà des villes), la matrice dense
+des embeddings ne tient plus confortablement en mémoire. Ce module parcourt le
+magasin d'embeddings par blocs de taille fixe (fichier .npy en mmap ou curseur
+PostgreSQL côté serveur), score chaque bloc et fusionne un top-K courant avec
+np.argpartition. Le pic mémoire est borné par un budget configurable et le
+classement obtenu est celui de la référence rank_top_k_in_memory (cosinus sur
+toute la matrice puis tri stable complet, sans blocs ni argpartition).
+"""
+
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+
+def save_embedding_store(cities: List[Dict[str, Any]], directory: str) -> Tuple[str, str]:
+    """
+    Écrit les embeddings au format mmap : embeddings.npy (float32) + ids.npy (int64).
+
+    Args:
+        cities: Liste [{"id": 1, "name": "Paris", "embedding": [...]}, ...]
+        directory: Dossier de sortie
+
+    Returns:
+        Chemins (embeddings.npy, ids.npy)
+    """
+    os.makedirs(directory, exist_ok=True)
+    embeddings_path = os.path.join(directory, "embeddings.npy")
+    ids_path = os.path.join(directory, "ids.npy")
+
+    matrix = np.asarray([city["embedding"] for city in cities], dtype=np.float32)
+    ids = np.asarray([city["id"] for city in cities], dtype=np.int64)
+
+    np.save(embeddings_path, matrix)
+    np.save(ids_path, ids)
+    logger.info(f"✓ Magasin d'embeddings écrit: {matrix.shape[0]} lignes × {matrix.shape[1]} dims")
+    return embeddings_path, ids_path
+
+
+def rows_for_budget(dim: int, memory_budget_mb: float, k: int) -> int:
+    """
+    Nombre de lignes par bloc pour respecter le budget mémoire.
+
+    Un bloc coûte sa copie float32, sa copie de travail float64 (_score_block),
+    ses produits scalaires, normes et scores (float64), plus le top-K courant
+    fusionné avec le top-K du bloc.
+    """
+    bytes_per_row = dim * 4 + dim * 8 + 8 + 8 + 8
+    budget = int(memory_budget_mb * 1024 * 1024) - 2 * k * 16
+    return max(1, budget // bytes_per_row)
+
+
+def iter_npy_blocks(directory: str, block_rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Parcourt embeddings.npy / ids.npy en mmap par blocs de block_rows lignes.
+
+    Seul le bloc courant est chargé en mémoire.
+    """
+    matrix = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+    ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode="r")
+
+    for start in range(0, matrix.shape[0], block_rows):
+        stop = start + block_rows
+        yield np.asarray(ids[start:stop]), np.asarray(matrix[start:stop], dtype=np.float32)
+
+
+def iter_db_blocks(conn_params: Dict[str, Any], block_rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Parcourt la table cities par blocs via un curseur nommé (côté serveur).
+
+    PostgreSQL ne renvoie que block_rows lignes à la fois : la table n'est
+    jamais matérialisée entièrement côté client.
+    """
+    conn = psycopg2.connect(**conn_params)
+    try:
+        with conn.cursor(name="embedding_stream") as cursor:
+            cursor.itersize = block_rows
+            cursor.execute("""
+                SELECT id, embedding
+                FROM cities
+                WHERE embedding IS NOT NULL
+                ORDER BY id;
+            """)
+            while True:
+                rows = cursor.fetchmany(block_rows)
+                if not rows:
+                    break
+                ids = np.asarray([row[0] for row in rows], dtype=np.int64)
+                matrix = np.asarray([row[1] for row in rows], dtype=np.float32)
+                yield ids, matrix
+    finally:
+        conn.close()
+
+
+def _score_block(user_vector: np.ndarray, user_norm: float, matrix: np.ndarray) -> np.ndarray:
+    """
+    Similarité cosinus entre le vecteur utilisateur et chaque ligne du bloc.
+
+    Les lignes de norme nulle ont une similarité de 0.0 (comme cosine_similarity).
+    Le bloc est converti une seule fois en float64 (copie comptée par rows_for_budget).
+    """
+    block = matrix.astype(np.float64)
+    # Réductions ligne par ligne avec einsum : le résultat ne dépend pas de la hauteur
+    # du bloc (le GEMV BLAS change d'arrondi selon le découpage) et le carré du bloc
+    # n'est pas matérialisé (contrairement à np.linalg.norm)
+    dots = np.einsum("ij,j->i", block, user_vector)
+    norms = np.sqrt(np.einsum("ij,ij->i", block, block)) * user_norm
+    del block
+    scores = np.zeros(matrix.shape[0], dtype=np.float64)
+    np.divide(dots, norms, out=scores, where=norms != 0)
+    return scores
+
+
+def _top_k_order(scores: np.ndarray, positions: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices des k meilleurs scores, triés par score décroissant puis par position
+    (même ordre que le tri stable de rank_cities_by_similarity).
+    """
+    if scores.shape[0] > k:
+        # Seuil du k-ième score, puis on garde toutes les égalités au seuil
+        # pour que le départage par position reste exact.
+        kth = np.argpartition(-scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(scores >= scores[kth])
+    else:
+        candidates = np.arange(scores.shape[0])
+
+    order = np.lexsort((positions[candidates], -scores[candidates]))
+    return candidates[order[:k]]
+
+
+def rank_top_k_chunked(
+    user_embedding: List[float],
+    blocks: Iterable[Tuple[np.ndarray, np.ndarray]],
+    k: int = 10,
+    penalties: Optional[Dict[int, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Classement exact top-K en parcourant le magasin d'embeddings bloc par bloc.
+
+    Args:
+        user_embedding: Vecteur utilisateur
+        blocks: Itérateur de blocs (ids, matrice float32), ex: iter_npy_blocks / iter_db_blocks
+        k: Nombre de villes à retourner
+        penalties: Pénalités par id de ville (optionnel)
+
+    Returns:
+        Liste des k meilleures villes : [{"id", "similarity", "penalty", "final_score"}, ...]
+    """
+    if k <= 0:
+        return []
+
+    user_vector = np.asarray(user_embedding, dtype=np.float64)
+    user_norm = float(np.linalg.norm(user_vector))
+    penalties = penalties or {}
+
+    best_ids = np.empty(0, dtype=np.int64)
+    best_positions = np.empty(0, dtype=np.int64)
+    best_similarity = np.empty(0, dtype=np.float64)
+    best_penalty = np.empty(0, dtype=np.float64)
+    best_final = np.empty(0, dtype=np.float64)
+
+    offset = 0
+    for ids, matrix in blocks:
+        n = ids.shape[0]
+        if n == 0:
+            continue
+
+        similarity = _score_block(user_vector, user_norm, matrix)
+        penalty = np.fromiter((penalties.get(int(i), 0.0) for i in ids), dtype=np.float64, count=n)
+        final = similarity - penalty
+        positions = np.arange(offset, offset + n, dtype=np.int64)
+        offset += n
+
+        # Top-K du bloc, puis fusion avec le top-K courant
+        keep = _top_k_order(final, positions, k)
+        merged_final = np.concatenate([best_final, final[keep]])
+        merged_positions = np.concatenate([best_positions, positions[keep]])
+        merged_ids = np.concatenate([best_ids, ids[keep].astype(np.int64)])
+        merged_similarity = np.concatenate([best_similarity, similarity[keep]])
+        merged_penalty = np.concatenate([best_penalty, penalty[keep]])
+
+        keep = _top_k_order(merged_final, merged_positions, k)
+        best_final = merged_final[keep]
+        best_positions = merged_positions[keep]
+        best_ids = merged_ids[keep]
+        best_similarity = merged_similarity[keep]
+        best_penalty = merged_penalty[keep]
+
+    return [
+        {
+            "id": int(city_id),
+            "similarity": float(sim),
+            "penalty": float(pen),
+            "final_score": float(score),
+        }
+        for city_id, sim, pen, score in zip(best_ids, best_similarity, best_penalty, best_final)
+    ]
+
+
+def rank_top_k_in_memory(
+    user_embedding: List[float],
+    ids: np.ndarray,
+    matrix: np.ndarray,
+    k: int = 10,
+    penalties: Optional[Dict[int, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Classement top-K de référence : toute la matrice en mémoire, similarité cosinus
+    directe et tri stable complet des scores (indépendant de rank_top_k_chunked).
+    """
+    if k <= 0:
+        return []
+
+    ids = np.asarray(ids)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    user_vector = np.asarray(user_embedding, dtype=np.float64)
+    penalties = penalties or {}
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(user_vector)
+    safe_norms = np.where(norms == 0, 1.0, norms)
+    similarity = np.where(norms == 0, 0.0, (matrix @ user_vector) / safe_norms)
+    penalty = np.array([penalties.get(int(i), 0.0) for i in ids], dtype=np.float64)
+    final = similarity - penalty
+
+    order = np.argsort(-final, kind="stable")[:k]
+    return [
+        {
+            "id": int(ids[i]),
+            "similarity": float(similarity[i]),
+            "penalty": float(penalty[i]),
+            "final_score": float(final[i]),
+        }
+        for i in order
+    ]
+
+
+def rank_top_k_from_store(
+    user_embedding: List[float],
+    directory: str = None,
+    conn_params: Dict[str, Any] = None,
+    k: int = 10,
+    penalties: Optional[Dict[int, float]] = None,
+    memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+) -> List[Dict[str, Any]]:
+    """
+    Classement exact top-K en mémoire bornée depuis un fichier .npy (mmap) ou PostgreSQL.
+
+    Args:
+        user_embedding: Vecteur utilisateur
+        directory: Dossier contenant embeddings.npy / ids.npy (prioritaire)
+        conn_params: Paramètres PostgreSQL si aucun dossier n'est fourni
+        k: Nombre de villes à retourner
+        penalties: Pénalités par id de ville (optionnel)
+        memory_budget_mb: Budget mémoire pour un bloc et le top-K courant
+
+    Returns:
+        Liste des k meilleures villes
+    """
+    block_rows = rows_for_budget(len(user_embedding), memory_budget_mb, k)
+    logger.info(f"Classement par blocs de {block_rows} lignes (budget: {memory_budget_mb} Mo)")
+
+    if directory is not None:
+        blocks = iter_npy_blocks(directory, block_rows)
+    elif conn_params is not None:
+        blocks = iter_db_blocks(conn_params, block_rows)
+    else:
+        raise ValueError("directory ou conn_params est requis")
+
+    return rank_top_k_chunked(user_embedding, blocks, k, penalties)
+
+
+# Vérification rapide : le mode par blocs doit donner le même classement que la référence en mémoire
+if __name__ == "__main__":
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    rng = np.random.default_rng(0)
+    n_cities, dim = 5000, 384
+    cities = [
+        {"id": i + 1, "name": f"city_{i + 1}", "embedding": rng.standard_normal(dim).tolist()}
+        for i in range(n_cities)
+    ]
+    user = rng.standard_normal(dim).tolist()
+    penalties = {i: 0.05 * (i % 5) for i in range(1, n_cities + 1, 7)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        save_embedding_store(cities, tmp)
+        ids = np.load(os.path.join(tmp, "ids.npy"))
+        matrix = np.load(os.path.join(tmp, "embeddings.npy"))
+
+        expected = rank_top_k_in_memory(user, ids, matrix, k=20, penalties=penalties)
+        for budget in (0.05, 0.5, 4):
+            got = rank_top_k_from_store(user, directory=tmp, k=20, penalties=penalties, memory_budget_mb=budget)
+            # Mêmes villes dans le même ordre ; les scores ne diffèrent que par l'arrondi du GEMV
+            same_order = [city["id"] for city in got] == [city["id"] for city in expected]
+            same_scores = np.allclose([city["final_score"] for city in got],
+                                      [city["final_score"] for city in expected], rtol=0, atol=1e-12)
+            print(f"Budget {budget} Mo - identique au classement en mémoire: {same_order and same_scores}")
@@ -0,0 +1,242 @@
+"""
+Cache local des embeddings, adressé par le contenu.
+
+Les mêmes textes (catégories V1, categories_gpt V2, traductions, POI, requêtes)
+sont ré-encodés à chaque exécution des scripts. Toutes les fonctions d'encodage de
+dataS5 et algorithme passent par EmbeddingCache :
+- clé = sha256(nom du modèle + "\\0" + texte) ;
+- vecteurs float32 ajoutés à la fin d'un fichier binaire (vectors.f32, jamais réécrit) ;
+- index SQLite clé -> (offset, dimension) (index.sqlite).
+
+Un texte déjà vu ne repasse donc jamais par le modèle, qui n'est chargé qu'au premier
+texte absent du cache. L'ajout se fait sous verrou d'écriture SQLite (BEGIN IMMEDIATE) :
+plusieurs processus peuvent partager le même dossier.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(V2_DIR))
+# Surchargeable par la variable d'environnement EMBEDDING_CACHE_DIR
+DEFAULT_CACHE_DIR = os.path.join(REPO_ROOT, ".embedding_cache")
+DEFAULT_BATCH_SIZE = 64
+
+# Limite de paramètres par requête "IN (...)" (SQLITE_MAX_VARIABLE_NUMBER)
+_SQL_CHUNK = 500
+
+
+def text_key(model_name: str, text: str) -> str:
+    """Clé d'un texte pour un modèle donné."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embeddings d'un modèle, encodés au plus une fois par texte.
+
+    Example:
+        >>> cache = get_embedding_cache()
+        >>> vectors = cache.encode(["A destination featuring skiing.", "A destination featuring nightlife."])
+        >>> vectors.shape
+        (2, 384)
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        model_name: str = MODEL_NAME,
+        encode: Optional[Callable[[List[str]], Any]] = None,
+    ):
+        """
+        Args:
+            directory: Dossier du cache (par défaut EMBEDDING_CACHE_DIR ou DEFAULT_CACHE_DIR)
+            model_name: Nom du modèle (fait partie de la clé)
+            encode: Fonction liste de textes -> matrice (par défaut SentenceTransformer(model_name),
+                    chargé au premier texte absent du cache)
+        """
+        self.directory = directory or os.environ.get("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.model_name = model_name
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.sqlite")
+        self._encode = encode
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._reader: Optional[int] = None
+        self._stats = {"hits": 0, "misses": 0}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion (et un descripteur de lecture) par processus : sûr après un fork
+        if self._pid != os.getpid():
+            self._db = sqlite3.connect(self.index_path, timeout=60, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    offset INTEGER NOT NULL,
+                    dim INTEGER NOT NULL
+                )
+            """)
+            open(self.vectors_path, "ab").close()
+            self._reader = os.open(self.vectors_path, os.O_RDONLY)
+            self._pid = os.getpid()
+        return self._db
+
+    def _encoder(self) -> Callable[[List[str]], Any]:
+        if self._encode is None:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Chargement du modèle {self.model_name}...")
+            model = SentenceTransformer(self.model_name)
+            self._encode = lambda texts: model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+        return self._encode
+
+    def lookup(self, texts: Iterable[str]) -> List[Optional[np.ndarray]]:
+        """Vecteurs en cache (float32, lecture seule), None pour les textes absents."""
+        texts = list(texts)
+        keys = [text_key(self.model_name, text) for text in texts]
+        with self._lock:
+            db = self._connection()
+            found: Dict[str, np.ndarray] = {}
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[start:start + _SQL_CHUNK]
+                rows = db.execute(
+                    f"SELECT key, offset, dim FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, offset, dim in rows:
+                    vector = np.frombuffer(os.pread(self._reader, 4 * dim, offset), dtype=np.float32)
+                    found[key] = vector
+        return [found.get(key) for key in keys]
+
+    def put(self, texts: List[str], vectors: Any) -> int:
+        """
+        Ajoute des vecteurs au cache (les textes déjà présents sont ignorés).
+
+        Returns:
+            Nombre de vecteurs ajoutés
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = []
+                seen = set()
+                with open(self.vectors_path, "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    for text, vector in zip(texts, vectors):
+                        key = text_key(self.model_name, text)
+                        if key in seen or db.execute("SELECT 1 FROM embeddings WHERE key = ?", (key,)).fetchone():
+                            continue
+                        seen.add(key)
+                        data = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+                        f.write(data)
+                        rows.append((key, offset, vector.shape[0]))
+                        offset += len(data)
+                    # Vecteurs sur disque avant l'index : un arrêt brutal ne laisse que des octets orphelins
+                    f.flush()
+                    os.fsync(f.fileno())
+                db.executemany("INSERT INTO embeddings (key, offset, dim) VALUES (?, ?, ?)", rows)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def encode(self, texts: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE, normalize: bool = False) -> np.ndarray:
+        """
+        Embeddings des textes : lus dans le cache, ou encodés puis ajoutés au cache.
+
+        Les textes absents sont dédupliqués, triés par longueur (moins de padding) et
+        encodés par lots ; chaque lot est enregistré dès qu'il est calculé.
+
+        Args:
+            texts: Textes à encoder
+            batch_size: Taille des lots envoyés au modèle
+            normalize: Si True, lignes de norme 1
+
+        Returns:
+            Matrice float32 (n_textes, dim), dans l'ordre de texts
+        """
+        texts = list(texts)
+        cached = self.lookup(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        self._stats["hits"] += len(texts) - sum(vector is None for vector in cached)
+        self._stats["misses"] += len(missing)
+
+        computed: Dict[str, np.ndarray] = {}
+        missing.sort(key=len, reverse=True)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = np.asarray(self._encoder()(batch), dtype=np.float32)
+            self.put(batch, vectors)
+            computed.update(zip(batch, vectors))
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        matrix = np.stack([vector if vector is not None else computed[text] for text, vector in zip(texts, cached)])
+        if normalize:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        return matrix
+
+    def encode_one(self, text: str, normalize: bool = False) -> np.ndarray:
+        """Embedding d'un seul texte (float32)."""
+        return self.encode([text], normalize=normalize)[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT count(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Textes trouvés dans le cache / encodés par ce processus, taille du cache."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self),
+            "bytes": os.path.getsize(self.vectors_path),
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+_shared_caches: Dict[str, EmbeddingCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str = MODEL_NAME) -> EmbeddingCache:
+    """Cache partagé du processus pour un modèle (dossier par défaut)."""
+    with _shared_lock:
+        cache = _shared_caches.get(model_name)
+        if cache is None:
+            cache = _shared_caches[model_name] = EmbeddingCache(model_name=model_name)
+        return cache
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    import sys
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    texts = sys.argv[1:] or [
+        "A destination featuring historical heritage and great local restaurants.",
+        "A destination featuring beautiful landscapes like beach and island.",
+    ]
+    cache = get_embedding_cache()
+    for attempt in (1, 2):
+        start = time.perf_counter()
+        vectors = cache.encode(texts)
+        print(f"Passage {attempt}: {vectors.shape} en {(time.perf_counter() - start) * 1000:.1f} ms - {cache.stats()}")
@@ -0,0 +1,259 @@
+"""
+Pool de processus d'encodage pour les gros jobs d'embeddings (CPU seulement).
+
+SentenceTransformer.encode n'occupe qu'un cœur par processus sur nos machines sans
+GPU. EncodingPool démarre N processus, chacun avec sa propre copie du modèle et un
+nombre de threads torch fixé (1 par défaut : N processus = N cœurs, sans
+sur-souscription). Les textes sont découpés en morceaux de chunksize, au plus
+2 × N morceaux sont en vol (mémoire bornée même pour un itérable très long), et les
+vecteurs sont rendus dans l'ordre d'entrée.
+
+Le pool est appelable (liste de textes -> matrice) : il se branche directement
+comme encodeur d'EmbeddingCache, seuls les textes absents du cache lui sont envoyés.
+
+Benchmark de passage à l'échelle : python encoding_pool.py --synthetic
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_CHUNKSIZE = 64
+SYNTHETIC_DIM = 384
+# Variables lues par les bibliothèques de calcul au chargement (OpenBLAS dès l'import de numpy)
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Encodeur du processus de travail (initialisé par _init_worker)
+_worker_encode: Optional[Callable[[List[str]], Any]] = None
+
+
+def synthetic_encode(texts: List[str]) -> np.ndarray:
+    """
+    Encodeur factice déterministe, coûteux en CPU (pur Python), pour les benchmarks
+    et les tests sans le modèle.
+    """
+    rows = []
+    for text in texts:
+        digest = text.encode("utf-8")
+        for _ in range(2000):
+            digest = hashlib.sha256(digest).digest()
+        seed = int.from_bytes(digest[:8], "little")
+        rows.append(np.random.default_rng(seed).standard_normal(SYNTHETIC_DIM))
+    return np.asarray(rows, dtype=np.float32).reshape(len(texts), SYNTHETIC_DIM)
+
+
+def _load_encoder(model_name: str, threads: int, synthetic: bool) -> Callable[[List[str]], Any]:
+    if synthetic:
+        return synthetic_encode
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, device="cpu")
+    return lambda texts: model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+
+def _init_worker(model_name: str, threads: int, synthetic: bool) -> None:
+    global _worker_encode
+    _worker_encode = _load_encoder(model_name, threads, synthetic)
+
+
+def _encode_chunk(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_encode(texts), dtype=np.float32)
+
+
+class EncodingPool:
+    """
+    Processus d'encodage persistants (un modèle chargé par processus, une seule fois).
+
+    Example:
+        >>> with EncodingPool(processes=4) as pool:
+        ...     vectors = pool.encode(texts)               # (len(texts), 384), dans l'ordre
+        ...     cache = EmbeddingCache(encode=pool)        # seuls les textes inédits vont au pool
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        model_name: str = MODEL_NAME,
+        threads_per_worker: int = 1,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        synthetic: bool = False,
+    ):
+        """
+        Args:
+            processes: Nombre de processus (par défaut tous les cœurs) ; 1 = encodage dans ce processus
+            model_name: Modèle sentence-transformers chargé par chaque processus
+            threads_per_worker: Threads par processus (torch, OpenMP, MKL, OpenBLAS)
+            chunksize: Textes par morceau envoyé à un processus
+            synthetic: Si True, synthetic_encode remplace le modèle (benchmarks)
+        """
+        if chunksize < 1 or threads_per_worker < 1:
+            raise ValueError("chunksize et threads_per_worker doivent être >= 1")
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.model_name = model_name
+        self.threads_per_worker = threads_per_worker
+        self.chunksize = chunksize
+        self.synthetic = synthetic
+        self._local_encode: Optional[Callable[[List[str]], Any]] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._saved_env: Dict[str, Optional[str]] = {}
+        if self.processes > 1:
+            # Les processus "spawn" importent numpy (donc OpenBLAS) avant _init_worker et sont
+            # démarrés à la demande : les variables de threads sont posées dans l'environnement
+            # de ce processus, hérité par chaque processus lancé, jusqu'à close()
+            for var in _THREAD_ENV_VARS:
+                self._saved_env[var] = os.environ.get(var)
+                os.environ[var] = str(threads_per_worker)
+            # "spawn" : les processus ne doivent pas hériter par fork d'un torch déjà initialisé
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, threads_per_worker, synthetic),
+            )
+
+    def _chunks(self, texts: Iterable[str]) -> Iterator[List[str]]:
+        texts = iter(texts)
+        while True:
+            chunk = list(islice(texts, self.chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    def imap(self, texts: Iterable[str]) -> Iterator[np.ndarray]:
+        """
+        Matrices des morceaux successifs, dans l'ordre d'entrée.
+
+        L'itérable est consommé au fur et à mesure : au plus 2 morceaux par processus
+        sont en cours de calcul ou en attente d'être lus.
+        """
+        if self._executor is None:
+            if self._local_encode is None:
+                self._local_encode = _load_encoder(self.model_name, self.threads_per_worker, self.synthetic)
+            for chunk in self._chunks(texts):
+                yield np.asarray(self._local_encode(chunk), dtype=np.float32)
+            return
+
+        chunks = self._chunks(texts)
+        pending = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < 2 * self.processes:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending.append(self._executor.submit(_encode_chunk, chunk))
+            if not pending:
+                return
+            yield pending.popleft().result()
+
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embeddings de tous les textes.
+
+        Returns:
+            Matrice float32 (n_textes, dim), dans l'ordre de texts
+        """
+        blocks = list(self.imap(texts))
+        if not blocks:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(blocks)
+
+    __call__ = encode
+
+    def close(self) -> None:
+        """Arrête les processus et restaure les variables de threads de l'environnement."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for var, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        self._saved_env = {}
+
+    def __enter__(self) -> "EncodingPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def benchmark_scaling(
+    texts: List[str],
+    process_counts: List[int],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    synthetic: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Débit d'encodage selon le nombre de processus.
+
+    Le chargement des modèles est exclu de la mesure (un premier passage de
+    chauffe par pool). Les vecteurs de chaque configuration sont comparés à ceux
+    de la première.
+
+    Returns:
+        [{"processes", "seconds", "texts_per_s", "speedup", "efficiency", "identical"}, ...]
+    """
+    results: List[Dict[str, Any]] = []
+    reference = None
+    for processes in process_counts:
+        with EncodingPool(processes, chunksize=chunksize, synthetic=synthetic) as pool:
+            pool.encode(texts[:chunksize * processes])
+            start = time.perf_counter()
+            vectors = pool.encode(texts)
+            seconds = time.perf_counter() - start
+
+        if reference is None:
+            reference = vectors
+        # Accélération relative à la première configuration (1 processus dans le benchmark du module)
+        speedup = (results[0]["seconds"] if results else seconds) / seconds
+        results.append({
+            "processes": processes,
+            "seconds": seconds,
+            "texts_per_s": len(texts) / seconds,
+            "speedup": speedup,
+            "efficiency": speedup / processes,
+            "identical": bool(np.allclose(vectors, reference, atol=1e-5)),
+        })
+        logger.info(f"{results[-1]}")
+    return results
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Benchmark du pool d'encodage")
+    parser.add_argument("--texts", type=int, default=4096, help="Nombre de textes encodés")
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--synthetic", action="store_true", help="Encodeur factice (sans le modèle)")
+    args = parser.parse_args()
+
+    texts = [f"A destination featuring attraction number {i} and local restaurants." for i in range(args.texts)]
+    counts = sorted({1, *[2 ** k for k in range(args.max_processes.bit_length()) if 2 ** k <= args.max_processes],
+                     args.max_processes})
+
+    print(f"{len(texts)} textes, {os.cpu_count()} cœurs")
+    print(f"{'processus':>9} {'secondes':>9} {'textes/s':>10} {'accélération':>13} {'efficacité':>11}")
+    for row in benchmark_scaling(texts, counts, args.chunksize, args.synthetic):
+        print(f"{row['processes']:>9} {row['seconds']:>9.2f} {row['texts_per_s']:>10.0f} "
+              f"{row['speedup']:>12.2f}x {row['efficiency']:>10.0%}"
+              f"{'' if row['identical'] else '  (vecteurs différents !)'}")
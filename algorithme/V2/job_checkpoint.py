@@ -0,0 +1,261 @@
+"""
+Journal de reprise des jobs longs (embeddings, traductions, images).
+
+Chaque job enregistre dans une petite base SQLite l'état de chaque élément traité :
+(job, id, empreinte des entrées, statut, tentatives, prochaine tentative, résultat).
+Au redémarrage :
+- un élément "done" dont les entrées n'ont pas changé est sauté (son résultat est relu
+  dans le journal) ;
+- un élément "failed" est retenté, avec un délai exponentiel entre les lancements ;
+- chaque élément est validé dès qu'il est traité : un arrêt brutal ne perd que
+  l'élément en cours.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(V2_DIR))
+# Surchargeable par la variable d'environnement JOB_CHECKPOINT_PATH
+DEFAULT_JOURNAL_PATH = os.path.join(REPO_ROOT, ".job_checkpoints", "journal.sqlite")
+
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+DEFERRED = "deferred"
+
+
+def input_hash(*parts: Any) -> str:
+    """
+    Empreinte des entrées d'un élément (toute valeur sérialisable en JSON).
+
+    Example:
+        >>> input_hash("fr", "A destination featuring skiing.")
+        'e010413ac3eab68b'
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class JobCheckpoint:
+    """
+    Journal des éléments traités par un job.
+
+    Example:
+        >>> checkpoint = JobCheckpoint("translate_categories_gpt")
+        >>> status, text = checkpoint.process(city_id, input_hash("fr", text), lambda: translator.translate(text))
+        >>> status in (DONE, SKIPPED)   # FAILED après max_attempts, DEFERRED si délai de reprise en cours
+    """
+
+    def __init__(
+        self,
+        job: str,
+        path: Optional[str] = None,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 600.0,
+    ):
+        """
+        Args:
+            job: Nom du job (plusieurs jobs peuvent partager le même journal)
+            path: Fichier SQLite (par défaut JOB_CHECKPOINT_PATH ou DEFAULT_JOURNAL_PATH)
+            max_attempts: Tentatives par élément et par lancement
+            base_delay: Délai (s) avant la 2e tentative, doublé à chaque échec
+            max_delay: Délai maximal (s), y compris entre deux lancements
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts doit être >= 1")
+        self.job = job
+        self.path = path or os.environ.get("JOB_CHECKPOINT_PATH", DEFAULT_JOURNAL_PATH)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stats = {DONE: 0, SKIPPED: 0, FAILED: 0, DEFERRED: 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Mode autocommit : chaque écriture est validée immédiatement
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS job_items (
+                job TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_retry_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                result TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job, item_id)
+            )
+        """)
+
+    def _delay(self, attempts: int) -> float:
+        return min(self.max_delay, self.base_delay * 2 ** max(0, attempts - 1))
+
+    def _row(self, item_id: Any) -> Optional[Tuple[str, str, int, float, Optional[str]]]:
+        return self._db.execute(
+            "SELECT input_hash, status, attempts, next_retry_at, result FROM job_items WHERE job = ? AND item_id = ?",
+            (self.job, str(item_id)),
+        ).fetchone()
+
+    def state(self, item_id: Any, item_hash: str, now: Optional[float] = None) -> str:
+        """
+        Etat d'un élément pour ce lancement.
+
+        Returns:
+            SKIPPED (déjà traité, mêmes entrées), DEFERRED (échec récent, délai de reprise
+            en cours) ou "pending" (à traiter)
+        """
+        row = self._row(item_id)
+        if row is None or row[0] != item_hash:
+            return "pending"
+        if row[1] == DONE:
+            return SKIPPED
+        if row[1] == FAILED and row[3] > (now if now is not None else time.time()):
+            return DEFERRED
+        return "pending"
+
+    def result(self, item_id: Any) -> Any:
+        """Résultat enregistré d'un élément traité (None si absent)."""
+        row = self._row(item_id)
+        return json.loads(row[4]) if row is not None and row[1] == DONE and row[4] is not None else None
+
+    def mark_done(self, item_id: Any, item_hash: str, result: Any = None) -> None:
+        """Enregistre un élément traité (et son résultat, sérialisable en JSON)."""
+        self.mark_done_many([(item_id, item_hash, result)])
+
+    def mark_done_many(self, items: Iterable[Tuple[Any, str, Any]]) -> None:
+        """Enregistre plusieurs éléments traités en une seule transaction."""
+        now = time.time()
+        rows = [
+            (self.job, str(item_id), item_hash, DONE, None if result is None else json.dumps(result, ensure_ascii=False), now)
+            for item_id, item_hash, result in items
+        ]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("""
+                INSERT INTO job_items (job, item_id, input_hash, status, attempts, next_retry_at, last_error, result, updated_at)
+                VALUES (?, ?, ?, ?, 0, 0, NULL, ?, ?)
+                ON CONFLICT (job, item_id) DO UPDATE SET
+                    input_hash = excluded.input_hash, status = excluded.status, attempts = 0,
+                    next_retry_at = 0, last_error = NULL, result = excluded.result, updated_at = excluded.updated_at
+            """, rows)
+        self._stats[DONE] += len(rows)
+
+    def mark_failed(self, item_id: Any, item_hash: str, error: str, attempts: int = 1) -> None:
+        """
+        Enregistre un échec : les tentatives sont cumulées entre lancements et le délai
+        avant la prochaine reprise double à chaque échec.
+        """
+        row = self._row(item_id)
+        previous = row[2] if row is not None and row[0] == item_hash and row[1] == FAILED else 0
+        total = previous + attempts
+        now = time.time()
+        self._db.execute("""
+            INSERT INTO job_items (job, item_id, input_hash, status, attempts, next_retry_at, last_error, result, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)
+            ON CONFLICT (job, item_id) DO UPDATE SET
+                input_hash = excluded.input_hash, status = excluded.status, attempts = excluded.attempts,
+                next_retry_at = excluded.next_retry_at, last_error = excluded.last_error, result = NULL,
+                updated_at = excluded.updated_at
+        """, (self.job, str(item_id), item_hash, FAILED, total, now + self._delay(total), error[:1000], now))
+        self._stats[FAILED] += 1
+
+    def process(
+        self,
+        item_id: Any,
+        item_hash: str,
+        work: Callable[[], Any],
+        fatal: Tuple[Type[BaseException], ...] = (),
+    ) -> Tuple[str, Any]:
+        """
+        Traite un élément s'il n'est pas déjà fait, avec reprises et délai exponentiel.
+
+        Args:
+            item_id: Identifiant de l'élément (converti en texte)
+            item_hash: Empreinte des entrées (input_hash)
+            work: Fonction sans argument qui traite l'élément et renvoie son résultat
+            fatal: Exceptions à propager immédiatement (ex: quota d'API atteint), sans
+                   enregistrer d'échec
+
+        Returns:
+            (statut, résultat) : (DONE, résultat), (SKIPPED, résultat enregistré),
+            (FAILED, None) ou (DEFERRED, None)
+        """
+        state = self.state(item_id, item_hash)
+        if state == SKIPPED:
+            self._stats[SKIPPED] += 1
+            return SKIPPED, self.result(item_id)
+        if state == DEFERRED:
+            self._stats[DEFERRED] += 1
+            return DEFERRED, None
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                result = work()
+            except fatal:
+                raise
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logger.warning(f"[{self.job}] {item_id}: échec après {attempt} tentatives ({e})")
+                    self.mark_failed(item_id, item_hash, f"{type(e).__name__}: {e}", attempts=attempt)
+                    return FAILED, None
+                time.sleep(self._delay(attempt))
+                continue
+            self.mark_done(item_id, item_hash, result)
+            return DONE, result
+        return FAILED, None
+
+    def forget(self, item_id: Any) -> None:
+        """Oublie un élément (ex: son résultat a disparu du disque) : il sera retraité."""
+        self._db.execute("DELETE FROM job_items WHERE job = ? AND item_id = ?", (self.job, str(item_id)))
+
+    def reset(self) -> int:
+        """Oublie tous les éléments du job (prochain lancement complet)."""
+        return self._db.execute("DELETE FROM job_items WHERE job = ?", (self.job,)).rowcount
+
+    def summary(self) -> Dict[str, int]:
+        """Compteurs de ce lancement (done, skipped, failed, deferred) et éléments en échec dans le journal."""
+        failed_total = self._db.execute(
+            "SELECT count(*) FROM job_items WHERE job = ? AND status = ?", (self.job, FAILED)
+        ).fetchone()[0]
+        return {**self._stats, "failed_in_journal": failed_total}
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "JobCheckpoint":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    path = os.path.join(tempfile.mkdtemp(), "journal.sqlite")
+
+    def flaky_square(n: int) -> int:
+        if random.random() < 0.3:
+            raise ConnectionError("service indisponible")
+        return n * n
+
+    for run in (1, 2):
+        with JobCheckpoint("demo", path, base_delay=0.01, max_delay=0.0) as checkpoint:
+            for n in range(20):
+                checkpoint.process(n, input_hash(n), lambda: flaky_square(n))
+            print(f"Lancement {run}: {checkpoint.summary()}")
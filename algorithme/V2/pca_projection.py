@@ -0,0 +1,336 @@
+"""
+Réduction de dimension des embeddings (ACP par SVD) avec rapport de qualité.
+
+Les vecteurs MiniLM ont 384 dimensions pour ~200 villes : mémoire, transfert vers le
+téléphone et temps du GEMV sont proportionnels à la dimension. Job hors ligne :
+- fit_pca : ACP des embeddings des villes (SVD de la matrice centrée, NumPy seul) ;
+- save_projection : écrit la projection (moyenne, composantes, villes projetées) à
+  côté de l'export du catalogue (catalog_export.py), indexée par la version ;
+- quality_report : recouvrement du top-10 et corrélation des scores à 64/128/256
+  dimensions, mesurés sur des villes tenues à l'écart de l'ajustement (requêtes
+  hors échantillon).
+
+A l'exécution, ReducedCatalog.scores projette la requête (un produit d × k) et fait
+un GEMV n × k. Le cosinus est reconstitué avec la moyenne et les normes d'origine :
+    x·q = P(x-μ)·P(q-μ) + μ·x + μ·q - μ·μ
+seul le premier terme est approché (exact si k atteint le rang des données).
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from catalog import catalog_version, load_catalog_from_db, load_catalog_from_json
+from catalog_export import DEFAULT_OUTPUT_DIR, MANIFEST_NAME, _sha256_file
+from chunked_ranking import _top_k_order
+
+logger = logging.getLogger(__name__)
+
+REPORT_DIMS = (64, 128, 256)
+TOP_K = 10
+
+
+class PcaProjection:
+    """
+    Projection linéaire x -> (x - mean) @ components.T (k composantes principales).
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance_ratio: np.ndarray):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=np.float64)
+
+    @property
+    def dim(self) -> int:
+        """Dimension réduite (peut être inférieure à la dimension demandée : rang des données)."""
+        return int(self.components.shape[0])
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Projette un vecteur (d,) ou une matrice (n, d) en float32."""
+        return (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
+
+
+def fit_pca(matrix: np.ndarray, dim: int) -> PcaProjection:
+    """
+    ACP par SVD de la matrice centrée.
+
+    Args:
+        matrix: Embeddings (n, d)
+        dim: Nombre de composantes (limité à min(n, d))
+
+    Returns:
+        PcaProjection (composantes triées par variance décroissante)
+    """
+    x = np.asarray(matrix, dtype=np.float64)
+    mean = x.mean(axis=0)
+    _, singular, vt = np.linalg.svd(x - mean, full_matrices=False)
+    variance = singular ** 2
+    total = variance.sum()
+    k = min(dim, vt.shape[0])
+    ratio = variance[:k] / total if total > 0 else np.zeros(k)
+    return PcaProjection(mean, vt[:k], ratio)
+
+
+class ReducedCatalog:
+    """
+    Villes projetées : scores cosinus approchés avec un GEMV de dimension k.
+
+    Example:
+        >>> reduced = ReducedCatalog.from_matrix(fit_pca(matrix, 128), matrix)
+        >>> scores = reduced.scores(user_embedding)   # (n_villes,), ~ cosinus exact
+    """
+
+    def __init__(self, projection: PcaProjection, reduced: np.ndarray, city_mean_dot: np.ndarray, city_norms: np.ndarray):
+        """
+        Args:
+            projection: Projection ajustée
+            reduced: Villes projetées (n, k)
+            city_mean_dot: Produits scalaires μ·x des villes d'origine (n,)
+            city_norms: Normes des villes d'origine (n,)
+        """
+        self.projection = projection
+        self.reduced = np.asarray(reduced, dtype=np.float32)
+        self.city_mean_dot = np.asarray(city_mean_dot, dtype=np.float32)
+        self.city_norms = np.asarray(city_norms, dtype=np.float32)
+        self.mean_sq = float(projection.mean @ projection.mean)
+
+    @classmethod
+    def from_matrix(cls, projection: PcaProjection, city_matrix: np.ndarray) -> "ReducedCatalog":
+        """Projette les embeddings d'origine des villes (n, d)."""
+        city_matrix = np.asarray(city_matrix, dtype=np.float32)
+        return cls(
+            projection,
+            projection.project(city_matrix),
+            # Termes exacts de la reconstitution du produit scalaire
+            city_matrix @ projection.mean,
+            np.linalg.norm(city_matrix, axis=1),
+        )
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        Cosinus approché entre la requête (dimension d'origine) et chaque ville.
+
+        Returns:
+            np.ndarray (n_villes,) float64
+        """
+        query = np.asarray(query, dtype=np.float32)
+        dots = self.reduced @ self.projection.project(query)
+        dots = dots + self.city_mean_dot + float(self.projection.mean @ query) - self.mean_sq
+        norms = self.city_norms * float(np.linalg.norm(query))
+        out = np.zeros(dots.shape[0], dtype=np.float64)
+        np.divide(dots, norms, out=out, where=norms != 0)
+        return out
+
+
+def _cosine_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1) * float(np.linalg.norm(query))
+    out = np.zeros(matrix.shape[0], dtype=np.float64)
+    np.divide(matrix @ query, norms, out=out, where=norms != 0)
+    return out
+
+
+def quality_report(
+    matrix: np.ndarray,
+    dims: List[int] = REPORT_DIMS,
+    top_k: int = TOP_K,
+    holdout: float = 0.2,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Qualité du classement réduit par rapport au cosinus exact en 384 dimensions.
+
+    Une fraction des villes (holdout) est exclue de l'ajustement de l'ACP et sert de
+    requêtes ; le classement porte sur tout le catalogue (la ville requête exclue).
+
+    Args:
+        matrix: Embeddings des villes (n, d)
+        dims: Dimensions évaluées
+        top_k: Taille du top comparé
+        holdout: Fraction de villes utilisées comme requêtes hors échantillon
+        seed: Graine du tirage des villes requêtes
+
+    Returns:
+        [{"dim", "effective_dim", "explained_variance", "top_k_overlap", "min_top_k_overlap",
+          "score_correlation", "max_abs_score_error", "bytes_per_city", "gemv_us"}, ...]
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    n = matrix.shape[0]
+    rng = np.random.default_rng(seed)
+    queries = np.sort(rng.choice(n, size=max(1, int(round(n * holdout))), replace=False))
+    train = np.setdiff1d(np.arange(n), queries)
+    positions = np.arange(n - 1, dtype=np.int64)
+    k = min(top_k, n - 1)
+
+    exact = {}
+    for q in queries:
+        others = np.delete(np.arange(n), q)
+        exact[q] = (others, _cosine_scores(matrix[others], matrix[q]))
+
+    report = []
+    for dim in dims:
+        projection = fit_pca(matrix[train], dim)
+        reduced = ReducedCatalog.from_matrix(projection, matrix)
+        overlaps, correlations, errors = [], [], []
+        for q in queries:
+            others, exact_scores = exact[q]
+            approx = reduced.scores(matrix[q])[others]
+            top_exact = set(_top_k_order(exact_scores, positions, k).tolist())
+            top_approx = set(_top_k_order(approx, positions, k).tolist())
+            overlaps.append(len(top_exact & top_approx) / k)
+            correlations.append(float(np.corrcoef(exact_scores, approx)[0, 1]))
+            errors.append(float(np.max(np.abs(exact_scores - approx))))
+
+        query = matrix[queries[0]]
+        start = time.perf_counter()
+        for _ in range(200):
+            reduced.scores(query)
+        gemv_us = (time.perf_counter() - start) / 200 * 1e6
+
+        report.append({
+            "dim": dim,
+            "effective_dim": projection.dim,
+            "explained_variance": float(projection.explained_variance_ratio.sum()),
+            "top_k_overlap": float(np.mean(overlaps)),
+            "min_top_k_overlap": float(np.min(overlaps)),
+            "score_correlation": float(np.mean(correlations)),
+            "max_abs_score_error": float(np.max(errors)),
+            "bytes_per_city": 4 * projection.dim,
+            "gemv_us": gemv_us,
+        })
+        logger.info(f"{report[-1]}")
+    return report
+
+
+def save_projection(
+    projection: PcaProjection,
+    city_ids: np.ndarray,
+    city_matrix: np.ndarray,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    report: Optional[Dict[str, Any]] = None,
+    dim: Optional[int] = None,
+) -> str:
+    """
+    Écrit catalog_<version>.pca<dim>.npz à côté de l'export du catalogue et l'ajoute au
+    manifeste (section "projections") si le manifeste correspond à la même version.
+
+    Args:
+        dim: Dimension demandée (nom du fichier et clé du manifeste, relue par
+             load_reduced_catalog) ; par défaut projection.dim. La dimension réelle,
+             limitée par le rang des données, est enregistrée dans "effective_dim".
+
+    Returns:
+        Chemin du fichier .npz
+    """
+    dim = projection.dim if dim is None else int(dim)
+    if projection.dim > dim:
+        raise ValueError(f"Projection de {projection.dim} composantes pour une dimension demandée de {dim}")
+    city_ids = np.asarray(city_ids, dtype=np.int64)
+    version = catalog_version(city_ids, city_matrix)
+    reduced = ReducedCatalog.from_matrix(projection, city_matrix)
+
+    os.makedirs(output_dir, exist_ok=True)
+    file = f"catalog_{version}.pca{dim}.npz"
+    path = os.path.join(output_dir, file)
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        city_ids=city_ids,
+        mean=projection.mean,
+        components=projection.components,
+        explained_variance_ratio=projection.explained_variance_ratio,
+        reduced=reduced.reduced,
+        city_mean_dot=reduced.city_mean_dot,
+        city_norms=reduced.city_norms,
+        catalog_version=np.asarray(version),
+    )
+    os.replace(tmp_path, path)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["catalog_version"] == version:
+            manifest.setdefault("projections", {})[str(dim)] = {
+                "file": file,
+                "effective_dim": projection.dim,
+                "bytes": os.path.getsize(path),
+                "sha256": _sha256_file(path),
+                "explained_variance": float(projection.explained_variance_ratio.sum()),
+                "quality": report,
+            }
+            with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(manifest_path + ".tmp", manifest_path)
+        else:
+            logger.warning(f"Manifeste d'une autre version ({manifest['catalog_version']}) : projection non référencée")
+
+    logger.info(f"✓ Projection ACP {dim} dimensions ({projection.dim} effectives) écrite: {path}")
+    return path
+
+
+def load_reduced_catalog(dim: int, output_dir: str = DEFAULT_OUTPUT_DIR, expected_version: str = None) -> ReducedCatalog:
+    """
+    Charge la projection de dimension dim (dimension demandée au job) référencée par le
+    manifeste du catalogue.
+
+    Raises:
+        ValueError: Projection absente, version différente de expected_version ou fichier modifié
+    """
+    with open(os.path.join(output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    version = manifest["catalog_version"]
+    if expected_version is not None and version != expected_version:
+        raise ValueError(f"Projection obsolète: version {version}, catalogue {expected_version}")
+    info = manifest.get("projections", {}).get(str(dim))
+    if info is None:
+        raise ValueError(f"Aucune projection de dimension {dim} pour le catalogue {version}")
+    path = os.path.join(output_dir, info["file"])
+    if _sha256_file(path) != info["sha256"]:
+        raise ValueError(f"Projection corrompue ou modifiée: {info['file']}")
+    with np.load(path) as data:
+        projection = PcaProjection(data["mean"], data["components"], data["explained_variance_ratio"])
+        return ReducedCatalog(projection, data["reduced"], data["city_mean_dot"], data["city_norms"])
+
+
+def build_pca_projections(
+    conn_params: Dict[str, Any] = None,
+    json_path: str = None,
+    dims: List[int] = REPORT_DIMS,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+) -> List[Dict[str, Any]]:
+    """
+    Job batch : rapport de qualité, puis ajustement sur toutes les villes et écriture
+    d'une projection par dimension.
+
+    Chaque projection est limitée au nombre de composantes réellement évalué par le
+    rapport (effective_dim, rang des villes d'ajustement) : le fichier écrit correspond
+    à la ligne de qualité enregistrée avec lui dans le manifeste.
+    """
+    if conn_params is not None:
+        ids, _, matrix = load_catalog_from_db(conn_params)
+    else:
+        ids, _, matrix = load_catalog_from_json(json_path) if json_path else load_catalog_from_json()
+
+    report = quality_report(matrix, dims)
+    for row in report:
+        save_projection(fit_pca(matrix, row["effective_dim"]), ids, matrix, output_dir, row, dim=row["dim"])
+    return report
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Embeddings exportés en JSON (algorithme/V1/cities_embeddings.json) ;
+    # lancer catalog_export.py avant pour que les projections soient référencées dans le manifeste
+    ids, _, matrix = load_catalog_from_json()
+    print(f"{matrix.shape[0]} villes, {matrix.shape[1]} dimensions")
+    print(f"{'dim':>5} {'eff.':>5} {'variance':>9} {f'top-{TOP_K}':>7} {'min':>5} {'corr.':>7} {'err. max':>9} {'octets':>7} {'µs':>7}")
+    for row in quality_report(matrix):
+        print(f"{row['dim']:>5} {row['effective_dim']:>5} {row['explained_variance']:>9.3f} {row['top_k_overlap']:>7.3f} "
+              f"{row['min_top_k_overlap']:>5.1f} {row['score_correlation']:>7.4f} {row['max_abs_score_error']:>9.4f} "
+              f"{row['bytes_per_city']:>7} {row['gemv_us']:>7.1f}")
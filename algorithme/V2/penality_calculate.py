@@ -1,12 +1,14 @@
-<<<<<<< HEAD
 """
 Module de calcul des scores de pénalité basés sur les éléments détestés par l'utilisateur.
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Mapping, Optional, Tuple
+import numpy as np
 import psycopg2
 import psycopg2.extras
 
+from category_ids import CategoryDictionary, get_category_dictionary
+
 
 def calculate_penalty_score(city_tags: List[str], user_dislikes: Dict[str, int]) -> float:
     """
@@ -133,6 +135,176 @@ def calculate_penalty_for_city(city_id: int, user_dislikes: Dict[str, int], conn
     return calculate_penalty_score(city_tags, user_dislikes)
 
 
+def get_all_city_categories_from_db(conn_params: Dict[str, str]) -> Dict[int, List[str]]:
+    """
+    Récupère les catégories de toutes les villes en une seule requête groupée.
+
+    Args:
+        conn_params (Dict[str, str]): Paramètres de connexion PostgreSQL
+
+    Returns:
+        Dict[int, List[str]]: {city_id: [catégories triées]}
+    """
+
+    try:
+        with psycopg2.connect(**conn_params) as conn:
+            with conn.cursor() as cursor:
+                query = """
+                    SELECT p.city_id, array_agg(DISTINCT c.name ORDER BY c.name)
+                    FROM places p
+                    JOIN place_categories pc ON pc.place_id = p.id
+                    JOIN categories c ON c.id = pc.category_id
+                    GROUP BY p.city_id
+                    ORDER BY p.city_id
+                """
+                cursor.execute(query)
+                return {city_id: list(names) for city_id, names in cursor.fetchall()}
+
+    except psycopg2.Error as e:
+        print(f"Erreur PostgreSQL lors de la récupération des catégories des villes: {e}")
+        return {}
+
+
+class CategoryPenaltyIndex:
+    """
+    Index pré-calculé des pénalités pour tout le catalogue de villes.
+
+    Les catégories sont des ids denses du dictionnaire partagé (category_ids) :
+    chaque ville est stockée comme un profil d'ids trié, un bitset exact et un
+    bitset fermé par ancêtres. Construit une fois :
+    - la matrice d'incidence villes × catégories (tags exacts) ;
+    - la matrice couverte : covered[ville, a] = 1 si la ville contient la
+      catégorie a ou l'un de ses descendants.
+
+    Par requête, la pénalité de toutes les villes est une somme de quelques
+    colonnes de ces matrices (une par dislike).
+    En mode exact, les résultats sont identiques à calculate_penalty_score.
+
+    Example:
+        >>> index = CategoryPenaltyIndex([1, 2], [['adult', 'adult.nightclub'], ['museum']])
+        >>> index.penalties({'adult': 5})
+        array([0.25, 0.  ])
+    """
+
+    PENALTY_PER_WEIGHT = 0.05
+
+    def __init__(
+        self,
+        city_ids: List[int],
+        city_tags: List[List[str]],
+        parents: Optional[Mapping[str, Optional[str]]] = None,
+        dictionary: Optional[CategoryDictionary] = None,
+    ):
+        """
+        Args:
+            city_ids (List[int]): IDs des villes, dans l'ordre des lignes de la matrice
+            city_tags (List[List[str]]): Catégories de chaque ville (même ordre que city_ids)
+            parents (Optional[Mapping[str, Optional[str]]]): Hiérarchie {catégorie: parent}
+                issue de categories.parent_id. Si fournie sans dictionnaire, un dictionnaire
+                propre à l'index est construit avec cette hiérarchie.
+            dictionary (Optional[CategoryDictionary]): Dictionnaire des catégories
+                (par défaut le dictionnaire partagé du processus)
+        """
+        if len(city_ids) != len(city_tags):
+            raise ValueError("city_ids et city_tags doivent avoir la même longueur")
+
+        if dictionary is None:
+            dictionary = CategoryDictionary(parents=parents) if parents else get_category_dictionary()
+        self.dictionary = dictionary
+
+        self.city_ids = list(city_ids)
+        self.row_of_city = {city_id: row for row, city_id in enumerate(self.city_ids)}
+
+        # Profils d'ids triés (les tags inconnus sont internés avec leurs ancêtres)
+        self.city_profiles = [dictionary.encode(tags) for tags in city_tags]
+        self.city_bits = [dictionary.to_bits(profile) for profile in self.city_profiles]
+        self.covered_bits = [dictionary.closure_bits(profile) for profile in self.city_profiles]
+
+        n_cities = len(self.city_ids)
+        self.n_categories = len(dictionary)
+
+        # Matrice d'incidence villes × catégories (tags exacts uniquement)
+        self.incidence = np.zeros((n_cities, self.n_categories), dtype=np.uint8)
+        # covered[ville, a] = 1 si la ville contient a ou un descendant de a
+        self.covered = np.zeros((n_cities, self.n_categories), dtype=np.uint8)
+        for row, (profile, bits) in enumerate(zip(self.city_profiles, self.covered_bits)):
+            self.incidence[row, profile] = 1
+            self.covered[row, CategoryDictionary.from_bits(bits)] = 1
+
+    @classmethod
+    def from_city_categories(cls, cities: Iterable[Mapping[str, object]], parents: Optional[Mapping[str, Optional[str]]] = None) -> "CategoryPenaltyIndex":
+        """
+        Construit l'index depuis une liste de villes au format de cities_categories.json :
+        [{"id": 1, "name": "Paris", "categories": [...]}, ...]
+        """
+        city_ids: List[int] = []
+        city_tags: List[List[str]] = []
+        for city in cities:
+            city_ids.append(city["id"])
+            city_tags.append([str(c) for c in (city.get("categories") or [])])
+        return cls(city_ids, city_tags, parents)
+
+    @classmethod
+    def from_db(cls, conn_params: Dict[str, str]) -> "CategoryPenaltyIndex":
+        """
+        Construit l'index depuis PostgreSQL (2 requêtes au total, quel que soit le nombre de villes) :
+        catégories groupées par ville + dictionnaire partagé chargé depuis la table categories.
+        """
+        categories_by_city = get_all_city_categories_from_db(conn_params)
+        dictionary = get_category_dictionary(conn_params)
+        city_ids = sorted(categories_by_city)
+        return cls(city_ids, [categories_by_city[i] for i in city_ids], dictionary=dictionary)
+
+    def _dislike_columns(self, user_dislikes: Dict[str, int]) -> List[Tuple[int, float]]:
+        # Un tag absent du dictionnaire (ou interné après la construction) n'est porté par aucune ville
+        id_of = self.dictionary.id_of
+        columns = []
+        for disliked_category, weight in user_dislikes.items():
+            col = id_of.get(disliked_category)
+            if col is not None and col < self.n_categories:
+                columns.append((col, self.PENALTY_PER_WEIGHT * weight))
+        return columns
+
+    def penalties(self, user_dislikes: Dict[str, int], hierarchical: bool = True) -> np.ndarray:
+        """
+        Calcule la pénalité de toutes les villes : une colonne de la matrice (incidence
+        ou couverte) par dislike, pondérée et accumulée sur le vecteur des villes.
+
+        Args:
+            user_dislikes (Dict[str, int]): Catégories détestées avec poids
+            hierarchical (bool): Si True, détester 'adult' pénalise aussi 'adult.nightclub'.
+                                 Si False, seul le tag exact est pénalisé (comme calculate_penalty_score).
+
+        Returns:
+            np.ndarray: Vecteur de pénalités (float64), aligné sur self.city_ids
+        """
+        penalty = np.zeros(len(self.city_ids), dtype=np.float64)
+        if not user_dislikes:
+            return penalty
+
+        matrix = self.covered if hierarchical else self.incidence
+        # Accumulation colonne par colonne dans l'ordre des dislikes :
+        # même ordre d'addition que calculate_penalty_score, donc résultats identiques.
+        for col, weighted in self._dislike_columns(user_dislikes):
+            penalty += matrix[:, col] * weighted
+        return penalty
+
+    def penalty_for_city(self, city_id: int, user_dislikes: Dict[str, int], hierarchical: bool = True) -> float:
+        """
+        Pénalité d'une seule ville (0.0 si la ville est inconnue de l'index).
+        """
+        row = self.row_of_city.get(city_id)
+        if row is None or not user_dislikes:
+            return 0.0
+
+        bits = self.covered_bits[row] if hierarchical else self.city_bits[row]
+        penalty = 0.0
+        for col, weighted in self._dislike_columns(user_dislikes):
+            if bits >> col & 1:
+                penalty += weighted
+        return penalty
+
+
 # Tests unitaires
 if __name__ == "__main__":
     # Test 1: Cas basique
@@ -159,213 +331,23 @@ if __name__ == "__main__":
     print(f"\nTest 3 - Pénalité: {penalty_3}")
     print(f"  Attendu: {expected_3} (0.05×5 + 0.05×2 + 0.05×4)")
     print(f"  Résultat: {penalty_3 == expected_3}")
-    
-    # Test 4: Validation des poids
-    user_dislikes_invalid = {'adult.nightclub': 10, 'parking': 1}
-    user_dislikes_valid = validate_user_dislikes(user_dislikes_invalid)
-    print(f"\nTest 4 - Validation des poids:")
-    print(f"  Entrée: {user_dislikes_invalid}")
-    print(f"  Validé: {user_dislikes_valid}")
-    print(f"  Attendu: {{'adult.nightclub': 5, 'parking': 2}}")
-    
-    # Test 5: Test de connexion à la base de données (optionnel)
-    print(f"\nTest 5 - Test DB (décommentez pour tester avec votre BD):")
+
+    # Test 3b: Index pré-calculé (exact et hiérarchique)
+    index = CategoryPenaltyIndex([1, 2, 3], [city_tags_1, city_tags_2, city_tags_3])
+    exact = index.penalties(user_dislikes_3, hierarchical=False).tolist()
+    expected_exact = [calculate_penalty_score(tags, user_dislikes_3) for tags in (city_tags_1, city_tags_2, city_tags_3)]
+    hierarchical = index.penalties({'adult': 5}).tolist()
+    print(f"\nTest 3b - Index pré-calculé:")
+    print(f"  Exact identique à calculate_penalty_score: {exact == expected_exact}")
+    print(f"  Dislike 'adult' (hiérarchique): {hierarchical}")
+    print(f"  Attendu: [0.25, 0.0, 0.25]")
+    print(f"  Résultat: {hierarchical == [0.25, 0.0, 0.25]}")
+
+    # Test 4: Test de connexion à la base de données (optionnel)
+    print(f"\nTest 4 - Test DB (décommentez pour tester avec votre BD):")
     print(f"  # conn_params = {{'host': 'localhost', 'dbname': 'cities', 'user': 'postgres', 'password': 'postgres', 'port': 5432}}")
     print(f"  # categories = get_city_categories_from_db(1, conn_params)")
     print(f"  # print(f'Catégories ville ID 1: {{categories}}')")
     print(f"  # penalty = calculate_penalty_for_city(1, {{'adult.nightclub': 5}}, conn_params)")
     print(f"  # print(f'Pénalité ville ID 1: {{penalty}}')")
-    city_tags_3 = ['adult.nightclub', 'parking', 'museum', 'commercial.shopping_mall']
-    user_dislikes_3 = {'adult.nightclub': 5, 'parking': 2, 'commercial.shopping_mall': 4}
-    penalty_3 = calculate_penalty_score(city_tags_3, user_dislikes_3)
-    expected_3 = 0.05 * 5 + 0.05 * 2 + 0.05 * 4  # 0.25 + 0.10 + 0.20 = 0.55
-    print(f"\nTest 3 - Pénalité: {penalty_3}")
-    print(f"  Attendu: {expected_3} (0.05×5 + 0.05×2 + 0.05×4)")
-    print(f"  Résultat: {penalty_3 == expected_3}")
     
-=======
-"""
-Module de calcul des scores de pénalité basés sur les éléments détestés par l'utilisateur.
-"""
-
-from typing import List, Dict, Optional
-import psycopg2
-import psycopg2.extras
-
-
-def calculate_penalty_score(city_tags: List[str], user_dislikes: Dict[str, int]) -> float:
-    """
-    Calcule un score de pénalité basé sur les éléments que l'utilisateur déteste.
-    
-    Args:
-        city_tags (List[str]): Liste des catégories de la ville 
-                              (ex: ['adult.nightclub', 'museum', 'heritage.unesco'])
-        user_dislikes (Dict[str, int]): Dictionnaire des catégories détestées avec poids
-                                       Clé: catégorie détestée
-                                       Valeur: poids du dégoût (2-5)
-                                       Exemple: {'adult.nightclub': 5, 'parking': 2}
-    
-    Returns:
-        float: Score de pénalité à soustraire du score de similarité global
-               Formule: Penalty += 0.05 × Poids pour chaque catégorie détestée présente
-    
-    Example:
-        >>> city_tags = ['adult.nightclub', 'museum', 'heritage.unesco']
-        >>> user_dislikes = {'adult.nightclub': 5, 'parking': 2}
-        >>> calculate_penalty_score(city_tags, user_dislikes)
-        0.25
-        # Calcul: adult.nightclub présent → 0.05 × 5 = 0.25
-        #         parking absent → pas de pénalité
-    """
-    
-    # Vérification des entrées
-    if not city_tags or not user_dislikes:
-        return 0.0
-    
-    # Convertir city_tags en set pour une recherche O(1) efficace
-    city_tags_set = set(city_tags)
-    
-    penalty = 0.0
-    
-    # Parcourir chaque catégorie détestée
-    for disliked_category, weight in user_dislikes.items():
-        # Vérifier si la catégorie détestée est présente dans la ville
-        if disliked_category in city_tags_set:
-            # Appliquer la formule : Penalty += 0.05 × Poids
-            penalty += 0.05 * weight
-    
-    return penalty
-
-
-def get_city_categories_from_db(city_id: int, conn_params: Dict[str, str]) -> List[str]:
-    """
-    Récupère les catégories d'une ville depuis la base de données PostgreSQL.
-    
-    Args:
-        city_id (int): ID de la ville dans la base de données
-        conn_params (Dict[str, str]): Paramètres de connexion PostgreSQL
-                                     {'host': 'localhost', 'dbname': 'cities', 
-                                      'user': 'postgres', 'password': 'postgres', 'port': 5432}
-    
-    Returns:
-        List[str]: Liste des catégories de la ville
-                  (ex: ['heritage.unesco', 'museum', 'restaurant.french'])
-    
-    Example:
-        >>> conn_params = {"host": "localhost", "dbname": "cities", "user": "postgres", "password": "postgres"}
-        >>> categories = get_city_categories_from_db(1, conn_params)
-        >>> print(categories)
-        ['heritage.unesco', 'tourism.sights.castle', 'catering.restaurant.french']
-    """
-    
-    try:
-        # Connexion à la base de données
-        with psycopg2.connect(**conn_params) as conn:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
-                
-                # Requête pour récupérer toutes les catégories d'une ville
-                query = """
-                    SELECT DISTINCT c.name as category_name
-                    FROM cities ci
-                    JOIN places p ON p.city_id = ci.id
-                    JOIN place_categories pc ON pc.place_id = p.id
-                    JOIN categories c ON c.id = pc.category_id
-                    WHERE ci.id = %s
-                    ORDER BY c.name
-                """
-                
-                cursor.execute(query, (city_id,))
-                results = cursor.fetchall()
-                
-                # Extraire les noms de catégories
-                categories = [row['category_name'] for row in results]
-                
-                return categories
-                
-    except psycopg2.Error as e:
-        print(f"Erreur PostgreSQL lors de la récupération des catégories pour la ville {city_id}: {e}")
-        return []
-    except Exception as e:
-        print(f"Erreur lors de la récupération des catégories pour la ville {city_id}: {e}")
-        return []
-
-
-def calculate_penalty_for_city(city_id: int, user_dislikes: Dict[str, int], conn_params: Dict[str, str]) -> float:
-    """
-    Calcule directement le score de pénalité pour une ville depuis la base de données.
-    
-    Args:
-        city_id (int): ID de la ville
-        user_dislikes (Dict[str, int]): Dictionnaire des catégories détestées avec poids
-        conn_params (Dict[str, str]): Paramètres de connexion PostgreSQL
-    
-    Returns:
-        float: Score de pénalité calculé
-    
-    Example:
-        >>> user_dislikes = {'adult.nightclub': 5, 'parking': 2}
-        >>> penalty = calculate_penalty_for_city(1, user_dislikes, conn_params)
-        >>> print(f"Pénalité pour la ville ID 1: {penalty}")
-    """
-    
-    # Récupérer les catégories de la ville
-    city_tags = get_city_categories_from_db(city_id, conn_params)
-    
-    if not city_tags:
-        return 0.0
-    
-    # Calculer la pénalité
-    return calculate_penalty_score(city_tags, user_dislikes)
-
-
-# Tests unitaires
-if __name__ == "__main__":
-    # Test 1: Cas basique
-    city_tags_1 = ['adult.nightclub', 'museum', 'heritage.unesco']
-    user_dislikes_1 = {'adult.nightclub': 5, 'parking': 2}
-    penalty_1 = calculate_penalty_score(city_tags_1, user_dislikes_1)
-    print(f"Test 1 - Pénalité: {penalty_1}")
-    print(f"  Attendu: 0.25 (0.05 × 5)")
-    print(f"  Résultat: {penalty_1 == 0.25}")
-    
-    # Test 2: Aucune catégorie détestée présente
-    city_tags_2 = ['museum', 'heritage.unesco', 'restaurant']
-    user_dislikes_2 = {'adult.nightclub': 5, 'parking': 3}
-    penalty_2 = calculate_penalty_score(city_tags_2, user_dislikes_2)
-    print(f"\nTest 2 - Pénalité: {penalty_2}")
-    print(f"  Attendu: 0.0 (aucune correspondance)")
-    print(f"  Résultat: {penalty_2 == 0.0}")
-    
-    # Test 3: Plusieurs catégories détestées présentes
-    city_tags_3 = ['adult.nightclub', 'parking', 'museum', 'commercial.shopping_mall']
-    user_dislikes_3 = {'adult.nightclub': 5, 'parking': 2, 'commercial.shopping_mall': 4}
-    penalty_3 = calculate_penalty_score(city_tags_3, user_dislikes_3)
-    expected_3 = 0.05 * 5 + 0.05 * 2 + 0.05 * 4  # 0.25 + 0.10 + 0.20 = 0.55
-    print(f"\nTest 3 - Pénalité: {penalty_3}")
-    print(f"  Attendu: {expected_3} (0.05×5 + 0.05×2 + 0.05×4)")
-    print(f"  Résultat: {penalty_3 == expected_3}")
-    
-    # Test 4: Validation des poids
-    user_dislikes_invalid = {'adult.nightclub': 10, 'parking': 1}
-    user_dislikes_valid = validate_user_dislikes(user_dislikes_invalid)
-    print(f"\nTest 4 - Validation des poids:")
-    print(f"  Entrée: {user_dislikes_invalid}")
-    print(f"  Validé: {user_dislikes_valid}")
-    print(f"  Attendu: {{'adult.nightclub': 5, 'parking': 2}}")
-    
-    # Test 5: Test de connexion à la base de données (optionnel)
-    print(f"\nTest 5 - Test DB (décommentez pour tester avec votre BD):")
-    print(f"  # conn_params = {{'host': 'localhost', 'dbname': 'cities', 'user': 'postgres', 'password': 'postgres', 'port': 5432}}")
-    print(f"  # categories = get_city_categories_from_db(1, conn_params)")
-    print(f"  # print(f'Catégories ville ID 1: {{categories}}')")
-    print(f"  # penalty = calculate_penalty_for_city(1, {{'adult.nightclub': 5}}, conn_params)")
-    print(f"  # print(f'Pénalité ville ID 1: {{penalty}}')")
-    city_tags_3 = ['adult.nightclub', 'parking', 'museum', 'commercial.shopping_mall']
-    user_dislikes_3 = {'adult.nightclub': 5, 'parking': 2, 'commercial.shopping_mall': 4}
-    penalty_3 = calculate_penalty_score(city_tags_3, user_dislikes_3)
-    expected_3 = 0.05 * 5 + 0.05 * 2 + 0.05 * 4  # 0.25 + 0.10 + 0.20 = 0.55
-    print(f"\nTest 3 - Pénalité: {penalty_3}")
-    print(f"  Attendu: {expected_3} (0.05×5 + 0.05×2 + 0.05×4)")
-    print(f"  Résultat: {penalty_3 == expected_3}")
-    
->>>>>>> main
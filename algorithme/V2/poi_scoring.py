@@ -0,0 +1,268 @@
+"""
+Scoring multi-vecteurs (late interaction) sur les embeddings des POI.
+
+Une ville n'est plus résumée par un seul vecteur : chaque POI de
+dataS5/DONNE_V1_ALGO/cities_geocoded_all.json possède son propre embedding, et le
+score d'une ville est un agrégat (max ou moyenne des top-m) des similarités
+utilisateur-POI. Les POI sont stockés en disposition CSR (lignes contiguës par
+ville + tableau d'offsets), ce qui permet de tout scorer avec un seul GEMM suivi
+de np.maximum.reduceat.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(V2_DIR))
+POIS_JSON_PATH = os.path.join(REPO_ROOT, "dataS5", "DONNE_V1_ALGO", "cities_geocoded_all.json")
+DEFAULT_STORE_DIR = os.path.join(V2_DIR, "poi_store")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Attributs techniques sans valeur descriptive pour un POI
+IGNORED_ROOTS = {"fee", "no_fee", "internet_access", "wheelchair", "access", "access_limited"}
+
+
+def _humanize_category(tag: str) -> str:
+    return tag.split(".")[-1].replace("_", " ")
+
+
+def poi_text(poi: Dict[str, Any]) -> str:
+    """
+    Texte encodé pour un POI : son nom suivi de ses catégories humanisées.
+
+    Example:
+        >>> poi_text({"name": "Louvre", "categories": ["entertainment", "entertainment.museum", "fee"]})
+        'Louvre: entertainment, museum'
+    """
+    labels: List[str] = []
+    for tag in poi.get("categories") or []:
+        if tag.split(".")[0] in IGNORED_ROOTS:
+            continue
+        label = _humanize_category(tag)
+        if label not in labels:
+            labels.append(label)
+
+    name = str(poi.get("name") or "").strip()
+    if not labels:
+        return name
+    return f"{name}: {', '.join(labels)}" if name else ", ".join(labels)
+
+
+def load_city_pois(json_path: str = POIS_JSON_PATH) -> List[Tuple[int, str, List[Dict[str, Any]]]]:
+    """
+    Charge les POI par ville.
+
+    Les ids de ville suivent l'ordre du fichier (ordre d'insertion dans la table cities).
+
+    Returns:
+        [(city_id, city_name, [poi, ...]), ...]
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    return [
+        (index, city.get("city", ""), city.get("pois") or [])
+        for index, city in enumerate(data, start=1)
+    ]
+
+
+def build_poi_store(
+    json_path: str = POIS_JSON_PATH,
+    store_dir: str = DEFAULT_STORE_DIR,
+    batch_size: int = 256,
+    model=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Encode tous les POI par lots et écrit le magasin CSR.
+
+    Fichiers écrits dans store_dir :
+    - poi_embeddings.npy : (n_pois, dim) float32, lignes normalisées
+    - city_offsets.npy   : (n_cities + 1,) int64, POI de la ville i = lignes offsets[i]:offsets[i+1]
+    - city_ids.npy       : (n_cities,) int64
+
+    Args:
+        json_path: Fichier cities_geocoded_all.json
+        store_dir: Dossier de sortie
+        batch_size: Taille des lots d'encodage
+        model: Modèle SentenceTransformer déjà chargé (optionnel)
+    """
+    from embedding_cache import EmbeddingCache, get_embedding_cache
+
+    if model is None:
+        cache = get_embedding_cache(MODEL_NAME)
+    else:
+        cache = EmbeddingCache(model_name=MODEL_NAME, encode=lambda texts: model.encode(texts, show_progress_bar=False))
+
+    city_ids: List[int] = []
+    offsets: List[int] = [0]
+    texts: List[str] = []
+    for city_id, _, pois in load_city_pois(json_path):
+        city_ids.append(city_id)
+        texts.extend(poi_text(poi) for poi in pois)
+        offsets.append(len(texts))
+
+    logger.info(f"Encodage de {len(texts)} POI pour {len(city_ids)} villes (lots de {batch_size})...")
+    # POI déjà encodés lors d'une exécution précédente : lus dans le cache
+    embeddings = cache.encode(texts, batch_size=batch_size, normalize=True)
+    logger.info(f"Cache d'embeddings: {cache.stats()}")
+
+    store = {
+        "poi_embeddings": embeddings,
+        "city_offsets": np.asarray(offsets, dtype=np.int64),
+        "city_ids": np.asarray(city_ids, dtype=np.int64),
+    }
+
+    os.makedirs(store_dir, exist_ok=True)
+    for name, array in store.items():
+        np.save(os.path.join(store_dir, f"{name}.npy"), array)
+    logger.info(f"✓ Magasin POI écrit dans '{store_dir}'")
+    return store
+
+
+class PoiLateInteractionScorer:
+    """
+    Score les villes par agrégation des similarités utilisateur-POI.
+
+    Args:
+        poi_embeddings: (n_pois, dim) float32, lignes normalisées, groupées par ville
+        city_offsets: (n_cities + 1,) offsets CSR
+        city_ids: (n_cities,) ids des villes
+        aggregate: "max" (meilleur POI) ou "top_m" (moyenne des m meilleurs POI)
+        top_m: Nombre de POI moyennés pour aggregate="top_m"
+        empty_score: Score d'une ville sans POI
+    """
+
+    def __init__(
+        self,
+        poi_embeddings: np.ndarray,
+        city_offsets: np.ndarray,
+        city_ids: np.ndarray,
+        aggregate: str = "max",
+        top_m: int = 3,
+        empty_score: float = 0.0,
+    ):
+        if aggregate not in ("max", "top_m"):
+            raise ValueError("aggregate doit valoir 'max' ou 'top_m'")
+        if city_offsets.shape[0] != city_ids.shape[0] + 1:
+            raise ValueError("city_offsets doit contenir n_cities + 1 éléments")
+
+        self.poi_embeddings = np.ascontiguousarray(poi_embeddings, dtype=np.float32)
+        self.city_offsets = np.asarray(city_offsets, dtype=np.int64)
+        self.city_ids = np.asarray(city_ids, dtype=np.int64)
+        self.aggregate = aggregate
+        self.top_m = max(1, int(top_m))
+        self.empty_score = float(empty_score)
+
+        counts = np.diff(self.city_offsets)
+        self._nonempty = counts > 0
+        # Début de chaque segment non vide : les segments vides n'ont aucune ligne,
+        # reduceat sur ces débuts couvre donc exactement chaque ville.
+        self._starts = self.city_offsets[:-1][self._nonempty]
+        self._counts = counts
+        self._poi_city = np.repeat(np.arange(self.city_ids.shape[0]), counts)
+
+    @classmethod
+    def load(cls, store_dir: str = DEFAULT_STORE_DIR, **kwargs) -> "PoiLateInteractionScorer":
+        """
+        Charge un magasin écrit par build_poi_store (poi_embeddings.npy en mmap).
+        """
+        return cls(
+            np.load(os.path.join(store_dir, "poi_embeddings.npy"), mmap_mode="r"),
+            np.load(os.path.join(store_dir, "city_offsets.npy")),
+            np.load(os.path.join(store_dir, "city_ids.npy")),
+            **kwargs,
+        )
+
+    def _top_m_mean(self, sims: np.ndarray) -> np.ndarray:
+        n_cities = self.city_ids.shape[0]
+        m = self.top_m
+        out = np.empty((n_cities, sims.shape[1]), dtype=np.float32)
+        denominators = np.minimum(self._counts, m)
+        denominators[denominators == 0] = 1
+
+        for column in range(sims.shape[1]):
+            values = sims[:, column]
+            # Tri par ville puis par similarité décroissante ; rang dans la ville
+            order = np.lexsort((-values, self._poi_city))
+            rank = np.arange(values.shape[0]) - self.city_offsets[self._poi_city[order]]
+            keep = order[rank < m]
+            totals = np.bincount(self._poi_city[keep], weights=values[keep], minlength=n_cities)
+            out[:, column] = totals / denominators
+        return out
+
+    def score(self, user_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Scores des villes pour un ou plusieurs vecteurs utilisateur.
+
+        Args:
+            user_embeddings: (dim,) ou (n_users, dim)
+
+        Returns:
+            (n_cities,) ou (n_cities, n_users), aligné sur self.city_ids
+        """
+        users = np.asarray(user_embeddings, dtype=np.float32)
+        single = users.ndim == 1
+        if single:
+            users = users[None, :]
+
+        norms = np.linalg.norm(users, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        users = users / norms
+
+        # Un seul GEMM : (n_pois, dim) @ (dim, n_users)
+        sims = self.poi_embeddings @ users.T
+
+        scores = np.full((self.city_ids.shape[0], users.shape[0]), self.empty_score, dtype=np.float32)
+        if self._starts.shape[0]:
+            if self.aggregate == "max":
+                scores[self._nonempty] = np.maximum.reduceat(sims, self._starts, axis=0)
+            else:
+                scores[self._nonempty] = self._top_m_mean(sims)[self._nonempty]
+
+        return scores[:, 0] if single else scores
+
+    def score_by_city(self, user_embedding: List[float]) -> Dict[int, float]:
+        """
+        Scores d'un utilisateur sous forme {city_id: score}.
+        """
+        return dict(zip(self.city_ids.tolist(), self.score(np.asarray(user_embedding)).tolist()))
+
+
+# Vérification rapide sur des embeddings aléatoires (sans modèle)
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    city_pois = load_city_pois()
+    offsets = np.cumsum([0] + [len(pois) for _, _, pois in city_pois]).astype(np.int64)
+    ids = np.asarray([city_id for city_id, _, _ in city_pois], dtype=np.int64)
+    embeddings = rng.standard_normal((int(offsets[-1]), 384)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    user = rng.standard_normal(384)
+
+    for aggregate in ("max", "top_m"):
+        scorer = PoiLateInteractionScorer(embeddings, offsets, ids, aggregate=aggregate, top_m=3)
+        start = time.perf_counter()
+        scores = scorer.score(user)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        # Référence naïve ville par ville
+        sims = embeddings @ (user / np.linalg.norm(user)).astype(np.float32)
+        expected = []
+        for i in range(len(ids)):
+            segment = np.sort(sims[offsets[i]:offsets[i + 1]])[::-1]
+            if segment.size == 0:
+                expected.append(0.0)
+            elif aggregate == "max":
+                expected.append(segment[0])
+            else:
+                expected.append(segment[:3].mean())
+
+        print(f"{aggregate}: {embeddings.shape[0]} POI scorés en {elapsed:.2f} ms, "
+              f"identique à la référence: {np.allclose(scores, expected, atol=1e-6)}")
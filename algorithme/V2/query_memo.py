@@ -0,0 +1,156 @@
+"""
+Mémoïsation des requêtes utilisateur (phrase + embedding).
+
+Beaucoup d'utilisateurs soumettent les mêmes combinaisons catégories/poids dans
+un ordre différent. QueryMemo les ramène à une clé canonique
+(user_query.canonical_profile_key : tags triés, dédupliqués, poids bornés) et
+garde dans deux LRU bornés :
+- clé canonique -> phrase générée
+- phrase -> embedding (plusieurs profils différents donnent souvent la même phrase)
+
+Un profil déjà vu ne coûte donc qu'une consultation de dictionnaire. Avec un
+ThemeLattice (theme_lattice.py), les profils au niveau des thèmes ne sont jamais
+encodés : leur embedding est lu dans le treillis pré-calculé.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from user_query import ProfileKey, canonical_profile_key, generate_user_query_from_key
+
+if TYPE_CHECKING:
+    from theme_lattice import ThemeLattice
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_MAXSIZE = 10_000
+
+
+class QueryMemo:
+    """
+    Cache LRU borné : profil canonique -> phrase, phrase -> embedding.
+
+    Les phrases sont générées à partir des tags triés, donc le résultat ne dépend
+    pas de l'ordre des catégories soumises ni de l'état du cache.
+    """
+
+    def __init__(self, encode: Optional[Callable[[str], Any]] = None, maxsize: int = DEFAULT_MAXSIZE,
+                 lattice: Optional["ThemeLattice"] = None):
+        """
+        Args:
+            encode: Fonction texte -> vecteur (par défaut le cache d'embeddings de MODEL_NAME, cf. embedding_cache)
+            maxsize: Nombre maximal d'entrées de chaque LRU
+            lattice: Treillis des thèmes pré-calculé (optionnel), consulté avant l'encodage
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize doit être >= 1")
+        self._encode = encode
+        self.lattice = lattice
+        self.maxsize = maxsize
+        self._sentences: "OrderedDict[ProfileKey, str]" = OrderedDict()
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "embedding_hits": 0,
+            "embedding_misses": 0,
+            "lattice_hits": 0,
+            "evictions": 0,
+        }
+
+    def _encoder(self) -> Callable[[str], Any]:
+        if self._encode is None:
+            from embedding_cache import get_embedding_cache
+            self._encode = get_embedding_cache(MODEL_NAME).encode_one
+        return self._encode
+
+    def _put(self, cache: OrderedDict, key: Any, value: Any) -> None:
+        cache[key] = value
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def sentence(self, user_categories: List[str], weights: Dict[str, int] = None) -> str:
+        """Phrase du profil (générée une seule fois par clé canonique)."""
+        return self._sentence_for_key(canonical_profile_key(user_categories, weights))
+
+    def _sentence_for_key(self, key: ProfileKey) -> str:
+        sentence = self._sentences.get(key)
+        if sentence is not None:
+            self._sentences.move_to_end(key)
+            self._stats["hits"] += 1
+            return sentence
+
+        self._stats["misses"] += 1
+        sentence = generate_user_query_from_key(key)
+        self._put(self._sentences, key, sentence)
+        return sentence
+
+    def embedding_for_text(self, text: str) -> np.ndarray:
+        """Embedding (float32, lecture seule) d'une phrase, encodée une seule fois."""
+        embedding = self._embeddings.get(text)
+        if embedding is not None:
+            self._embeddings.move_to_end(text)
+            self._stats["embedding_hits"] += 1
+            return embedding
+
+        self._stats["embedding_misses"] += 1
+        embedding = np.asarray(self._encoder()(text), dtype=np.float32)
+        # Partagé entre appelants : interdit la modification en place
+        embedding.setflags(write=False)
+        self._put(self._embeddings, text, embedding)
+        return embedding
+
+    def lookup(self, user_categories: List[str], weights: Dict[str, int] = None) -> Tuple[str, np.ndarray]:
+        """
+        Phrase et embedding du profil.
+
+        Returns:
+            (phrase, embedding)
+        """
+        key = canonical_profile_key(user_categories, weights)
+        sentence = self._sentence_for_key(key)
+        if self.lattice is not None and sentence not in self._embeddings:
+            row = self.lattice.row_for_key(key)
+            if row is not None:
+                self._stats["lattice_hits"] += 1
+                return sentence, self.lattice.embeddings[row]
+        return sentence, self.embedding_for_text(sentence)
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs du cache (hits/misses par niveau, évictions, tailles, taux de hit)."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "sentences": len(self._sentences),
+            "embeddings": len(self._embeddings),
+            "maxsize": self.maxsize,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Vide les deux caches et remet les compteurs à zéro."""
+        self._sentences.clear()
+        self._embeddings.clear()
+        for name in self._stats:
+            self._stats[name] = 0
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    memo = QueryMemo(maxsize=1000)
+    profile = ["beach", "heritage", "catering.restaurant.italian", "tourism.sights.castle"]
+    weights = {"beach": 5, "heritage": 3}
+
+    sentence, embedding = memo.lookup(profile, weights)
+    print(sentence, embedding.shape)
+
+    # Même profil, ordre différent et doublons : simple consultation du cache
+    memo.lookup(list(reversed(profile)) + ["beach"], weights)
+    print(memo.stats())
@@ -0,0 +1,229 @@
+"""
+Re-classement incrémental pendant une session de réglage des préférences.
+
+Sur l'écran des préférences, l'utilisateur déplace un curseur à la fois. Au lieu de
+tout refaire (phrase, embedding, similarités, pénalités), RankingSession garde le
+dernier état et ne recalcule que ce qui a changé :
+- la matrice du catalogue (float64) et les normes des villes sont préparées une fois ;
+- profil inchangé (clé canonique) ou même phrase : les similarités sont réutilisées ;
+- nouvelle phrase : un encodage (via QueryMemo, donc treillis/cache) + un GEMV ;
+- dislikes modifiés seuls : seul le vecteur de pénalités est recalculé.
+
+Les scores sont ceux de rank_cities_by_similarity (cosinus - pénalité), dans le même
+ordre (score décroissant, ordre du catalogue en cas d'égalité).
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from catalog import load_catalog_from_db, load_catalog_from_json
+from chunked_ranking import _top_k_order
+from penality_calculate import CategoryPenaltyIndex
+from query_memo import QueryMemo
+from user_query import canonical_profile_key
+
+logger = logging.getLogger(__name__)
+
+
+class RankingSession:
+    """
+    Poignée de classement propre à une session utilisateur.
+
+    Example:
+        >>> session = RankingSession.from_catalog(json_path=DEFAULT_EMBEDDINGS_JSON)
+        >>> top = session.rank(["heritage", "beach"], {"heritage": 5}, limit=10)
+        >>> top = session.set_weight("beach", 4)       # nouvelle phrase : 1 encodage + 1 GEMV
+        >>> top = session.set_dislikes({"adult": 3})   # pénalités seules
+    """
+
+    def __init__(
+        self,
+        city_ids: np.ndarray,
+        names: List[str],
+        matrix: np.ndarray,
+        penalty_index: Optional[CategoryPenaltyIndex] = None,
+        memo: Optional[QueryMemo] = None,
+        hierarchical_dislikes: bool = True,
+    ):
+        """
+        Args:
+            city_ids: Ids des villes (ordre du catalogue)
+            names: Noms des villes
+            matrix: Embeddings des villes (n_villes, dim)
+            penalty_index: Index des pénalités (sans index, les dislikes sont ignorés)
+            memo: Cache phrase/embedding, partageable entre sessions (par défaut un QueryMemo propre)
+            hierarchical_dislikes: Si True, détester 'adult' pénalise aussi 'adult.nightclub'
+        """
+        self.city_ids = np.asarray(city_ids, dtype=np.int64)
+        self.names = list(names)
+        # Catalogue préparé une seule fois : matrice float64 et normes des villes
+        self._matrix = np.asarray(matrix, dtype=np.float64)
+        self._city_norms = np.linalg.norm(self._matrix, axis=1)
+        self._positions = np.arange(self.city_ids.shape[0], dtype=np.int64)
+
+        self.penalty_index = penalty_index
+        self.hierarchical_dislikes = hierarchical_dislikes
+        self.memo = memo or QueryMemo()
+        if penalty_index is not None:
+            # Ligne de l'index des pénalités de chaque ville du catalogue (-1 si absente)
+            self._penalty_rows = np.asarray(
+                [penalty_index.row_of_city.get(int(i), -1) for i in self.city_ids], dtype=np.int64
+            )
+
+        self.categories: List[str] = []
+        self.weights: Dict[str, int] = {}
+        self.dislikes: Dict[str, int] = {}
+        self._key = None
+        self._sentence: Optional[str] = None
+        self._embedding: Optional[np.ndarray] = None
+        self._similarity = np.zeros(self.city_ids.shape[0], dtype=np.float64)
+        self._penalty = np.zeros(self.city_ids.shape[0], dtype=np.float64)
+        self._stats = {"calls": 0, "sentences": 0, "rescored": 0, "penalties": 0, "last_ms": 0.0}
+
+    @classmethod
+    def from_catalog(
+        cls,
+        conn_params: Dict[str, Any] = None,
+        json_path: str = None,
+        memo: Optional[QueryMemo] = None,
+        hierarchical_dislikes: bool = True,
+    ) -> "RankingSession":
+        """
+        Session sur le catalogue PostgreSQL (avec l'index des pénalités) ou sur un fichier JSON (sans pénalités).
+        """
+        if conn_params is not None:
+            ids, names, matrix = load_catalog_from_db(conn_params)
+            penalty_index = CategoryPenaltyIndex.from_db(conn_params)
+        elif json_path is not None:
+            ids, names, matrix = load_catalog_from_json(json_path)
+            penalty_index = None
+        else:
+            raise ValueError("conn_params ou json_path est requis")
+        return cls(ids, names, matrix, penalty_index, memo, hierarchical_dislikes)
+
+    def _update_similarity(self) -> None:
+        key = canonical_profile_key(self.categories, self.weights)
+        if key == self._key:
+            return
+        self._key = key
+
+        sentence, embedding = self.memo.lookup(self.categories, self.weights)
+        self._stats["sentences"] += 1
+        if sentence == self._sentence:
+            # Autre profil, même phrase (ex: poids d'un tag sans effet sur les thèmes)
+            return
+        self._sentence = sentence
+        self._embedding = embedding
+
+        # Un seul GEMV sur la matrice préparée (même formule que chunked_ranking._score_block)
+        user_vector = np.asarray(embedding, dtype=np.float64)
+        norms = self._city_norms * float(np.linalg.norm(user_vector))
+        self._similarity = np.zeros(self.city_ids.shape[0], dtype=np.float64)
+        np.divide(self._matrix @ user_vector, norms, out=self._similarity, where=norms != 0)
+        self._stats["rescored"] += 1
+
+    def _update_penalty(self, dislikes: Dict[str, int]) -> None:
+        if dislikes == self.dislikes:
+            return
+        self.dislikes = dict(dislikes)
+        self._penalty = np.zeros(self.city_ids.shape[0], dtype=np.float64)
+        if self.penalty_index is not None and self.dislikes:
+            by_row = self.penalty_index.penalties(self.dislikes, hierarchical=self.hierarchical_dislikes)
+            known = self._penalty_rows >= 0
+            self._penalty[known] = by_row[self._penalty_rows[known]]
+        self._stats["penalties"] += 1
+
+    def rank(
+        self,
+        categories: List[str],
+        weights: Dict[str, int] = None,
+        dislikes: Dict[str, int] = None,
+        limit: int = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Classement pour l'état complet des préférences ; seules les parties modifiées sont recalculées.
+
+        Args:
+            categories: Catégories aimées
+            weights: Poids 1..5 des catégories (optionnel)
+            dislikes: Catégories détestées avec poids (None = inchangés)
+            limit: Nombre de villes à retourner (toutes par défaut)
+
+        Returns:
+            Liste des villes triées par score final décroissant :
+            [{"id", "name", "similarity", "penalty", "final_score"}, ...]
+        """
+        start = time.perf_counter()
+        self.categories = list(categories or [])
+        self.weights = dict(weights or {})
+        self._update_similarity()
+        if dislikes is not None:
+            self._update_penalty(dislikes)
+
+        final = self._similarity - self._penalty
+        k = self.city_ids.shape[0] if limit is None else max(0, min(limit, self.city_ids.shape[0]))
+        order = _top_k_order(final, self._positions, k) if k else []
+        ranked = [
+            {
+                "id": int(self.city_ids[row]),
+                "name": self.names[row],
+                "similarity": float(self._similarity[row]),
+                "penalty": float(self._penalty[row]),
+                "final_score": float(final[row]),
+            }
+            for row in order
+        ]
+
+        self._stats["calls"] += 1
+        self._stats["last_ms"] = (time.perf_counter() - start) * 1000
+        return ranked
+
+    def set_weight(self, tag: str, weight: int, limit: int = None) -> List[Dict[str, Any]]:
+        """Déplacement d'un curseur : ajoute la catégorie si besoin et change son poids."""
+        categories = self.categories if tag in self.categories else self.categories + [tag]
+        return self.rank(categories, {**self.weights, tag: weight}, limit=limit)
+
+    def set_dislikes(self, dislikes: Dict[str, int], limit: int = None) -> List[Dict[str, Any]]:
+        """Modification des dislikes seuls : les similarités en cache sont réutilisées."""
+        return self.rank(self.categories, self.weights, dislikes, limit=limit)
+
+    @property
+    def sentence(self) -> Optional[str]:
+        """Phrase de la dernière requête encodée."""
+        return self._sentence
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de la session (appels, phrases, re-scorings, pénalités, durée du dernier appel)."""
+        return dict(self._stats)
+
+
+# Exemple d'utilisation (encodeur factice : pas besoin du modèle)
+if __name__ == "__main__":
+    import zlib
+
+    from catalog import DEFAULT_EMBEDDINGS_JSON
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    def fake_encode(text: str) -> np.ndarray:
+        return np.random.default_rng(zlib.crc32(text.encode())).standard_normal(384)
+
+    ids, names, matrix = load_catalog_from_json(DEFAULT_EMBEDDINGS_JSON)
+    rng = np.random.default_rng(0)
+    tags = ["adult.nightclub", "heritage", "beach", "catering.restaurant.italian", "parking"]
+    index = CategoryPenaltyIndex(ids.tolist(), [list(rng.choice(tags, 2)) for _ in ids])
+    session = RankingSession(ids, names, matrix, index, memo=QueryMemo(encode=fake_encode))
+
+    steps = [
+        ("profil initial", lambda: session.rank(["heritage", "beach"], {"heritage": 5}, {"adult": 3}, limit=10)),
+        ("poids modifié", lambda: session.set_weight("beach", 4, limit=10)),
+        ("même profil", lambda: session.set_weight("beach", 4, limit=10)),
+        ("dislike modifié", lambda: session.set_dislikes({"adult": 3, "parking": 2}, limit=10)),
+    ]
+    for label, step in steps:
+        top = step()
+        print(f"{label:<16} {session.stats()['last_ms']:6.2f} ms  top: {top[0]['name']} ({top[0]['final_score']:.4f})")
+    print(session.stats())
@@ -0,0 +1,202 @@
+"""
+Pénalités sémantiques des dislikes à partir d'embeddings de phrases pré-calculés.
+
+calculate_penalty_score / CategoryPenaltyIndex ne pénalisent que les tags exacts (ou
+leurs descendants). V1 soustrayait l'embedding du texte des dislikes au vecteur
+utilisateur, au prix d'un appel au modèle par requête. Ici :
+- chaque catégorie du dictionnaire (category_ids) reçoit une phrase
+  ("A destination featuring nightclub.") encodée une seule fois (build_dislike_store) ;
+- le vecteur des dislikes d'un utilisateur est la somme pondérée des phrases en cache,
+  normalisées (la somme elle-même n'est pas renormalisée) ;
+- la pénalité de toutes les villes est un seul GEMV supplémentaire :
+  penalty = PENALTY_PER_WEIGHT × max(0, Σᵢ poidsᵢ × cos(ville, phraseᵢ))
+  (ville normalisée · Σᵢ poidsᵢ × phraseᵢ normalisée).
+
+Une ville qui "ressemble" exactement à une catégorie détestée (cosinus 1) reçoit donc la
+même pénalité qu'avec le tag exact (0.05 × poids), et les dislikes s'additionnent comme
+dans calculate_penalty_score. Aucun appel au modèle par requête.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from catalog import load_catalog_from_db, load_catalog_from_json
+from category_ids import CategoryDictionary, get_category_dictionary
+from category_rules import load_rules
+from embedding_cache import get_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_PATH = os.path.join(V2_DIR, "dislike_embeddings.npz")
+
+
+def dislike_phrase(tag: str) -> str:
+    """
+    Phrase encodée pour une catégorie détestée, au format des descriptions de villes.
+
+    Example:
+        >>> dislike_phrase("adult.nightclub")
+        'A destination featuring nightclub.'
+    """
+    rules = load_rules()
+    return rules.template.format(chunks=rules.humanize(tag.split(".")[-1]))
+
+
+def build_dislike_store(
+    output_path: str = DEFAULT_STORE_PATH,
+    dictionary: Optional[CategoryDictionary] = None,
+    encode: Optional[Callable[[List[str]], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Encode une fois la phrase de chaque catégorie du dictionnaire et écrit le cache.
+
+    Args:
+        output_path: Fichier .npz à écrire
+        dictionary: Catégories à encoder (par défaut le dictionnaire partagé)
+        encode: Fonction liste de phrases -> matrice (par défaut le cache d'embeddings de MODEL_NAME)
+
+    Returns:
+        Statistiques du job (catégories, dimension, durée)
+    """
+    dictionary = dictionary or get_category_dictionary()
+    if encode is None:
+        encode = get_embedding_cache(MODEL_NAME).encode
+
+    start = time.time()
+    names = list(dictionary.names)
+    embeddings = np.asarray(encode([dislike_phrase(name) for name in names]), dtype=np.float32)
+
+    tmp_path = output_path + ".tmp.npz"
+    np.savez(tmp_path, names=np.asarray(names), embeddings=embeddings, model=np.asarray(MODEL_NAME))
+    os.replace(tmp_path, output_path)
+
+    stats = {"categories": len(names), "dim": int(embeddings.shape[1]), "seconds": time.time() - start}
+    logger.info(f"✓ Embeddings des dislikes écrits dans {output_path}: {stats}")
+    return stats
+
+
+class SemanticDislikePenalty:
+    """
+    Pénalités sémantiques de toutes les villes pour un ensemble de dislikes.
+
+    Même interface que CategoryPenaltyIndex (city_ids, row_of_city, penalties) : il
+    peut être passé à rank_cities_by_similarity ou RankingSession à sa place.
+
+    Example:
+        >>> semantic = SemanticDislikePenalty.from_catalog(json_path=DEFAULT_EMBEDDINGS_JSON)
+        >>> semantic.penalties({"adult.nightclub": 5})   # (n_villes,) float64
+    """
+
+    PENALTY_PER_WEIGHT = 0.05
+
+    def __init__(self, city_ids: List[int], city_matrix: np.ndarray, names: List[str], phrase_embeddings: np.ndarray):
+        """
+        Args:
+            city_ids: Ids des villes, dans l'ordre des lignes de city_matrix
+            city_matrix: Embeddings des villes (n_villes, dim)
+            names: Catégories du cache, dans l'ordre des lignes de phrase_embeddings
+            phrase_embeddings: Embeddings des phrases de dislike (n_catégories, dim)
+        """
+        if len(city_ids) != city_matrix.shape[0]:
+            raise ValueError("city_ids et city_matrix doivent avoir le même nombre de lignes")
+        if len(names) != phrase_embeddings.shape[0]:
+            raise ValueError("names et phrase_embeddings doivent avoir le même nombre de lignes")
+
+        self.city_ids = list(city_ids)
+        self.row_of_city = {city_id: row for row, city_id in enumerate(self.city_ids)}
+        self.row_of_tag = {name: row for row, name in enumerate(names)}
+
+        # Lignes normalisées une fois : le produit scalaire est directement le cosinus
+        self.city_matrix = self._normalized(city_matrix)
+        self.phrase_embeddings = self._normalized(phrase_embeddings)
+
+    @staticmethod
+    def _normalized(matrix: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @classmethod
+    def load(cls, city_ids: List[int], city_matrix: np.ndarray, store_path: str = DEFAULT_STORE_PATH) -> "SemanticDislikePenalty":
+        """Charge le cache écrit par build_dislike_store."""
+        with np.load(store_path) as data:
+            return cls(city_ids, city_matrix, data["names"].tolist(), data["embeddings"])
+
+    @classmethod
+    def from_catalog(cls, conn_params: Dict[str, Any] = None, json_path: str = None,
+                     store_path: str = DEFAULT_STORE_PATH) -> "SemanticDislikePenalty":
+        """Pénalités sur le catalogue PostgreSQL ou sur un fichier au format cities_embeddings.json."""
+        if conn_params is not None:
+            ids, _, matrix = load_catalog_from_db(conn_params)
+        elif json_path is not None:
+            ids, _, matrix = load_catalog_from_json(json_path)
+        else:
+            raise ValueError("conn_params ou json_path est requis")
+        return cls.load(ids.tolist(), matrix, store_path)
+
+    def dislike_vector(self, user_dislikes: Dict[str, int]) -> np.ndarray:
+        """
+        Somme pondérée des phrases normalisées en cache, Σᵢ poidsᵢ × phraseᵢ (non renormalisée ;
+        les catégories absentes du cache sont ignorées).
+        """
+        vector = np.zeros(self.phrase_embeddings.shape[1], dtype=np.float32)
+        for tag, weight in user_dislikes.items():
+            row = self.row_of_tag.get(tag)
+            if row is None:
+                logger.warning(f"Dislike sans embedding en cache (ignoré): '{tag}'")
+                continue
+            vector += weight * self.phrase_embeddings[row]
+        return vector
+
+    def penalties(self, user_dislikes: Dict[str, int], hierarchical: bool = True) -> np.ndarray:
+        """
+        Pénalité sémantique de toutes les villes (un seul GEMV) :
+        PENALTY_PER_WEIGHT × max(0, Σᵢ poidsᵢ × cos(ville, phraseᵢ)).
+
+        Args:
+            user_dislikes (Dict[str, int]): Catégories détestées avec poids
+            hierarchical (bool): Ignoré (interface de CategoryPenaltyIndex) : la proximité
+                                 sémantique couvre déjà les sous-catégories
+
+        Returns:
+            np.ndarray: Vecteur de pénalités (float64) >= 0, aligné sur self.city_ids
+        """
+        if not user_dislikes:
+            return np.zeros(len(self.city_ids), dtype=np.float64)
+        similarity = self.city_matrix @ self.dislike_vector(user_dislikes)
+        return self.PENALTY_PER_WEIGHT * np.maximum(similarity, 0.0).astype(np.float64)
+
+    def penalty_for_city(self, city_id: int, user_dislikes: Dict[str, int], hierarchical: bool = True) -> float:
+        """Pénalité d'une seule ville (0.0 si la ville est inconnue)."""
+        row = self.row_of_city.get(city_id)
+        if row is None or not user_dislikes:
+            return 0.0
+        similarity = float(self.city_matrix[row] @ self.dislike_vector(user_dislikes))
+        return self.PENALTY_PER_WEIGHT * max(similarity, 0.0)
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    from catalog import DEFAULT_EMBEDDINGS_JSON
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not os.path.exists(DEFAULT_STORE_PATH):
+        print(build_dislike_store())
+
+    semantic = SemanticDislikePenalty.from_catalog(json_path=DEFAULT_EMBEDDINGS_JSON)
+    dislikes = {"adult.nightclub": 5, "commercial.shopping_mall": 2}
+
+    start = time.perf_counter()
+    penalties = semantic.penalties(dislikes)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{len(penalties)} villes pénalisées en {elapsed:.3f} ms")
+    for row in np.argsort(-penalties)[:5]:
+        print(f"  ville {semantic.city_ids[row]}: {penalties[row]:.4f}")
@@ -0,0 +1,220 @@
+"""
+Graphe pré-calculé des villes similaires (k plus proches voisins).
+
+Le job batch calcule, pour chaque ville, ses k voisins les plus proches (cosinus)
+à partir de la matrice d'embeddings, par blocs de lignes d'un seul GEMM. Le graphe
+est stocké sous forme compacte (voisins int32, scores float16), indexé par la
+version du catalogue, et servi en temps constant par SimilarCitiesGraph.lookup
+(et par l'endpoint backend /api/cities/<id>/similar).
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from catalog import catalog_version, load_catalog_from_db, load_catalog_from_json
+
+logger = logging.getLogger(__name__)
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(V2_DIR)), "backend", "data", "similar_cities")
+MANIFEST_NAME = "similar_cities.json"
+# Graphes de versions remplacées conservés à l'écriture d'un nouveau graphe
+KEEP_PREVIOUS_GRAPHS = 1
+
+
+def compute_knn_graph(matrix: np.ndarray, k: int = 10, block_rows: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcule les k plus proches voisins (cosinus) de chaque ligne, sans la ligne elle-même.
+
+    Args:
+        matrix: (n, dim) embeddings
+        k: Nombre de voisins par ville
+        block_rows: Lignes traitées par bloc (borne la matrice de similarité à block_rows × n)
+
+    Returns:
+        (voisins (n, k) int32 en indices de lignes, scores (n, k) float16), triés par score décroissant
+    """
+    x = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    x = x / norms
+
+    n = x.shape[0]
+    k = min(k, max(n - 1, 0))
+    neighbors = np.zeros((n, k), dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float16)
+    if k == 0:
+        return neighbors, scores
+
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        sims = x[start:stop] @ x.T
+        # Exclure la ville elle-même
+        sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.lexsort((top, -top_sims), axis=1)
+        neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_sims, order, axis=1)
+
+    return neighbors, scores
+
+
+def save_knn_graph(
+    output_dir: str,
+    ids: np.ndarray,
+    names: List[str],
+    neighbors: np.ndarray,
+    scores: np.ndarray,
+    version: str,
+) -> str:
+    """
+    Écrit similar_cities_<version>.npz (ids, voisins, scores et noms des villes) et le
+    manifeste similar_cities.json qui pointe dessus. Le manifeste reste minuscule : le
+    backend le relit dès qu'il change sur le disque.
+
+    Les graphes des versions remplacées sont ensuite supprimés, sauf le plus récent
+    (un lecteur qui vient de lire l'ancien manifeste peut encore l'ouvrir).
+
+    Returns:
+        Chemin du fichier .npz
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    graph_file = f"similar_cities_{version}.npz"
+    graph_path = os.path.join(output_dir, graph_file)
+
+    np.savez(
+        graph_path,
+        city_ids=np.asarray(ids, dtype=np.int32),
+        neighbors=neighbors.astype(np.int32),
+        scores=scores.astype(np.float16),
+        names=np.asarray(names, dtype=np.str_),
+    )
+
+    manifest = {
+        "catalog_version": version,
+        "k": int(neighbors.shape[1]),
+        "file": graph_file,
+    }
+    tmp_path = os.path.join(output_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(output_dir, MANIFEST_NAME))
+
+    prune_knn_graphs(output_dir, graph_file)
+    logger.info(f"✓ Graphe des villes similaires écrit: {graph_path}")
+    return graph_path
+
+
+def prune_knn_graphs(output_dir: str, current_file: str, keep_previous: int = KEEP_PREVIOUS_GRAPHS) -> List[str]:
+    """
+    Supprime les graphes similar_cities_<version>.npz des versions remplacées.
+
+    Args:
+        output_dir: Dossier des graphes
+        current_file: Graphe référencé par le manifeste (jamais supprimé)
+        keep_previous: Nombre de graphes remplacés conservés (les plus récents)
+
+    Returns:
+        Fichiers supprimés
+    """
+    superseded = sorted(
+        (name for name in os.listdir(output_dir)
+         if name.startswith("similar_cities_") and name.endswith(".npz") and name != current_file),
+        key=lambda name: os.path.getmtime(os.path.join(output_dir, name)),
+        reverse=True,
+    )
+    removed = superseded[keep_previous:]
+    for name in removed:
+        os.remove(os.path.join(output_dir, name))
+    if removed:
+        logger.info(f"Graphes remplacés supprimés: {', '.join(removed)}")
+    return removed
+
+
+class SimilarCitiesGraph:
+    """
+    Graphe chargé en mémoire, recherche en temps constant par id de ville.
+    """
+
+    def __init__(self, city_ids: np.ndarray, neighbors: np.ndarray, scores: np.ndarray, names: Dict[int, str], version: str):
+        self.city_ids = city_ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.names = names
+        self.catalog_version = version
+        self.row_of_city = {int(city_id): row for row, city_id in enumerate(city_ids)}
+
+    @classmethod
+    def load(cls, output_dir: str = DEFAULT_OUTPUT_DIR, expected_version: str = None) -> "SimilarCitiesGraph":
+        """
+        Charge le graphe courant ; lève ValueError si expected_version ne correspond pas.
+        """
+        with open(os.path.join(output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        version = manifest["catalog_version"]
+        if expected_version is not None and version != expected_version:
+            raise ValueError(f"Graphe obsolète: version {version}, catalogue {expected_version}")
+
+        with np.load(os.path.join(output_dir, manifest["file"])) as data:
+            city_ids, neighbors, scores = data["city_ids"], data["neighbors"], data["scores"]
+            names = {int(city_id): str(name) for city_id, name in zip(city_ids, data["names"])}
+        return cls(city_ids, neighbors, scores, names, version)
+
+    def lookup(self, city_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Villes les plus similaires à city_id (liste vide si la ville est inconnue).
+        """
+        row = self.row_of_city.get(int(city_id))
+        if row is None:
+            return []
+
+        neighbors = self.neighbors[row][:limit]
+        scores = self.scores[row][:limit]
+        results = []
+        for neighbor, score in zip(neighbors, scores):
+            neighbor_id = int(self.city_ids[neighbor])
+            results.append({
+                "id": neighbor_id,
+                "name": self.names.get(neighbor_id),
+                "similarity": round(float(score), 4),
+            })
+        return results
+
+
+def build_similar_cities(conn_params: Dict[str, Any] = None, json_path: str = None, k: int = 10, output_dir: str = DEFAULT_OUTPUT_DIR) -> str:
+    """
+    Job batch : charge le catalogue (PostgreSQL ou JSON), calcule et écrit le graphe.
+    """
+    if conn_params is not None:
+        ids, names, matrix = load_catalog_from_db(conn_params)
+    else:
+        ids, names, matrix = load_catalog_from_json(json_path) if json_path else load_catalog_from_json()
+
+    version = catalog_version(ids, matrix)
+    neighbors, scores = compute_knn_graph(matrix, k=k)
+    return save_knn_graph(output_dir, ids, names, neighbors, scores, version)
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Option 1 : Embeddings V2 depuis la base de données
+    conn_params = {
+        "host": "localhost",
+        "dbname": "cities",
+        "user": "postgres",
+        "password": "postgres",
+        "port": 5432
+    }
+    build_similar_cities(conn_params=conn_params)
+
+    # Option 2 : Embeddings exportés en JSON (algorithme/V1/cities_embeddings.json)
+    # build_similar_cities()
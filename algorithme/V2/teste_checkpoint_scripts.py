@@ -0,0 +1,65 @@
+"""Smoke test: every data script that uses the restart journal must import.
+
+Each script appends algorithme/V2 to sys.path to reach job_checkpoint.py; a wrong
+relative path only shows up when the script is started. The scripts are imported
+(not run) from their own file; a script whose third-party dependency is not installed
+here is reported as skipped, any other import error is a failure (exit status 1).
+
+Usage:
+    python teste_checkpoint_scripts.py
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(V2_DIR))
+
+# Scripts that import job_checkpoint
+CHECKPOINT_SCRIPTS = [
+    os.path.join("dataS5", "DONNE_V1_ALGO", "scripts", "download_images.py"),
+    os.path.join("dataS5", "DONNEE_V2_ALGO", "scripts", "translate_categories_gpt.py"),
+    os.path.join("dataS5", "DONNEE_V2_ALGO", "scripts", "generate_gpt_embeddings.py"),
+]
+
+# Modules of the repo: failing to import one of them is a path bug, not a missing dependency
+LOCAL_MODULES = {
+    os.path.splitext(name)[0] for name in os.listdir(V2_DIR) if name.endswith(".py")
+}
+
+
+def import_script(relative_path: str) -> str:
+    """Import one script in isolation; returns "ok", "skipped (...)" or "FAILED (...)"."""
+    path = os.path.join(REPO_ROOT, relative_path)
+    name = "smoke_" + os.path.splitext(os.path.basename(path))[0]
+    saved_path = list(sys.path)
+    # Drop this directory so that only the script's own sys.path setup can find algorithme/V2
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != V2_DIR]
+    for module in LOCAL_MODULES:
+        sys.modules.pop(module, None)
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    except ModuleNotFoundError as e:
+        if e.name in LOCAL_MODULES:
+            return f"FAILED (cannot import {e.name}: wrong sys.path)"
+        return f"skipped (missing dependency {e.name})"
+    except SystemExit as e:
+        # translate_categories_gpt.py exits with a message when deep-translator is missing
+        return f"skipped ({e})"
+    except Exception as e:
+        return f"FAILED ({type(e).__name__}: {e})"
+    finally:
+        sys.path[:] = saved_path
+    return "ok"
+
+
+if __name__ == "__main__":
+    failures = 0
+    for script in CHECKPOINT_SCRIPTS:
+        status = import_script(script)
+        failures += status.startswith("FAILED")
+        print(f"  {script:<60} {status}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,48 @@
+"""Hand-computed checks for SemanticDislikePenalty.
+
+The penalty of a city is PENALTY_PER_WEIGHT × max(0, Σᵢ weightᵢ × cos(city, phraseᵢ)).
+The vectors below are small enough to compute the expected values by hand; the
+script exits with status 1 on any mismatch.
+
+Usage:
+    python teste_semantic_penalty.py
+"""
+from __future__ import annotations
+
+import math
+import sys
+
+import numpy as np
+
+from semantic_penalty import SemanticDislikePenalty
+
+# city 1: (3, 4) -> unit (0.6, 0.8); city 2: (-1, 0) -> unit (-1, 0)
+CITY_MATRIX = np.asarray([[3.0, 4.0], [-1.0, 0.0]], dtype=np.float32)
+# "nightclub": (1, 0); "casino": (0, 2) -> unit (0, 1)
+PHRASES = np.asarray([[1.0, 0.0], [0.0, 2.0]], dtype=np.float32)
+DISLIKES = {"nightclub": 2, "casino": 1}
+
+# City 1: 0.05 × (2 × 0.6 + 1 × 0.8) = 0.05 × 2.0 = 0.1
+# City 2: 0.05 × max(0, 2 × -1 + 1 × 0) = 0.0
+EXPECTED = {1: 0.1, 2: 0.0}
+
+
+if __name__ == "__main__":
+    semantic = SemanticDislikePenalty([1, 2], CITY_MATRIX, ["nightclub", "casino"], PHRASES)
+    penalties = semantic.penalties(DISLIKES)
+
+    failures = 0
+    for row, city_id in enumerate(semantic.city_ids):
+        got_all = float(penalties[row])
+        got_one = semantic.penalty_for_city(city_id, DISLIKES)
+        ok = math.isclose(got_all, EXPECTED[city_id], abs_tol=1e-6) and math.isclose(got_one, EXPECTED[city_id], abs_tol=1e-6)
+        failures += not ok
+        print(f"  city {city_id}: penalties {got_all:.6f}, penalty_for_city {got_one:.6f}, expected {EXPECTED[city_id]:.6f}  {'ok' if ok else '✗'}")
+
+    # A single dislike on a city identical to its phrase: same penalty as the exact tag (0.05 × weight)
+    exact = SemanticDislikePenalty([1], PHRASES[:1] * 7, ["nightclub"], PHRASES[:1]).penalties({"nightclub": 5})
+    ok = math.isclose(float(exact[0]), 0.25, abs_tol=1e-6)
+    failures += not ok
+    print(f"  identical city, weight 5: {float(exact[0]):.6f}, expected 0.250000  {'ok' if ok else '✗'}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,321 @@
+"""Parity, fuzz and throughput checks for the query generators.
+
+Random but valid profiles are drawn from the taxonomy in
+dataS5/DONNE_V1_ALGO/categories.json. Every optimised generator in user_query.py
+must stay byte-identical to the frozen implementation in user_query_reference.py,
+including on malformed inputs (same result or same exception type). The benchmark
+reports queries per second and traced bytes allocated per call; the script exits
+with status 1 on any mismatch.
+
+Usage:
+    python teste_user_query.py
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import user_query
+import user_query_reference
+from batch_queries import generate_queries_stream
+from category_rules import load_rules
+from query_memo import QueryMemo
+
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(V2_DIR))
+CATEGORIES_JSON = os.path.join(REPO_ROOT, "dataS5", "DONNE_V1_ALGO", "categories.json")
+
+# City-side generator (runs through the same compiled rule engine)
+sys.path.append(os.path.join(REPO_ROOT, "dataS5", "DONNEE_V2_ALGO", "scripts"))
+from add_categories_gpt import generate_categories_gpt  # noqa: E402
+
+# Tags that exercise the less common rules: raw-prefix leaves, groups, "unless", exact-only matches
+EDGE_TAGS = [
+    "beach_resort", "naturalist", "natural.", "tourism.sightseeing", "catering.restaurants",
+    "production.winery", "production.brewery.craft", "adult.nightclub", "adult.casino.slots",
+    "building.historic", "building.historic.castle", "commercial.marketplace.weekly", "heritage",
+    "national_park", "island.coral", "ski.resort", "tourism.sights.city_gate",
+]
+
+# 33-tag questionnaire profile used in teste_algo.py
+QUESTIONNAIRE_EXAMPLE = [
+    "building", "building.commercial", "building.entertainment", "building.place_of_worship",
+    "building.public_and_civil", "building.tourism", "commercial", "commercial.shopping_mall",
+    "education", "education.library", "entertainment", "entertainment.culture",
+    "entertainment.culture.theatre", "entertainment.museum", "fee", "heritage", "internet_access",
+    "leisure", "leisure.park", "no_fee", "no_fee.no", "religion", "religion.place_of_worship",
+    "religion.place_of_worship.christianity", "tourism", "tourism.attraction", "tourism.sights",
+    "tourism.sights.memorial", "tourism.sights.memorial.ship", "tourism.sights.place_of_worship",
+    "wheelchair", "wheelchair.limited", "wheelchair.yes",
+]
+
+Profile = Tuple[List[str], Dict[str, int]]
+
+
+def load_taxonomy(path: str = CATEGORIES_JSON) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [c["name"] for c in data["categories"]]
+
+
+def random_profile(rng: random.Random, taxonomy: List[str], max_tags: int = 40) -> Profile:
+    """Random category list + weights (1..5) on a random subset of the tags."""
+    categories = rng.sample(taxonomy, rng.randint(0, min(max_tags, len(taxonomy))))
+    if rng.random() < 0.3:
+        categories += rng.sample(EDGE_TAGS, rng.randint(1, 6))
+        rng.shuffle(categories)
+    weights = {c: rng.randint(1, 5) for c in categories if rng.random() < 0.5}
+    return categories, weights
+
+
+def check_parity(profiles: List[Profile]) -> int:
+    """Return the number of profiles whose outputs differ from the reference (user and city side)."""
+    mismatches = 0
+    for categories, weights in profiles:
+        pairs = [
+            (user_query.generate_user_query(categories), user_query_reference.generate_user_query(categories)),
+            (generate_categories_gpt("City", categories), user_query_reference.generate_user_query(categories)),
+            (
+                user_query.generate_user_query_with_weights(categories, weights),
+                user_query_reference.generate_user_query_with_weights(categories, weights),
+            ),
+        ]
+        for got, expected in pairs:
+            if got != expected:
+                mismatches += 1
+                print(f"  ✗ {categories} {weights}\n    got:      {got}\n    expected: {expected}")
+    return mismatches
+
+
+def check_canonical_keys(profiles: List[Profile], rng: random.Random) -> int:
+    """Shuffled/duplicated profiles must share a key, and the key must regenerate the sentence."""
+    failures = 0
+    for categories, weights in profiles:
+        shuffled = categories + categories[: len(categories) // 2]
+        rng.shuffle(shuffled)
+        key = user_query.canonical_profile_key(categories, weights)
+        if user_query.canonical_profile_key(shuffled, weights) != key:
+            failures += 1
+            continue
+        ordered = sorted(set(categories))
+        expected = user_query_reference.generate_user_query_with_weights(ordered, weights)
+        if user_query.generate_user_query_from_key(key) != expected:
+            failures += 1
+    return failures
+
+
+# Theme-level tags: each one only triggers its theme's generic phrase
+THEME_LEVEL_TAGS = ["natural", "heritage", "catering.restaurant", "commercial.marketplace", "adult.nightclub"]
+
+
+def check_lattice(profiles: List[Profile], rng: random.Random) -> Tuple[int, int]:
+    """Whenever a profile maps into the theme lattice, the lattice sentence must be the generated one.
+
+    Returns:
+        (lattice hits, mismatches)
+    """
+    rules = load_rules()
+    theme_level = [
+        (rng.sample(THEME_LEVEL_TAGS, rng.randint(0, 5)) + rng.sample(["fee", "building", "tourism", "wheelchair"], 2), weights)
+        for _, weights in profiles
+    ]
+    hits = mismatches = 0
+    for categories, weights in profiles + theme_level:
+        weights = {c: rng.randint(1, 5) for c in categories} if weights else None
+        index = rules.theme_lattice_index(categories, weights)
+        if index is None:
+            continue
+        hits += 1
+        expected = user_query_reference.generate_user_query_with_weights(categories, weights)
+        if rules.lattice_sentence(index) != expected:
+            mismatches += 1
+            print(f"  ✗ {categories} {weights}\n    lattice:  {rules.lattice_sentence(index)}\n    expected: {expected}")
+    return hits, mismatches
+
+
+def queries_per_second(generate: Callable[[List[str], Dict[str, int]], str], profiles: List[Profile], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for categories, weights in profiles:
+            generate(categories, weights)
+        best = min(best, time.perf_counter() - start)
+    return len(profiles) / best
+
+
+def allocations_per_call(generate: Callable[[List[str], Dict[str, int]], object], profiles: List[Profile]) -> Tuple[float, int]:
+    """Mean traced bytes allocated during one call (peak above the baseline) and bytes still held after the run."""
+    for categories, weights in profiles[:100]:
+        generate(categories, weights)  # warm caches (compiled rules, dictionary ids)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    total = 0
+    for categories, weights in profiles:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        generate(categories, weights)
+        total += tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return total / max(len(profiles), 1), retained
+
+
+# (label, optimised, reference), all called as fn(categories, weights)
+HOT_PATH = [
+    ("generate_user_query", lambda c, w: user_query.generate_user_query(c), lambda c, w: user_query_reference.generate_user_query(c)),
+    ("..._with_weights", user_query.generate_user_query_with_weights, user_query_reference.generate_user_query_with_weights),
+    (
+        "_normalize_weighted_input",
+        lambda c, w: user_query._normalize_weighted_input(w),
+        lambda c, w: user_query_reference._normalize_weighted_input(w),
+    ),
+]
+
+
+def benchmark(profiles: List[Profile]) -> None:
+    example = [(QUESTIONNAIRE_EXAMPLE, {c: 5 for c in QUESTIONNAIRE_EXAMPLE[::3]})] * 2000
+    for label, batch in (("random profiles", profiles), ("33-tag questionnaire", example)):
+        print(f"  {label}:")
+        for name, optimised, reference in HOT_PATH:
+            ref = queries_per_second(reference, batch)
+            opt = queries_per_second(optimised, batch)
+            ref_bytes, _ = allocations_per_call(reference, batch[:1000])
+            opt_bytes, retained = allocations_per_call(optimised, batch[:1000])
+            print(
+                f"    {name:<26} reference: {ref:>9.0f} q/s {ref_bytes / 1024:>6.1f} KiB/call   "
+                f"optimised: {opt:>9.0f} q/s {opt_bytes / 1024:>6.1f} KiB/call   x{opt / ref:.2f}   "
+                f"retained {retained / 1024:.0f} KiB"
+            )
+
+    # Repeated profiles (10 distinct profiles, submitted in random order) through the memo
+    memo = QueryMemo(encode=lambda text: [0.0])
+    repeated = [profiles[i % 10] for i in range(len(profiles))]
+    memoised = queries_per_second(memo.sentence, repeated)
+    print(f"  {'memoised (10 profiles)':<22} {memoised:>9.0f} q/s   {memo.stats()}")
+
+
+# Malformed values seen from the API: padding, case, empty tags, non-strings, odd weights
+ODD_WEIGHTS = [0, -3, 6, 99, "4", " 2 ", "x", "", 2.7, True, None, float("nan")]
+
+
+def _odd_tag(rng: random.Random, tag: str) -> object:
+    return rng.choice([
+        tag, f"  {tag} ", tag.upper(), f"{tag}.", f".{tag}", f"{tag}..x", "", "   ",
+        f"{tag}.é", tag.replace(".", " "), 42, None,
+    ])
+
+
+def random_weight_input(rng: random.Random, categories: List[object]) -> object:
+    """Weights in one of the formats accepted by _normalize_weighted_input, with odd values mixed in."""
+    def weight() -> object:
+        return rng.choice(ODD_WEIGHTS) if rng.random() < 0.3 else rng.randint(1, 5)
+
+    tags = [c for c in categories if rng.random() < 0.6]
+    kind = rng.randrange(5)
+    if kind == 0:
+        return {tag: weight() for tag in tags}
+    if kind == 1:
+        return [(tag, weight()) for tag in tags]
+    if kind == 2:
+        return [{"tag": tag, "weight": weight()} if rng.random() < 0.8 else {"tag": tag} for tag in tags]
+    if kind == 3:
+        # Mixed list with items that must be skipped
+        return [rng.choice([(tag, weight()), {"tag": tag, "weight": weight()}, (tag,), tag, 7]) for tag in tags]
+    return None
+
+
+def _outcome(fn: Callable, *args: object) -> object:
+    try:
+        return fn(*args)
+    except Exception as exc:  # noqa: BLE001 - exception type is part of the contract
+        return type(exc)
+
+
+def fuzz(rng: random.Random, taxonomy: List[str], n: int = 3000) -> Tuple[int, int]:
+    """Malformed inputs: the optimised functions must return (or raise) exactly what the reference does.
+
+    Returns:
+        (crashes, drifts): exceptions only raised by the optimised code, and differing results
+    """
+    crashes = drifts = 0
+    for _ in range(n):
+        base = rng.sample(taxonomy + EDGE_TAGS, rng.randint(0, 25))
+        categories = [_odd_tag(rng, tag) for tag in base]
+        raw_weights = random_weight_input(rng, categories)
+        weights = raw_weights if isinstance(raw_weights, dict) else {c: rng.choice(ODD_WEIGHTS) for c in categories[:5]}
+        for name, optimised, reference in HOT_PATH:
+            args = (categories, raw_weights if name == "_normalize_weighted_input" else weights)
+            got, expected = _outcome(optimised, *args), _outcome(reference, *args)
+            if got == expected:
+                continue
+            if isinstance(got, type) and not isinstance(expected, type):
+                crashes += 1
+            else:
+                drifts += 1
+            print(f"  ✗ {name}{args}\n    got:      {got}\n    expected: {expected}")
+    return crashes, drifts
+
+
+def check_stream(profiles: List[Profile], rng: random.Random, n: int = 50_000) -> int:
+    """Streamed sentences must match the per-profile ones; peak memory must not grow with n.
+
+    Returns:
+        Number of streaming configurations whose output differs
+    """
+    population = [profiles[rng.randrange(len(profiles))] for _ in range(n)]
+    expected = [user_query.generate_user_query_from_key(user_query.canonical_profile_key(c, w)) for c, w in population]
+    failures = 0
+    for kwargs in ({}, {"window": 64, "chunksize": 100}, {"processes": 2, "window": 64}):
+        start = time.perf_counter()
+        ok = list(generate_queries_stream(iter(population), **kwargs)) == expected
+        rate = n / (time.perf_counter() - start)
+        failures += not ok
+        print(f"  {str(kwargs):<32} identical: {ok}   {rate:>9.0f} profiles/s")
+
+    for size in (n // 10, n):
+        tracemalloc.start()
+        stream = (population[i % len(population)] for i in range(size))
+        for _ in generate_queries_stream(stream, window=1000):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {size:>7} profiles streamed, peak traced memory {peak / 1024:.0f} KiB")
+    return failures
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    taxonomy = load_taxonomy()
+    profiles = [random_profile(rng, taxonomy) for _ in range(5000)]
+    profiles.append((QUESTIONNAIRE_EXAMPLE, {}))
+    profiles.append((QUESTIONNAIRE_EXAMPLE, {"tourism.attraction": 5, "leisure.park": 5, "heritage": 5}))
+
+    print("Parity with user_query_reference:")
+    mismatches = check_parity(profiles)
+    print(f"  {len(profiles)} profiles, {mismatches} mismatches")
+
+    print("\nCanonical profile keys:")
+    key_failures = check_canonical_keys(profiles, rng)
+    print(f"  {key_failures} failures")
+
+    print("\nFuzzing malformed inputs:")
+    crashes, drifts = fuzz(rng, taxonomy)
+    print(f"  {crashes} crashes, {drifts} drifts")
+
+    print("\nTheme lattice:")
+    hits, lattice_mismatches = check_lattice(profiles, rng)
+    print(f"  {hits} profiles in the lattice, {lattice_mismatches} mismatches")
+
+    print("\nThroughput and allocations per call:")
+    benchmark(profiles)
+
+    print("\nStreaming batch generation:")
+    stream_failures = check_stream(profiles, rng)
+
+    # Non-zero exit code so the harness can gate changes to the hot path
+    sys.exit(1 if mismatches or key_failures or crashes or drifts or lattice_mismatches or stream_failures else 0)
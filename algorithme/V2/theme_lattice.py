@@ -0,0 +1,169 @@
+"""
+Treillis pré-calculé des embeddings de requêtes au niveau des thèmes.
+
+generate_user_query_with_weights n'émet que les morceaux des cinq thèmes (nature,
+histoire, gastronomie, shopping, fun/sport). Quand l'utilisateur choisit des
+préférences générales, sans feuille spécifique (ex: "heritage", "natural",
+"catering.restaurant"), chaque thème présent n'a que sa formulation générique et la
+phrase ne dépend que du poids (0 = absent, 1..5) de chaque thème : au plus 6^5 = 7776
+phrases (en pratique ~1500 distinctes à cause de max_chunks).
+
+Job hors ligne (python theme_lattice.py) :
+- énumère les 6^5 vecteurs de poids et leurs phrases (CompiledCategoryRules.lattice_sentence)
+- encode une seule fois chaque phrase distincte, par lots
+- écrit theme_lattice.npz : embeddings float16 + index uint16 -> ligne
+
+A l'exécution, ThemeLattice.lookup transforme le profil en index (somme des poids en
+base 6) puis lit la ligne : l'encodage en direct n'est nécessaire que pour les
+requêtes qui citent des feuilles (cuisines, monuments, paysages, ...).
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from category_rules import CompiledCategoryRules, load_rules
+from user_query import ProfileKey, canonical_profile_key
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+V2_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LATTICE_PATH = os.path.join(V2_DIR, "theme_lattice.npz")
+
+
+def _load_encoder() -> Callable[[List[str]], Any]:
+    from embedding_cache import get_embedding_cache
+    return lambda texts: get_embedding_cache(MODEL_NAME).encode(texts, normalize=True)
+
+
+def build_theme_lattice(
+    output_path: str = DEFAULT_LATTICE_PATH,
+    encode: Optional[Callable[[List[str]], Any]] = None,
+    rules: Optional[CompiledCategoryRules] = None,
+) -> Dict[str, Any]:
+    """
+    Enumère le treillis des thèmes et écrit le fichier d'embeddings float16.
+
+    Args:
+        output_path: Fichier .npz à écrire
+        encode: Fonction liste de phrases -> matrice (par défaut le cache d'embeddings de MODEL_NAME, normalisé)
+        rules: Règles compilées (par défaut load_rules())
+
+    Returns:
+        Statistiques du job (points, phrases distinctes, dimension, durée, taille du fichier)
+    """
+    rules = rules or load_rules()
+    encode = encode or _load_encoder()
+    start = time.time()
+
+    sentences: List[str] = []
+    row_of_sentence: Dict[str, int] = {}
+    row_of_index = np.empty(rules.lattice_size, dtype=np.uint16)
+    for index in range(rules.lattice_size):
+        sentence = rules.lattice_sentence(index)
+        row = row_of_sentence.get(sentence)
+        if row is None:
+            row = row_of_sentence[sentence] = len(sentences)
+            sentences.append(sentence)
+        row_of_index[index] = row
+
+    logger.info(f"{rules.lattice_size} points du treillis -> {len(sentences)} phrases distinctes à encoder")
+    embeddings = np.asarray(encode(sentences), dtype=np.float32)
+
+    tmp_path = output_path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        embeddings=embeddings.astype(np.float16),
+        row_of_index=row_of_index,
+        sentences=np.asarray(sentences),
+        model=np.asarray(MODEL_NAME),
+        rules_version=np.asarray(rules.version),
+    )
+    os.replace(tmp_path, output_path)
+
+    stats = {
+        "points": rules.lattice_size,
+        "sentences": len(sentences),
+        "dim": int(embeddings.shape[1]),
+        "seconds": time.time() - start,
+        "bytes": os.path.getsize(output_path),
+    }
+    logger.info(f"✓ Treillis écrit dans {output_path}: {stats}")
+    return stats
+
+
+class ThemeLattice:
+    """
+    Embeddings pré-calculés des requêtes au niveau des thèmes.
+
+    Les embeddings sont stockés en float16 (écart de cosinus ~1e-3 avec l'encodage en
+    direct) et rendus en float32, en lecture seule.
+    """
+
+    def __init__(self, embeddings: np.ndarray, row_of_index: np.ndarray, sentences: List[str],
+                 rules: Optional[CompiledCategoryRules] = None):
+        self.rules = rules or load_rules()
+        if len(row_of_index) != self.rules.lattice_size:
+            raise ValueError(
+                f"Treillis de {len(row_of_index)} points, {self.rules.lattice_size} attendus : relancer theme_lattice.py"
+            )
+        self.embeddings = embeddings.astype(np.float32)
+        self.embeddings.setflags(write=False)
+        self.row_of_index = row_of_index
+        self.sentences = sentences
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_LATTICE_PATH, rules: Optional[CompiledCategoryRules] = None) -> "ThemeLattice":
+        """
+        Charge le fichier du treillis.
+
+        Raises:
+            ValueError: Si le fichier a été généré avec d'autres règles (phrases différentes)
+        """
+        rules = rules or load_rules()
+        with np.load(path) as data:
+            lattice = cls(data["embeddings"], data["row_of_index"], data["sentences"].tolist(), rules)
+            version = data["rules_version"].item()
+
+        # Les phrases stockées doivent être exactement celles des règles courantes
+        for index in range(rules.lattice_size):
+            if lattice.sentences[lattice.row_of_index[index]] != rules.lattice_sentence(index):
+                raise ValueError(
+                    f"Treillis obsolète (règles version {version}, courante {rules.version}) : relancer theme_lattice.py"
+                )
+        logger.info(f"✓ Treillis chargé: {len(lattice.sentences)} phrases, dimension {lattice.embeddings.shape[1]}")
+        return lattice
+
+    def row_for_key(self, key: ProfileKey) -> Optional[int]:
+        """Ligne du treillis d'un profil canonique, ou None si la phrase cite des feuilles."""
+        weighted, pairs = key
+        categories = [tag for tag, _ in pairs]
+        index = self.rules.theme_lattice_index(categories, dict(pairs) if weighted else None)
+        return None if index is None else int(self.row_of_index[index])
+
+    def lookup(self, user_categories: List[str], weights: Dict[str, int] = None) -> Optional[np.ndarray]:
+        """
+        Embedding pré-calculé du profil, ou None (encodage en direct nécessaire).
+
+        Args:
+            user_categories: Tags du profil
+            weights: Poids optionnels (mêmes règles que generate_user_query_with_weights)
+        """
+        row = self.row_for_key(canonical_profile_key(user_categories, weights))
+        return None if row is None else self.embeddings[row]
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    print(build_theme_lattice())
+
+    lattice = ThemeLattice.load()
+    print(lattice.lookup(["heritage", "natural", "catering.restaurant"], {"heritage": 5}) is not None)
+    # Cuisine spécifique : encodage en direct
+    print(lattice.lookup(["catering.restaurant.italian"]) is None)
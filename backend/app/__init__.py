@@ -21,13 +21,13 @@ def create_app(config_name='default'):
     from .routes.main_routes import main_bp
     from .routes.travel_routes import travel_bp
     from .routes.photo_routes import photo_bp
+    from .routes.poi_routes import poi_bp
+    from .routes.city_routes import city_bp
     
     app.register_blueprint(main_bp, url_prefix='/api')
     app.register_blueprint(travel_bp, url_prefix='/api/travel')
-<<<<<<< HEAD
     app.register_blueprint(photo_bp, url_prefix='/api/travel/photos')
-=======
-    app.register_blueprint(photo_bp, url_prefix='/api/photos')
->>>>>>> main
+    app.register_blueprint(poi_bp, url_prefix='/api/pois')
+    app.register_blueprint(city_bp, url_prefix='/api/cities')
     
     return app
\ No newline at end of file
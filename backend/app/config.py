@@ -1,4 +1,3 @@
-<<<<<<< HEAD
 import os
 
 class Config:
@@ -19,6 +18,18 @@ class Config:
     DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 20))
     MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 30))
     
+    # Index vectoriel des POI (généré par dataS5/DONNEE_V2_ALGO/scripts/generate_poi_index.py)
+    POI_INDEX_DIR = os.getenv(
+        'POI_INDEX_DIR',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'poi_index')
+    )
+    
+    # Graphe des villes similaires (généré par algorithme/V2/similar_cities.py)
+    SIMILAR_CITIES_DIR = os.getenv(
+        'SIMILAR_CITIES_DIR',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'similar_cities')
+    )
+    
     # CORS pour mobile
     CORS_ORIGINS = '*'
 
@@ -43,49 +54,3 @@ config = {
     'testing': TestingConfig,
     'default': DevelopmentConfig
 }
-=======
-import os
-
-class Config:
-    """Configuration de base - Version Travel API"""
-    SECRET_KEY = os.getenv('SECRET_KEY', 'travel-secret-key-dev')
-    
-    # API Unsplash
-    UNSPLASH_ACCESS_KEY = os.getenv('UNSPLASH_ACCESS_KEY')
-    UNSPLASH_BASE_URL = "https://api.unsplash.com"
-    
-    # API Amadeus (flight offers - test environment)
-    AMADEUS_ACCESS_TOKEN = os.getenv('AMADEUS_ACCESS_TOKEN')
-    AMADEUS_BASE_URL = os.getenv('AMADEUS_BASE_URL', 'https://test.api.amadeus.com')
-    # Optional client credentials for token rotation (client_credentials)
-    AMADEUS_CLIENT_ID = os.getenv('AMADEUS_CLIENT_ID')
-    AMADEUS_CLIENT_SECRET = os.getenv('AMADEUS_CLIENT_SECRET')
-    # Configuration API
-    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 20))
-    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 30))
-    
-    # CORS pour mobile
-    CORS_ORIGINS = '*'
-
-
-class DevelopmentConfig(Config):
-    """Configuration de développement"""
-    DEBUG = True
-
-class ProductionConfig(Config):
-    """Configuration de production"""
-    DEBUG = False
-
-class TestingConfig(Config):
-    """Configuration de test"""
-    DEBUG = True
-    TESTING = True
-
-# Dictionnaire des configurations
-config = {
-    'development': DevelopmentConfig,
-    'production': ProductionConfig,
-    'testing': TestingConfig,
-    'default': DevelopmentConfig
-}
->>>>>>> main
@@ -1,4 +1,3 @@
-<<<<<<< HEAD
 """
 Extensions Flask
 Initialisation des extensions pour éviter les imports circulaires
@@ -7,13 +6,3 @@ from flask_cors import CORS
 
 # Initialiser les extensions (sans les lier à une app)
 cors = CORS()
-=======
-"""
-Extensions Flask
-Initialisation des extensions pour éviter les imports circulaires
-"""
-from flask_cors import CORS
-
-# Initialiser les extensions (sans les lier à une app)
-cors = CORS()
->>>>>>> main
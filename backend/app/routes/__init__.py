@@ -1,5 +1 @@
-<<<<<<< HEAD
 # Routes package
-=======
-# Routes package
->>>>>>> main
@@ -0,0 +1,40 @@
+"""
+Routes pour les villes (recommandations dérivées du catalogue)
+"""
+from flask import Blueprint, request
+from app.services.similar_cities_service import SimilarCitiesService
+from app.utils.responses import success_response, error_response
+
+city_bp = Blueprint('cities', __name__)
+
+
+@city_bp.route('/<int:city_id>/similar', methods=['GET'])
+def similar_cities(city_id):
+    """Villes similaires à une ville ("cities like this one").
+
+    Query params : `limit` (optionnel, défaut 5)
+    """
+    limit = request.args.get('limit', 5, type=int)
+    if limit < 1:
+        return error_response('limit must be a positive integer', 400)
+
+    try:
+        version, cities = SimilarCitiesService().get_similar(city_id, limit)
+
+        if cities is None:
+            return error_response(f'Unknown city id: {city_id}', 404)
+
+        return success_response(
+            {
+                'city_id': city_id,
+                'catalog_version': version,
+                'similar_cities': cities
+            },
+            message='Similar cities'
+        )
+
+    except FileNotFoundError as e:
+        return error_response(str(e), 503)
+
+    except Exception as e:
+        return error_response(f'Failed to get similar cities: {str(e)}', 500)
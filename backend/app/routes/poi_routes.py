@@ -0,0 +1,79 @@
+"""
+Routes pour la recherche de POI (points d'intérêt)
+"""
+from flask import Blueprint, request, current_app
+from app.services.poi_search_service import PoiSearchService
+from app.utils.responses import success_response, error_response
+
+poi_bp = Blueprint('pois', __name__)
+
+
+def _parse_bbox(raw):
+    """Parse `minLat,minLon,maxLat,maxLon` en tuple de floats"""
+    parts = raw.split(',')
+    if len(parts) != 4:
+        raise ValueError('bbox must be minLat,minLon,maxLat,maxLon')
+    min_lat, min_lon, max_lat, max_lon = (float(p) for p in parts)
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError('bbox min values must be lower than max values')
+    return min_lat, min_lon, max_lat, max_lon
+
+
+@poi_bp.route('/search', methods=['GET'])
+def search_pois():
+    """Recherche sémantique des meilleurs POI.
+
+    Query params :
+    - `q` : texte libre (ex: "medieval castle")
+    - `category` : catégorie ou préfixe (ex: "tourism.sights")
+    - `city_id` (optionnel) : limite la recherche à une ville
+    - `bbox` (optionnel) : `minLat,minLon,maxLat,maxLon`
+    - `limit` (optionnel, défaut 10)
+
+    Au moins `q` ou `category` est obligatoire.
+    """
+    query = (request.args.get('q') or '').strip()
+    category = (request.args.get('category') or '').strip()
+
+    if not query and not category:
+        return error_response('Missing required params: q or category', 400)
+
+    city_id = request.args.get('city_id', type=int)
+    limit = min(request.args.get('limit', 10, type=int), current_app.config['MAX_PAGE_SIZE'])
+
+    bbox = None
+    if request.args.get('bbox'):
+        try:
+            bbox = _parse_bbox(request.args.get('bbox'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+    try:
+        pois = PoiSearchService().search(
+            query=query or None,
+            category=category or None,
+            city_id=city_id,
+            bbox=bbox,
+            limit=limit
+        )
+
+        return success_response(
+            {
+                'pois': pois,
+                'query': {
+                    'q': query or None,
+                    'category': category or None,
+                    'city_id': city_id,
+                    'bbox': list(bbox) if bbox else None,
+                    'limit': limit
+                }
+            },
+            message='POI search results'
+        )
+
+    except (FileNotFoundError, RuntimeError) as e:
+        # Index non construit ou modèle indisponible
+        return error_response(str(e), 503)
+
+    except Exception as e:
+        return error_response(f'Failed to search POIs: {str(e)}', 500)
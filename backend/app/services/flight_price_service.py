@@ -1,7 +1,7 @@
 import json
 import os
 import time
-from backend.app.services.amadeus_client import AmadeusClient
+from app.services.amadeus_client import AmadeusClient
 
 class FlightPriceService:
     DATA_FILE = os.path.join(os.path.dirname(__file__), '../../data/flight_prices.json')
@@ -0,0 +1,191 @@
+"""
+Service de recherche sémantique des POI (points d'intérêt)
+"""
+import json
+import os
+
+import numpy as np
+from flask import current_app
+
+
+class PoiIndex:
+    """Index vectoriel des POI chargé depuis le dossier produit par generate_poi_index.py"""
+
+    # Lignes du mmap lues et scorées à la fois quand aucun filtre ne restreint la recherche
+    SCORE_BLOCK_ROWS = 4096
+
+    def __init__(self, embeddings, city_offsets, city_ids, pois):
+        self.embeddings = embeddings
+        self.pois = pois
+        self.city_ranges = {
+            int(city_id): (int(city_offsets[i]), int(city_offsets[i + 1]))
+            for i, city_id in enumerate(city_ids)
+        }
+
+        # Index spatial : lignes triées par latitude (recherche dichotomique).
+        # Les POI sans coordonnées n'y figurent pas (jamais dans une bbox).
+        located = np.asarray(
+            [row for row, p in enumerate(pois) if p.get('lat') is not None and p.get('lon') is not None],
+            dtype=np.int64
+        )
+        lat = np.asarray([pois[row]['lat'] for row in located], dtype=np.float64)
+        self.lon = np.full(len(pois), np.nan, dtype=np.float64)
+        self.lon[located] = [pois[row]['lon'] for row in located]
+        order = np.argsort(lat, kind='stable')
+        self.lat_order = located[order]
+        self.lat_sorted = lat[order]
+
+        # Index inversé : catégorie (et chacun de ses préfixes) -> lignes triées
+        postings = {}
+        for row, poi in enumerate(pois):
+            seen = set()
+            for tag in poi.get('categories') or []:
+                parts = tag.split('.')
+                for depth in range(1, len(parts) + 1):
+                    seen.add('.'.join(parts[:depth]))
+            for tag in seen:
+                postings.setdefault(tag, []).append(row)
+        self.postings = {tag: np.asarray(rows, dtype=np.int64) for tag, rows in postings.items()}
+
+    @classmethod
+    def load(cls, index_dir):
+        """Charger l'index (embeddings en mmap)"""
+        with open(os.path.join(index_dir, 'pois.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        return cls(
+            np.load(os.path.join(index_dir, 'poi_embeddings.npy'), mmap_mode='r'),
+            np.load(os.path.join(index_dir, 'city_offsets.npy')),
+            np.load(os.path.join(index_dir, 'city_ids.npy')),
+            meta.get('pois', []),
+        )
+
+    def candidate_rows(self, city_id=None, bbox=None, category=None):
+        """
+        Lignes candidates après filtrage dans l'index (None = tout l'index).
+
+        - city_id : plage contiguë de lignes (disposition CSR)
+        - bbox : (min_lat, min_lon, max_lat, max_lon), dichotomie sur la latitude
+        - category : liste de l'index inversé (préfixe accepté, ex: 'tourism.sights')
+        """
+        rows = None
+
+        if city_id is not None:
+            start, stop = self.city_ranges.get(int(city_id), (0, 0))
+            rows = np.arange(start, stop, dtype=np.int64)
+
+        if category is not None:
+            posting = self.postings.get(category, np.empty(0, dtype=np.int64))
+            rows = posting if rows is None else np.intersect1d(rows, posting, assume_unique=True)
+
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            lo = int(np.searchsorted(self.lat_sorted, min_lat, side='left'))
+            hi = int(np.searchsorted(self.lat_sorted, max_lat, side='right'))
+            in_lat = self.lat_order[lo:hi]
+            in_box = np.sort(in_lat[(self.lon[in_lat] >= min_lon) & (self.lon[in_lat] <= max_lon)])
+            rows = in_box if rows is None else np.intersect1d(rows, in_box, assume_unique=True)
+
+        return rows
+
+    def _score_all(self, query_vector):
+        """Scores de toutes les lignes, par blocs : seul un bloc du mmap est en mémoire à la fois"""
+        n = self.embeddings.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.SCORE_BLOCK_ROWS):
+            stop = min(start + self.SCORE_BLOCK_ROWS, n)
+            scores[start:stop] = self.embeddings[start:stop] @ query_vector
+        return scores
+
+    def top_k(self, query_vector, rows=None, limit=10):
+        """Les `limit` meilleures lignes (cosinus) parmi les candidates"""
+        if limit <= 0:
+            return []
+        if rows is None:
+            rows = np.arange(self.embeddings.shape[0], dtype=np.int64)
+            scores = self._score_all(query_vector)
+        else:
+            scores = np.asarray(self.embeddings[rows]) @ query_vector
+        if rows.shape[0] == 0:
+            return []
+
+        if rows.shape[0] > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            best = np.arange(rows.shape[0])
+        best = best[np.lexsort((rows[best], -scores[best]))]
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+
+class PoiSearchService:
+    """Service de recherche des meilleurs POI pour une requête texte ou catégorie"""
+
+    _indexes = {}
+    _model = None
+    MODEL_NAME = 'all-MiniLM-L6-v2'
+
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir or current_app.config['POI_INDEX_DIR']
+
+    @property
+    def index(self):
+        """Index chargé une seule fois par processus"""
+        if self.index_dir not in PoiSearchService._indexes:
+            if not os.path.exists(os.path.join(self.index_dir, 'pois.json')):
+                raise FileNotFoundError(
+                    'POI index not built (run dataS5/DONNEE_V2_ALGO/scripts/generate_poi_index.py)'
+                )
+            PoiSearchService._indexes[self.index_dir] = PoiIndex.load(self.index_dir)
+        return PoiSearchService._indexes[self.index_dir]
+
+    @staticmethod
+    def encode_query(text):
+        """Encoder une requête texte (modèle chargé une seule fois)"""
+        if PoiSearchService._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise RuntimeError('Text search requires sentence-transformers on the server')
+            PoiSearchService._model = SentenceTransformer(PoiSearchService.MODEL_NAME)
+
+        vector = PoiSearchService._model.encode(text, normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+
+    def search(self, query=None, category=None, city_id=None, bbox=None, limit=10):
+        """
+        Rechercher les meilleurs POI.
+
+        - query : texte libre, classé par similarité sémantique
+        - category : filtre par catégorie ; sans texte, les POI de la catégorie sont
+          classés par proximité avec leur centroïde (les plus représentatifs d'abord)
+        - city_id / bbox : filtres appliqués dans l'index avant le scoring
+        """
+        if not query and not category:
+            raise ValueError('A text query or a category is required')
+
+        index = self.index
+        rows = index.candidate_rows(city_id=city_id, bbox=bbox, category=category)
+
+        if query:
+            query_vector = self.encode_query(query)
+        else:
+            members = index.postings.get(category, np.empty(0, dtype=np.int64))
+            if members.shape[0] == 0:
+                return []
+            centroid = np.asarray(index.embeddings[members]).mean(axis=0)
+            norm = np.linalg.norm(centroid)
+            query_vector = (centroid / norm if norm else centroid).astype(np.float32)
+
+        results = []
+        for row, score in index.top_k(query_vector, rows, limit):
+            poi = index.pois[row]
+            results.append({
+                'name': poi.get('name'),
+                'city_id': poi.get('city_id'),
+                'city': poi.get('city'),
+                'categories': poi.get('categories', []),
+                'lat': poi.get('lat'),
+                'lon': poi.get('lon'),
+                'score': round(score, 4),
+            })
+        return results
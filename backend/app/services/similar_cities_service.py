@@ -0,0 +1,85 @@
+"""
+Service des villes similaires (graphe kNN pré-calculé)
+"""
+import json
+import os
+
+import numpy as np
+from flask import current_app
+
+
+class SimilarCitiesService:
+    """Lecture du graphe produit par algorithme/V2/similar_cities.py"""
+
+    # Keep this aligned with algorithme/V2/similar_cities.py
+    MANIFEST_NAME = 'similar_cities.json'
+
+    # Graphes chargés, par dossier : {dir: (signature du manifeste, graph)}
+    _graphs = {}
+
+    def __init__(self, graph_dir=None):
+        self.graph_dir = graph_dir or current_app.config['SIMILAR_CITIES_DIR']
+
+    def _load(self):
+        """
+        Charger le graphe courant.
+
+        Le manifeste n'est relu que si son fichier change (inode, date, taille :
+        similar_cities.py le remplace par os.replace), et le graphe n'est rechargé
+        que si la version du catalogue change.
+        """
+        manifest_path = os.path.join(self.graph_dir, self.MANIFEST_NAME)
+        try:
+            stat = os.stat(manifest_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                'Similar cities graph not built (run algorithme/V2/similar_cities.py)'
+            )
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        cached = SimilarCitiesService._graphs.get(self.graph_dir)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if cached and cached[1]['catalog_version'] == manifest['catalog_version']:
+            SimilarCitiesService._graphs[self.graph_dir] = (signature, cached[1])
+            return cached[1]
+
+        # Tableaux lus en mémoire, fichier refermé aussitôt (le job supprime les anciens graphes)
+        with np.load(os.path.join(self.graph_dir, manifest['file'])) as data:
+            city_ids = data['city_ids']
+            graph = {
+                'catalog_version': manifest['catalog_version'],
+                'city_ids': city_ids,
+                'neighbors': data['neighbors'],
+                'scores': data['scores'],
+                'names': {int(city_id): str(name) for city_id, name in zip(city_ids, data['names'])},
+                'row_of_city': {int(city_id): row for row, city_id in enumerate(city_ids)},
+            }
+        SimilarCitiesService._graphs[self.graph_dir] = (signature, graph)
+        return graph
+
+    def get_similar(self, city_id, limit=5):
+        """
+        Villes similaires à `city_id` (temps constant).
+
+        Returns:
+            tuple: (catalog_version, liste de villes) ; liste None si la ville est inconnue
+        """
+        graph = self._load()
+        row = graph['row_of_city'].get(int(city_id))
+        if row is None:
+            return graph['catalog_version'], None
+
+        results = []
+        for neighbor, score in zip(graph['neighbors'][row][:limit], graph['scores'][row][:limit]):
+            neighbor_id = int(graph['city_ids'][neighbor])
+            results.append({
+                'id': neighbor_id,
+                'name': graph['names'].get(neighbor_id),
+                'similarity': round(float(score), 4)
+            })
+        return graph['catalog_version'], results
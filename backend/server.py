@@ -1,4 +1,3 @@
-<<<<<<< HEAD
 """
 Point d'entrée principal du serveur Flask
 """
@@ -11,17 +10,3 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     app.run(host='0.0.0.0', port=port, debug=debug)
-=======
-"""
-Point d'entrée principal du serveur Flask
-"""
-from app import create_app
-import os
-
-app = create_app()
-
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
-    app.run(host='0.0.0.0', port=port, debug=debug)
->>>>>>> main
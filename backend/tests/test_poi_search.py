@@ -0,0 +1,148 @@
+"""
+Tests pour la recherche sémantique des POI
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+from app import create_app
+from app.services.poi_search_service import PoiIndex, PoiSearchService
+
+
+POIS = [
+    # Ville 1 (Paris)
+    {'name': 'Louvre', 'city_id': 1, 'city': 'Paris', 'categories': ['entertainment', 'entertainment.museum'], 'lat': 48.86, 'lon': 2.33},
+    {'name': 'Notre-Dame', 'city_id': 1, 'city': 'Paris', 'categories': ['tourism', 'tourism.sights', 'tourism.sights.place_of_worship'], 'lat': 48.85, 'lon': 2.35},
+    # Ville 2 (Rome)
+    {'name': 'Colosseum', 'city_id': 2, 'city': 'Rome', 'categories': ['tourism', 'tourism.sights', 'tourism.sights.ruines'], 'lat': 41.89, 'lon': 12.49},
+    {'name': 'Vatican Museums', 'city_id': 2, 'city': 'Rome', 'categories': ['entertainment', 'entertainment.museum'], 'lat': 41.91, 'lon': 12.45},
+]
+
+EMBEDDINGS = np.asarray([
+    [1.0, 0.0, 0.0, 0.0],
+    [0.0, 1.0, 0.0, 0.0],
+    [0.0, 0.8, 0.6, 0.0],
+    [0.8, 0.0, 0.0, 0.6],
+], dtype=np.float32)
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    """Index POI minimal (2 villes, 4 POI) au format de generate_poi_index.py"""
+    np.save(tmp_path / 'poi_embeddings.npy', EMBEDDINGS)
+    np.save(tmp_path / 'city_offsets.npy', np.asarray([0, 2, 4], dtype=np.int64))
+    np.save(tmp_path / 'city_ids.npy', np.asarray([1, 2], dtype=np.int64))
+    with open(tmp_path / 'pois.json', 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'model': 'test', 'pois': POIS}, f)
+    yield str(tmp_path)
+    PoiSearchService._indexes.pop(str(tmp_path), None)
+
+
+@pytest.fixture
+def client(index_dir):
+    """Fixture pour créer un client de test Flask pointant sur l'index de test"""
+    app = create_app('testing')
+    app.config['POI_INDEX_DIR'] = index_dir
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    """Remplace le modèle par un encodeur déterministe"""
+    vectors = {
+        'museum': np.asarray([1.0, 0.0, 0.0, 0.0], dtype=np.float32),
+        'ancient ruins': np.asarray([0.0, 0.6, 0.8, 0.0], dtype=np.float32),
+    }
+    monkeypatch.setattr(PoiSearchService, 'encode_query', staticmethod(lambda text: vectors[text]))
+
+
+class TestPoiSearchService:
+    """Tests du service de recherche"""
+
+    def test_text_query_ranks_by_similarity(self, index_dir, fake_encoder):
+        results = PoiSearchService(index_dir).search(query='museum', limit=2)
+        assert [r['name'] for r in results] == ['Louvre', 'Vatican Museums']
+        assert results[0]['score'] == 1.0
+
+    def test_unfiltered_search_scores_mmap_in_blocks(self, index_dir, fake_encoder, monkeypatch):
+        monkeypatch.setattr(PoiIndex, 'SCORE_BLOCK_ROWS', 3)
+        index = PoiSearchService(index_dir).index
+        assert isinstance(index.embeddings, np.memmap)
+
+        best = index.top_k(np.asarray([1.0, 0.0, 0.0, 0.0], dtype=np.float32), limit=4)
+        assert [row for row, _ in best] == [0, 3, 1, 2]
+        assert [score for _, score in best] == pytest.approx([1.0, 0.8, 0.0, 0.0])
+
+    def test_city_filter_is_applied_in_index(self, index_dir, fake_encoder):
+        results = PoiSearchService(index_dir).search(query='museum', city_id=2)
+        assert [r['name'] for r in results] == ['Vatican Museums', 'Colosseum']
+        assert all(r['city_id'] == 2 for r in results)
+
+    def test_bbox_filter(self, index_dir, fake_encoder):
+        bbox = (41.0, 12.0, 42.0, 13.0)
+        results = PoiSearchService(index_dir).search(query='ancient ruins', bbox=bbox)
+        assert results[0]['name'] == 'Colosseum'
+        assert {r['city'] for r in results} == {'Rome'}
+
+    def test_pois_without_coordinates_are_not_in_spatial_index(self):
+        pois = POIS + [{'name': 'Unknown spot', 'city_id': 2, 'city': 'Rome', 'categories': ['tourism'], 'lat': None, 'lon': None}]
+        embeddings = np.vstack([EMBEDDINGS, [[0.0, 0.0, 1.0, 0.0]]]).astype(np.float32)
+        index = PoiIndex(embeddings, np.asarray([0, 2, 5]), np.asarray([1, 2]), pois)
+
+        # Autour de (0, 0) : aucun POI, et ailleurs seuls les POI localisés
+        assert index.candidate_rows(bbox=(-1.0, -1.0, 1.0, 1.0)).tolist() == []
+        assert index.candidate_rows(bbox=(-90.0, -180.0, 90.0, 180.0)).tolist() == [0, 1, 2, 3]
+        # Toujours trouvé par ville ou par catégorie
+        assert 4 in index.candidate_rows(city_id=2, category='tourism').tolist()
+
+    def test_category_prefix_without_text(self, index_dir):
+        results = PoiSearchService(index_dir).search(category='tourism.sights')
+        assert {r['name'] for r in results} == {'Notre-Dame', 'Colosseum'}
+
+    def test_unknown_city_returns_empty(self, index_dir, fake_encoder):
+        assert PoiSearchService(index_dir).search(query='museum', city_id=99) == []
+
+    def test_missing_index_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            PoiSearchService(str(tmp_path / 'missing')).search(category='tourism')
+
+
+class TestPoiSearchRoutes:
+    """Tests de la route /api/pois/search"""
+
+    def test_search_by_text(self, client, fake_encoder):
+        response = client.get('/api/pois/search', query_string={'q': 'museum', 'limit': 1})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['success'] is True
+        assert [p['name'] for p in data['data']['pois']] == ['Louvre']
+        assert data['data']['query']['limit'] == 1
+
+    def test_search_by_category_and_city(self, client):
+        response = client.get(
+            '/api/pois/search',
+            query_string={'category': 'entertainment.museum', 'city_id': 1}
+        )
+
+        assert response.status_code == 200
+        assert [p['name'] for p in response.get_json()['data']['pois']] == ['Louvre']
+
+    def test_missing_query_and_category(self, client):
+        response = client.get('/api/pois/search')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    def test_invalid_bbox(self, client):
+        response = client.get('/api/pois/search', query_string={'category': 'tourism', 'bbox': '1,2,3'})
+
+        assert response.status_code == 400
+
+    def test_index_not_built(self, client, tmp_path):
+        client.application.config['POI_INDEX_DIR'] = os.path.join(str(tmp_path), 'missing')
+        response = client.get('/api/pois/search', query_string={'category': 'tourism'})
+
+        assert response.status_code == 503
@@ -0,0 +1,104 @@
+"""
+Tests pour les villes similaires (graphe kNN pré-calculé)
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+from app import create_app
+from app.services.similar_cities_service import SimilarCitiesService
+
+
+def write_graph(directory, version, neighbors):
+    """Graphe minimal au format de algorithme/V2/similar_cities.py"""
+    graph_file = f'similar_cities_{version}.npz'
+    np.savez(
+        directory / graph_file,
+        city_ids=np.asarray([1, 2, 3], dtype=np.int32),
+        neighbors=np.asarray(neighbors, dtype=np.int32),
+        scores=np.asarray([[0.9, 0.5], [0.9, 0.4], [0.5, 0.4]], dtype=np.float16),
+        names=np.asarray(['Paris', 'Lyon', 'Rome']),
+    )
+    # Remplacement atomique, comme save_knn_graph
+    with open(directory / 'similar_cities.json.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'catalog_version': version, 'k': 2, 'file': graph_file}, f)
+    os.replace(directory / 'similar_cities.json.tmp', directory / 'similar_cities.json')
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    write_graph(tmp_path, 'v1', [[1, 2], [0, 2], [0, 1]])
+    yield tmp_path
+    SimilarCitiesService._graphs.pop(str(tmp_path), None)
+
+
+@pytest.fixture
+def client(graph_dir):
+    """Fixture pour créer un client de test Flask pointant sur le graphe de test"""
+    app = create_app('testing')
+    app.config['SIMILAR_CITIES_DIR'] = str(graph_dir)
+    with app.test_client() as client:
+        yield client
+
+
+class TestSimilarCitiesService:
+    """Tests du service"""
+
+    def test_lookup(self, graph_dir):
+        version, cities = SimilarCitiesService(str(graph_dir)).get_similar(1, limit=5)
+
+        assert version == 'v1'
+        assert [c['name'] for c in cities] == ['Lyon', 'Rome']
+        assert cities[0]['similarity'] == pytest.approx(0.9, abs=1e-3)
+
+    def test_unknown_city(self, graph_dir):
+        _, cities = SimilarCitiesService(str(graph_dir)).get_similar(42)
+        assert cities is None
+
+    def test_reloads_when_catalog_version_changes(self, graph_dir):
+        service = SimilarCitiesService(str(graph_dir))
+        assert service.get_similar(1, limit=1)[1][0]['id'] == 2
+
+        write_graph(graph_dir, 'v2', [[2, 1], [0, 2], [0, 1]])
+        version, cities = service.get_similar(1, limit=1)
+        assert version == 'v2'
+        assert cities[0]['id'] == 3
+
+    def test_manifest_not_reread_while_unchanged(self, graph_dir, monkeypatch):
+        service = SimilarCitiesService(str(graph_dir))
+        service.get_similar(1)
+
+        def fail(*args, **kwargs):
+            raise AssertionError('manifest re-read')
+
+        monkeypatch.setattr('app.services.similar_cities_service.json.load', fail)
+        version, cities = service.get_similar(2, limit=1)
+        assert version == 'v1'
+        assert cities[0]['name'] == 'Paris'
+
+
+class TestSimilarCitiesRoutes:
+    """Tests de la route /api/cities/<id>/similar"""
+
+    def test_similar_cities_success(self, client):
+        response = client.get('/api/cities/2/similar', query_string={'limit': 1})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['success'] is True
+        assert data['data']['catalog_version'] == 'v1'
+        assert [c['name'] for c in data['data']['similar_cities']] == ['Paris']
+
+    def test_unknown_city_returns_404(self, client):
+        response = client.get('/api/cities/99/similar')
+        assert response.status_code == 404
+
+    def test_invalid_limit(self, client):
+        response = client.get('/api/cities/1/similar', query_string={'limit': 0})
+        assert response.status_code == 400
+
+    def test_graph_not_built(self, client, tmp_path):
+        client.application.config['SIMILAR_CITIES_DIR'] = str(tmp_path / 'missing')
+        response = client.get('/api/cities/1/similar')
+        assert response.status_code == 503
@@ -1,236 +1,239 @@
-<<<<<<< HEAD
+import hashlib
 import json
 import os
-from typing import Any, Dict, List, Optional, Set, Tuple
+import sys
+import textwrap
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+# Shared rule engine compiled from ../categories_gpt_keys.json (also used by algorithme/V2/user_query.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "algorithme", "V2"))
+from category_rules import DEFAULT_RULES_PATH, load_rules  # noqa: E402
 
-def _dedupe_keep_order(items: List[str]) -> List[str]:
-    seen: Set[str] = set()
-    out: List[str] = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        out.append(item)
-    return out
-
-
-def _humanize_token(token: str) -> str:
-    token = token.replace("_", " ")
-
-    # Small, safe normalizations to make sentences read naturally.
-    mapping = {
-        "food and drink": "food and drink",
-        "place of worship": "places of worship",
-        "arts centre": "arts centres",
-        "shopping mall": "shopping malls",
-        "coffee shop": "coffee shops",
-        "internet access": "internet access",
-    }
+# Written next to cities_categories_gpt.json:
+# - the manifest maps each city id to a hash of its inputs, for the generator version that produced it
+# - the changed-ids file lists the cities regenerated by the last run, so that later stages
+#   (translation, embeddings, DB update) can process only the delta
+MANIFEST_FILENAME = "cities_categories_gpt.manifest.json"
+CHANGED_IDS_FILENAME = "cities_categories_gpt.changed.json"
 
-    lower = token.lower()
-    if lower in mapping:
-        return mapping[lower]
+STREAM_READ_SIZE = 1 << 20
+STREAM_CHUNKSIZE = 256
 
-    return token
 
+def generate_categories_gpt(city_name: str, categories: List[str]) -> str:
+    # Strict filter goals:
+    # - Include ONLY: Nature, History, Gastronomy, Shopping (limited), Fun/Sport
+    # - Ignore: administrative/office/parking/highway/education/healthcare, technical attributes (fee/wifi/wheelchair/access),
+    #   and vague categories (man_made, building) except building.historic.
+    # The themes, prefixes, leaf rules and phrases live in categories_gpt_keys.json.
+    return load_rules().describe(categories)
 
-def _join_natural(items: List[str]) -> str:
-    items = [i for i in items if i]
-    if not items:
-        return ""
-    if len(items) == 1:
-        return items[0]
-    if len(items) == 2:
-        return f"{items[0]} and {items[1]}"
-    return ", ".join(items[:-1]) + f", and {items[-1]}"
 
+def generator_version() -> str:
+    """Rules version + hash of categories_gpt_keys.json: any rule edit invalidates every city."""
+    with open(DEFAULT_RULES_PATH, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    return f"v{load_rules().version}-{digest}"
 
-def _extract_leaf_values(categories: List[str], prefix: str) -> List[str]:
-    values: List[str] = []
-    for cat in categories:
-        if not cat.startswith(prefix):
-            continue
-        leaf = cat[len(prefix) :]
-        if leaf.startswith("."):
-            leaf = leaf[1:]
-        if not leaf:
-            continue
-        values.append(leaf.split(".")[-1])
-    return _dedupe_keep_order(values)
 
+def city_input_hash(city_name: str, categories: List[str]) -> str:
+    """Hash of the inputs of one city: name + category list exactly as passed to the generator.
 
-def _has_any(categories: Set[str], prefixes: List[str]) -> bool:
-    for p in prefixes:
-        for c in categories:
-            if c == p or c.startswith(p + "."):
-                return True
-    return False
+    The description depends on the order (leaf order) and multiplicity of the tags, so
+    the list is not sorted or deduplicated.
+    """
+    payload = json.dumps([city_name, list(categories)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
-def generate_categories_gpt(city_name: str, categories: List[str]) -> str:
-    cats_set: Set[str] = set(categories)
+def _load_json(path: str, default: Any) -> Any:
+    # Missing or unreadable previous outputs simply mean "regenerate everything"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
 
-    # Strict filter goals:
-    # - Include ONLY: Nature, History, Gastronomy, Shopping (limited), Fun/Sport
-    # - Ignore: administrative/office/parking/highway/education/healthcare, technical attributes (fee/wifi/wheelchair/access),
-    #   and vague categories (man_made, building) except building.historic.
 
-    def has_exact(value: str) -> bool:
-        return value in cats_set
-
-    def has_prefix(prefix: str) -> bool:
-        for c in cats_set:
-            if c == prefix or c.startswith(prefix + "."):
-                return True
-        return False
-
-    # --- Nature ---
-    has_nature = has_prefix("natural") or has_prefix("beach") or has_prefix("island") or has_prefix("national_park")
-    # Collect up to 3 nature details without losing tags like 'beach'.
-    nature_items: List[str] = []
-    nature_items.extend(_extract_leaf_values(categories, "natural"))
-    if has_prefix("beach"):
-        nature_items.append("beach")
-        nature_items.extend(_extract_leaf_values(categories, "beach"))
-    if has_prefix("island"):
-        nature_items.append("island")
-        nature_items.extend(_extract_leaf_values(categories, "island"))
-    if has_prefix("national_park"):
-        nature_items.append("national_park")
-        nature_items.extend(_extract_leaf_values(categories, "national_park"))
-    nature_items = [_humanize_token(x) for x in nature_items]
-    nature_items = _dedupe_keep_order(nature_items)[:3]
-
-    # --- History ---
-    has_history = has_prefix("heritage") or has_prefix("tourism.sights") or has_prefix("religion") or has_prefix("memorial") or has_exact("building.historic")
-
-    sights_leaf = _extract_leaf_values(categories, "tourism.sights")
-    sights_leaf = [_humanize_token(x) for x in sights_leaf]
-    sights_leaf = _dedupe_keep_order(sights_leaf)
-    preferred_sights = {
-        "castle",
-        "ruines",
-        "monastery",
-        "cathedral",
-        "church",
-        "chapel",
-        "mosque",
-        "synagogue",
-        "temple",
-        "archaeological site",
-        "fort",
-        "city gate",
-    }
-    sights_preferred = [s for s in sights_leaf if s.lower() in preferred_sights]
-    sights_other = [s for s in sights_leaf if s.lower() not in preferred_sights]
-    sights_final = (sights_preferred + sights_other)[:3]
-
-    # --- Gastronomy ---
-    has_restaurants = has_prefix("catering.restaurant")
-    cuisines = _extract_leaf_values(categories, "catering.restaurant")
-    cuisines_blacklist = {"restaurant", "regional"}
-    cuisines_clean = [_humanize_token(c) for c in cuisines if c not in cuisines_blacklist]
-    cuisines_clean = _dedupe_keep_order(cuisines_clean)[:3]
-
-    has_winery = has_exact("production.winery") or has_prefix("production.winery")
-    has_brewery = has_exact("production.brewery") or has_prefix("production.brewery")
-
-    # --- Shopping (strict) ---
-    has_shopping_mall = has_exact("commercial.shopping_mall")
-    has_marketplace = has_exact("commercial.marketplace")
-    has_souvenirs = has_exact("commercial.gift_and_souvenir")
-
-    # --- Fun / Sport ---
-    # Use prefix checks to avoid missing sub-tags like 'adult.nightclub.*'
-    has_nightclub = has_prefix("adult.nightclub")
-    has_casino = has_prefix("adult.casino")
-    has_theme_park = has_prefix("entertainment.theme_park")
-    has_ski = has_prefix("ski")
-    has_stadium = has_prefix("sport.stadium")
-
-    # Build sentence chunks (only from allowed themes)
-    chunks: List[str] = []
-
-    if has_nature:
-        if nature_items:
-            chunks.append(f"beautiful landscapes like {_join_natural(nature_items)}")
-        else:
-            chunks.append("beautiful landscapes for nature lovers")
-
-    if has_history:
-        history_bits: List[str] = []
-        if has_prefix("heritage"):
-            history_bits.append("historical heritage")
-        # Sights (castles/ruins/etc)
-        if sights_final:
-            history_bits.append(f"landmarks like {_join_natural(sights_final)}")
-        elif has_prefix("tourism.sights"):
-            history_bits.append("iconic landmarks")
-        if has_prefix("religion"):
-            history_bits.append("religious sites")
-        if has_prefix("memorial"):
-            history_bits.append("memorials")
-        if has_exact("building.historic") and "historical heritage" not in history_bits:
-            history_bits.append("historic architecture")
-        history_bits = _dedupe_keep_order(history_bits)
-        if history_bits:
-            chunks.append(_join_natural(history_bits))
-
-    if has_restaurants or has_winery or has_brewery:
-        food_bits: List[str] = []
-        if has_restaurants:
-            if cuisines_clean:
-                food_bits.append(f"restaurants serving {_join_natural(cuisines_clean)} cuisine")
+def _write_json_atomic(path: str, data: Any) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def iter_cities(path: str, read_size: int = STREAM_READ_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield the city objects of a JSON array or NDJSON file without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer, pos, array = "", 0, None
+
+        def fill() -> bool:
+            nonlocal buffer, pos
+            data = f.read(read_size)
+            buffer, pos = buffer[pos:] + data, 0
+            return bool(data)
+
+        while True:
+            # Skip separators (whitespace, and commas inside the array)
+            while pos < len(buffer) and (buffer[pos].isspace() or (array and buffer[pos] == ",")):
+                pos += 1
+            if pos == len(buffer):
+                if fill():
+                    continue
+                if array:
+                    raise ValueError("Unterminated JSON array.")
+                return
+
+            if array is None:
+                array = buffer[pos] == "["
+                pos += 1 if array else 0
+                continue
+            if array and buffer[pos] == "]":
+                return
+
+            try:
+                obj, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Object cut by the end of the buffer: read more, or fail at end of file
+                if fill():
+                    continue
+                raise
+            yield obj
+
+
+def _city_task(obj: Any) -> Optional[Tuple[Any, str, List[str]]]:
+    # Same input normalisation as main()
+    if not isinstance(obj, dict):
+        return None
+    city_name = str(obj.get("name", "")).strip() or "This city"
+    categories = obj.get("categories", [])
+    if not isinstance(categories, list):
+        categories = []
+    return obj.get("id"), city_name, [str(c) for c in categories]
+
+
+def _generate_chunk(tasks: List[Tuple[Any, str, List[str]]]) -> List[Dict[str, Any]]:
+    """Worker task: output entries of a chunk of cities."""
+    return [
+        {"id": city_id, "name": city_name, "categories_gpt": generate_categories_gpt(city_name, categories)}
+        for city_id, city_name, categories in tasks
+    ]
+
+
+def _generate_ordered(tasks: Iterable[Tuple[Any, str, List[str]]], processes: int, chunksize: int) -> Iterator[Dict[str, Any]]:
+    tasks = iter(tasks)
+    if processes <= 1:
+        while True:
+            chunk = list(islice(tasks, chunksize))
+            if not chunk:
+                return
+            yield from _generate_chunk(chunk)
+
+    # At most 2 chunks per process in flight: memory stays bounded, results come back in input order
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < 2 * processes:
+                chunk = list(islice(tasks, chunksize))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append(executor.submit(_generate_chunk, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def stream_categories_gpt(
+    input_path: str,
+    output_path: str,
+    ndjson: bool = False,
+    processes: Optional[int] = None,
+    chunksize: int = STREAM_CHUNKSIZE,
+    manifest_path: Optional[str] = None,
+    changed_path: Optional[str] = None,
+) -> int:
+    """Streaming variant of main() for large inputs (full regeneration).
+
+    Cities are read incrementally (JSON array or NDJSON), generated in chunks on a process
+    pool and written in input order through a temp file renamed at the end. Only the input
+    hashes (one per city, for the manifest) are kept in memory.
+
+    Args:
+        input_path: cities_categories.json (JSON array) or an NDJSON file
+        output_path: Output file
+        ndjson: Write one JSON object per line instead of the indented JSON array of main()
+        processes: Worker processes (default: all cores)
+        chunksize: Cities per worker task
+        manifest_path: If set, manifest written as in main() (same format)
+        changed_path: If set, changed-ids file written as in main(): every city is changed,
+            removed ids are those of the previous output_path missing from the input
+
+    Returns:
+        Number of cities written
+    """
+    processes = processes or os.cpu_count() or 1
+    hashes: Dict[str, str] = {}
+    changed_ids = []
+
+    def tracked(tasks: Iterable[Tuple[Any, str, List[str]]]) -> Iterator[Tuple[Any, str, List[str]]]:
+        # Manifest entries are recorded as the cities are handed to the workers
+        for task in tasks:
+            hashes[str(task[0])] = city_input_hash(task[1], task[2])
+            changed_ids.append(task[0])
+            yield task
+
+    tasks = tracked(task for task in map(_city_task, iter_cities(input_path)) if task is not None)
+
+    written = 0
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if not ndjson:
+            f.write("[")
+        for entry in _generate_ordered(tasks, processes, chunksize):
+            if ndjson:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
             else:
-                food_bits.append("great local restaurants")
-        if has_winery and has_brewery:
-            food_bits.append("wineries and breweries")
-        elif has_winery:
-            food_bits.append("wineries")
-        elif has_brewery:
-            food_bits.append("breweries")
-        food_bits = _dedupe_keep_order(food_bits)
-        if food_bits:
-            chunks.append(_join_natural(food_bits))
-
-    shopping_bits: List[str] = []
-    if has_shopping_mall:
-        shopping_bits.append("shopping malls")
-    if has_marketplace:
-        shopping_bits.append("local marketplaces")
-    if has_souvenirs:
-        shopping_bits.append("souvenir shops")
-    if shopping_bits:
-        chunks.append(_join_natural(_dedupe_keep_order(shopping_bits)))
-
-    fun_bits: List[str] = []
-    if has_theme_park:
-        fun_bits.append("theme parks")
-    if has_ski:
-        fun_bits.append("skiing")
-    if has_stadium:
-        fun_bits.append("stadium events")
-    if has_nightclub and has_casino:
-        fun_bits.append("nightlife and casinos")
-    elif has_nightclub:
-        fun_bits.append("nightlife")
-    elif has_casino:
-        fun_bits.append("casinos")
-    fun_bits = _dedupe_keep_order(fun_bits)
-    if fun_bits:
-        chunks.append(_join_natural(fun_bits))
-
-    chunks = _dedupe_keep_order(chunks)
-    if not chunks:
-        return "A destination offering a mix of travel experiences and local atmosphere."
-
-    # Keep the sentence concise and focused
-    chunks = chunks[:3]
-    return f"A destination featuring {_join_natural(chunks)}."
-
-
-def main() -> None:
+                # Same layout as json.dump(output_list, indent=2)
+                f.write(("," if written else "") + "\n" + textwrap.indent(json.dumps(entry, ensure_ascii=False, indent=2), "  "))
+            written += 1
+        if not ndjson:
+            f.write("\n]" if written else "]")
+
+    removed_ids = []
+    if changed_path and os.path.exists(output_path):
+        try:
+            removed_ids = [
+                obj.get("id") for obj in iter_cities(output_path)
+                if isinstance(obj, dict) and str(obj.get("id")) not in hashes
+            ]
+        except (OSError, ValueError):
+            # Unreadable previous output: nothing known to be removed (as in main())
+            pass
+
+    os.replace(tmp_path, output_path)
+    version = generator_version()
+    if manifest_path:
+        _write_json_atomic(manifest_path, {"generator": version, "cities": hashes})
+    if changed_path:
+        _write_json_atomic(changed_path, {"generator": version, "changed": changed_ids, "removed": removed_ids})
+    return written
+
+
+def main(force: bool = False) -> List[Any]:
+    """Regenerate categories_gpt for the cities whose inputs changed since the last run.
+
+    Args:
+        force: Regenerate every city, ignoring the manifest
+
+    Returns:
+        Ids of the regenerated cities (also written to CHANGED_IDS_FILENAME)
+    """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     base_dir = os.path.dirname(script_dir)
     input_path = os.path.join(base_dir, "cities_categories.json")
@@ -243,8 +246,21 @@ def main() -> None:
     if not isinstance(data, list):
         raise ValueError("Expected a JSON list at root.")
 
+    manifest_path = os.path.join(base_dir, MANIFEST_FILENAME)
+    version = generator_version()
+    manifest = _load_json(manifest_path, {})
+    previous_hashes: Dict[str, str] = {}
+    if not force and isinstance(manifest, dict) and manifest.get("generator") == version:
+        previous_hashes = manifest.get("cities", {})
+
+    previous_output = _load_json(output_path, [])
+    previous_by_id = {
+        str(obj.get("id")): obj for obj in previous_output if isinstance(previous_output, list) and isinstance(obj, dict)
+    }
+
     output_list = []
-    updated = 0
+    hashes: Dict[str, str] = {}
+    changed_ids = []
     for obj in data:
         if not isinstance(obj, dict):
             continue
@@ -253,297 +269,50 @@ def main() -> None:
         categories = obj.get("categories", [])
         if not isinstance(categories, list):
             categories = []
+        categories = [str(c) for c in categories]
+
+        key = str(city_id)
+        input_hash = city_input_hash(city_name, categories)
+        hashes[key] = input_hash
+        if previous_hashes.get(key) == input_hash and key in previous_by_id:
+            output_list.append(previous_by_id[key])
+            continue
 
-        categories_gpt = generate_categories_gpt(city_name, [str(c) for c in categories])
         output_list.append({
             "id": city_id,
             "name": city_name,
-            "categories_gpt": categories_gpt,
+            "categories_gpt": generate_categories_gpt(city_name, categories),
         })
-        updated += 1
+        changed_ids.append(city_id)
 
-    tmp_path = os.path.join(base_dir, "cities_categories_gpt.tmp.json")
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(output_list, f, ensure_ascii=False, indent=2)
+    removed_ids = [previous_by_id[key].get("id") for key in previous_by_id if key not in hashes]
 
-    os.replace(tmp_path, output_path)
-    print(f"✓ Generated {updated} cities -> {output_path}")
+    _write_json_atomic(output_path, output_list)
+    _write_json_atomic(manifest_path, {"generator": version, "cities": hashes})
+    _write_json_atomic(
+        os.path.join(base_dir, CHANGED_IDS_FILENAME),
+        {"generator": version, "changed": changed_ids, "removed": removed_ids},
+    )
+    print(f"✓ Regenerated {len(changed_ids)}/{len(output_list)} cities ({len(removed_ids)} removed) -> {output_path}")
+    return changed_ids
 
 
 if __name__ == "__main__":
-    main()
-=======
-import json
-import os
-from typing import Any, Dict, List, Optional, Set, Tuple
-
-
-def _dedupe_keep_order(items: List[str]) -> List[str]:
-    seen: Set[str] = set()
-    out: List[str] = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        out.append(item)
-    return out
-
-
-def _humanize_token(token: str) -> str:
-    token = token.replace("_", " ")
-
-    # Small, safe normalizations to make sentences read naturally.
-    mapping = {
-        "food and drink": "food and drink",
-        "place of worship": "places of worship",
-        "arts centre": "arts centres",
-        "shopping mall": "shopping malls",
-        "coffee shop": "coffee shops",
-        "internet access": "internet access",
-    }
-
-    lower = token.lower()
-    if lower in mapping:
-        return mapping[lower]
-
-    return token
-
-
-def _join_natural(items: List[str]) -> str:
-    items = [i for i in items if i]
-    if not items:
-        return ""
-    if len(items) == 1:
-        return items[0]
-    if len(items) == 2:
-        return f"{items[0]} and {items[1]}"
-    return ", ".join(items[:-1]) + f", and {items[-1]}"
-
-
-def _extract_leaf_values(categories: List[str], prefix: str) -> List[str]:
-    values: List[str] = []
-    for cat in categories:
-        if not cat.startswith(prefix):
-            continue
-        leaf = cat[len(prefix) :]
-        if leaf.startswith("."):
-            leaf = leaf[1:]
-        if not leaf:
-            continue
-        values.append(leaf.split(".")[-1])
-    return _dedupe_keep_order(values)
-
-
-def _has_any(categories: Set[str], prefixes: List[str]) -> bool:
-    for p in prefixes:
-        for c in categories:
-            if c == p or c.startswith(p + "."):
-                return True
-    return False
-
-
-def generate_categories_gpt(city_name: str, categories: List[str]) -> str:
-    cats_set: Set[str] = set(categories)
-
-    # Strict filter goals:
-    # - Include ONLY: Nature, History, Gastronomy, Shopping (limited), Fun/Sport
-    # - Ignore: administrative/office/parking/highway/education/healthcare, technical attributes (fee/wifi/wheelchair/access),
-    #   and vague categories (man_made, building) except building.historic.
-
-    def has_exact(value: str) -> bool:
-        return value in cats_set
-
-    def has_prefix(prefix: str) -> bool:
-        for c in cats_set:
-            if c == prefix or c.startswith(prefix + "."):
-                return True
-        return False
-
-    # --- Nature ---
-    has_nature = has_prefix("natural") or has_prefix("beach") or has_prefix("island") or has_prefix("national_park")
-    # Collect up to 3 nature details without losing tags like 'beach'.
-    nature_items: List[str] = []
-    nature_items.extend(_extract_leaf_values(categories, "natural"))
-    if has_prefix("beach"):
-        nature_items.append("beach")
-        nature_items.extend(_extract_leaf_values(categories, "beach"))
-    if has_prefix("island"):
-        nature_items.append("island")
-        nature_items.extend(_extract_leaf_values(categories, "island"))
-    if has_prefix("national_park"):
-        nature_items.append("national_park")
-        nature_items.extend(_extract_leaf_values(categories, "national_park"))
-    nature_items = [_humanize_token(x) for x in nature_items]
-    nature_items = _dedupe_keep_order(nature_items)[:3]
-
-    # --- History ---
-    has_history = has_prefix("heritage") or has_prefix("tourism.sights") or has_prefix("religion") or has_prefix("memorial") or has_exact("building.historic")
-
-    sights_leaf = _extract_leaf_values(categories, "tourism.sights")
-    sights_leaf = [_humanize_token(x) for x in sights_leaf]
-    sights_leaf = _dedupe_keep_order(sights_leaf)
-    preferred_sights = {
-        "castle",
-        "ruines",
-        "monastery",
-        "cathedral",
-        "church",
-        "chapel",
-        "mosque",
-        "synagogue",
-        "temple",
-        "archaeological site",
-        "fort",
-        "city gate",
-    }
-    sights_preferred = [s for s in sights_leaf if s.lower() in preferred_sights]
-    sights_other = [s for s in sights_leaf if s.lower() not in preferred_sights]
-    sights_final = (sights_preferred + sights_other)[:3]
-
-    # --- Gastronomy ---
-    has_restaurants = has_prefix("catering.restaurant")
-    cuisines = _extract_leaf_values(categories, "catering.restaurant")
-    cuisines_blacklist = {"restaurant", "regional"}
-    cuisines_clean = [_humanize_token(c) for c in cuisines if c not in cuisines_blacklist]
-    cuisines_clean = _dedupe_keep_order(cuisines_clean)[:3]
-
-    has_winery = has_exact("production.winery") or has_prefix("production.winery")
-    has_brewery = has_exact("production.brewery") or has_prefix("production.brewery")
-
-    # --- Shopping (strict) ---
-    has_shopping_mall = has_exact("commercial.shopping_mall")
-    has_marketplace = has_exact("commercial.marketplace")
-    has_souvenirs = has_exact("commercial.gift_and_souvenir")
-
-    # --- Fun / Sport ---
-    # Use prefix checks to avoid missing sub-tags like 'adult.nightclub.*'
-    has_nightclub = has_prefix("adult.nightclub")
-    has_casino = has_prefix("adult.casino")
-    has_theme_park = has_prefix("entertainment.theme_park")
-    has_ski = has_prefix("ski")
-    has_stadium = has_prefix("sport.stadium")
-
-    # Build sentence chunks (only from allowed themes)
-    chunks: List[str] = []
-
-    if has_nature:
-        if nature_items:
-            chunks.append(f"beautiful landscapes like {_join_natural(nature_items)}")
-        else:
-            chunks.append("beautiful landscapes for nature lovers")
-
-    if has_history:
-        history_bits: List[str] = []
-        if has_prefix("heritage"):
-            history_bits.append("historical heritage")
-        # Sights (castles/ruins/etc)
-        if sights_final:
-            history_bits.append(f"landmarks like {_join_natural(sights_final)}")
-        elif has_prefix("tourism.sights"):
-            history_bits.append("iconic landmarks")
-        if has_prefix("religion"):
-            history_bits.append("religious sites")
-        if has_prefix("memorial"):
-            history_bits.append("memorials")
-        if has_exact("building.historic") and "historical heritage" not in history_bits:
-            history_bits.append("historic architecture")
-        history_bits = _dedupe_keep_order(history_bits)
-        if history_bits:
-            chunks.append(_join_natural(history_bits))
-
-    if has_restaurants or has_winery or has_brewery:
-        food_bits: List[str] = []
-        if has_restaurants:
-            if cuisines_clean:
-                food_bits.append(f"restaurants serving {_join_natural(cuisines_clean)} cuisine")
-            else:
-                food_bits.append("great local restaurants")
-        if has_winery and has_brewery:
-            food_bits.append("wineries and breweries")
-        elif has_winery:
-            food_bits.append("wineries")
-        elif has_brewery:
-            food_bits.append("breweries")
-        food_bits = _dedupe_keep_order(food_bits)
-        if food_bits:
-            chunks.append(_join_natural(food_bits))
-
-    shopping_bits: List[str] = []
-    if has_shopping_mall:
-        shopping_bits.append("shopping malls")
-    if has_marketplace:
-        shopping_bits.append("local marketplaces")
-    if has_souvenirs:
-        shopping_bits.append("souvenir shops")
-    if shopping_bits:
-        chunks.append(_join_natural(_dedupe_keep_order(shopping_bits)))
-
-    fun_bits: List[str] = []
-    if has_theme_park:
-        fun_bits.append("theme parks")
-    if has_ski:
-        fun_bits.append("skiing")
-    if has_stadium:
-        fun_bits.append("stadium events")
-    if has_nightclub and has_casino:
-        fun_bits.append("nightlife and casinos")
-    elif has_nightclub:
-        fun_bits.append("nightlife")
-    elif has_casino:
-        fun_bits.append("casinos")
-    fun_bits = _dedupe_keep_order(fun_bits)
-    if fun_bits:
-        chunks.append(_join_natural(fun_bits))
-
-    chunks = _dedupe_keep_order(chunks)
-    if not chunks:
-        return "A destination offering a mix of travel experiences and local atmosphere."
-
-    # Keep the sentence concise and focused
-    chunks = chunks[:3]
-    return f"A destination featuring {_join_natural(chunks)}."
-
-
-def main() -> None:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    base_dir = os.path.dirname(script_dir)
-    input_path = os.path.join(base_dir, "cities_categories.json")
-
-    output_path = os.path.join(base_dir, "cities_categories_gpt.json")
-
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    if not isinstance(data, list):
-        raise ValueError("Expected a JSON list at root.")
-
-    output_list = []
-    updated = 0
-    for obj in data:
-        if not isinstance(obj, dict):
-            continue
-        city_id = obj.get("id")
-        city_name = str(obj.get("name", "")).strip() or "This city"
-        categories = obj.get("categories", [])
-        if not isinstance(categories, list):
-            categories = []
-
-        categories_gpt = generate_categories_gpt(city_name, [str(c) for c in categories])
-        output_list.append({
-            "id": city_id,
-            "name": city_name,
-            "categories_gpt": categories_gpt,
-        })
-        updated += 1
-
-    tmp_path = os.path.join(base_dir, "cities_categories_gpt.tmp.json")
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(output_list, f, ensure_ascii=False, indent=2)
-
-    os.replace(tmp_path, output_path)
-    print(f"✓ Generated {updated} cities -> {output_path}")
-
-
-if __name__ == "__main__":
-    main()
->>>>>>> main
+    # --stream: full regeneration in bounded memory on all cores (--ndjson for one object per line)
+    if "--stream" in sys.argv[1:]:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ndjson = "--ndjson" in sys.argv[1:]
+        if ndjson:
+            # Separate output: the manifest and changed ids keep describing cities_categories_gpt.json
+            output_path = os.path.join(base_dir, "cities_categories_gpt.ndjson")
+            tracking = {}
+        else:
+            output_path = os.path.join(base_dir, "cities_categories_gpt.json")
+            tracking = {
+                "manifest_path": os.path.join(base_dir, MANIFEST_FILENAME),
+                "changed_path": os.path.join(base_dir, CHANGED_IDS_FILENAME),
+            }
+        count = stream_categories_gpt(os.path.join(base_dir, "cities_categories.json"), output_path, ndjson=ndjson, **tracking)
+        print(f"✓ Streamed {count} cities -> {output_path}")
+    else:
+        main(force="--force" in sys.argv[1:])
@@ -1,9 +1,82 @@
-<<<<<<< HEAD
 import psycopg2
 import json
 import os
+import sys
+import time
 from typing import List
-from sentence_transformers import SentenceTransformer
+
+# Écriture en masse des embeddings (COPY + UPDATE ... FROM), partagée avec algorithme/V1
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "algorithme", "V2"))
+from catalog import bulk_update_embeddings  # noqa: E402
+from embedding_cache import EmbeddingCache, get_embedding_cache  # noqa: E402
+from encoding_pool import EncodingPool  # noqa: E402
+from job_checkpoint import DEFERRED, DONE, SKIPPED, JobCheckpoint, input_hash  # noqa: E402
+
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_BATCH_SIZE = 64
+
+
+def open_encoder(batch_size: int = DEFAULT_BATCH_SIZE, processes: int = 1):
+    """
+    Cache d'embeddings et, avec processes > 1, le pool d'encodage qui l'alimente.
+
+    Returns:
+        (cache, pool ou None, textes par étape : 2 lots par processus avec un pool)
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size doit être >= 1")
+    pool = EncodingPool(processes, MODEL_NAME, chunksize=batch_size) if processes > 1 else None
+    cache = EmbeddingCache(model_name=MODEL_NAME, encode=pool) if pool else get_embedding_cache(MODEL_NAME)
+    step = batch_size * 2 * processes if pool else batch_size
+    return cache, pool, step
+
+
+def encode_texts_in_batches(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE, processes: int = 1) -> List[List[float]]:
+    """
+    Encode une liste de textes par lots avec un seul modèle (ou un modèle par processus).
+
+    Les textes sont triés par longueur avant le découpage en lots (moins de padding
+    dans chaque lot), puis les embeddings sont remis dans l'ordre d'entrée.
+    Les textes déjà encodés lors d'une exécution précédente sont lus dans le cache
+    d'embeddings (le modèle n'est chargé que si un texte est inédit).
+    La progression et le débit (phrases/s) sont affichés après chaque lot.
+    Avec processes > 1, les textes inédits sont répartis sur un EncodingPool
+    (2 lots par processus à chaque étape).
+
+    Args:
+        texts: Textes à encoder
+        batch_size: Nombre de textes par lot
+        processes: Nombre de processus d'encodage (1 = ce processus)
+
+    Returns:
+        Un embedding (liste de floats) par texte, dans l'ordre de texts
+    """
+    cache, pool, step = open_encoder(batch_size, processes)
+    before = cache.stats()
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    embeddings: List[List[float]] = [[] for _ in texts]
+
+    start = time.perf_counter()
+    done = 0
+    try:
+        for offset in range(0, len(order), step):
+            batch = order[offset:offset + step]
+            vectors = cache.encode([texts[i] for i in batch], batch_size=len(batch))
+            for i, vector in zip(batch, vectors):
+                embeddings[i] = vector.tolist()
+
+            done += len(batch)
+            elapsed = time.perf_counter() - start
+            print(f"  {done}/{len(texts)} textes encodés - {done / elapsed:.1f} phrases/s")
+    finally:
+        if pool:
+            pool.close()
+
+    stats = cache.stats()
+    print(f"  Cache d'embeddings: {stats['hits'] - before['hits']} textes déjà connus, "
+          f"{stats['misses'] - before['misses']} encodés")
+    return embeddings
 
 
 def generate_embedding_from_text(text: str) -> List[float]:
@@ -18,11 +91,8 @@ def generate_embedding_from_text(text: str) -> List[float]:
         Une liste de floats représentant le vecteur d'embedding
     """
     try:
-        # Chargement du modèle MiniLM
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Génération de l'embedding
-        embedding = model.encode(text)
+        # Cache d'embeddings partagé (modèle MiniLM chargé seulement si besoin)
+        embedding = get_embedding_cache(MODEL_NAME).encode_one(text)
         
         # Conversion en liste Python
         return embedding.tolist()
@@ -32,12 +102,26 @@ def generate_embedding_from_text(text: str) -> List[float]:
         return []
 
 
-def process_cities_gpt_embeddings():
+def process_cities_gpt_embeddings(batch_size: int = DEFAULT_BATCH_SIZE, processes: int = 1, restart: bool = False):
     """
     Lit cities_categories_gpt.json et génère les embeddings pour chaque
     ville en se basant sur le texte categories_gpt.
     
     Les embeddings sont stockés dans la colonne 'embedding' de la table 'cities'.
+    Les villes sont traitées par étapes (un lot, ou 2 lots par processus) : chaque
+    étape est encodée, écrite en une transaction (bulk_update_embeddings), puis
+    enregistrée dans le journal (JobCheckpoint). Un arrêt ne perd que l'étape en cours.
+    
+    Reprise : un nouveau lancement ne traite que les villes dont le texte (ou le modèle)
+    a changé ou qui ont échoué. Si l'encodage d'une étape échoue, ses villes sont
+    reprises une par une (encodage + écriture) avec les tentatives et le délai
+    exponentiel du journal ; une ville absente de la table est enregistrée en échec.
+    Les textes déjà encodés sont relus dans le cache d'embeddings.
+    
+    Args:
+        batch_size: Nombre de textes encodés par lot
+        processes: Nombre de processus d'encodage (un modèle par processus)
+        restart: Oublier le journal et tout retraiter
     """
     # Paramètres de connexion à PostgreSQL
     conn_params = {
@@ -53,6 +137,8 @@ def process_cities_gpt_embeddings():
     base_dir = os.path.dirname(script_dir)
     json_path = os.path.join(base_dir, "cities_categories_gpt.json")
     
+    conn = None
+    pool = None
     try:
         # Lecture du fichier JSON
         with open(json_path, "r", encoding="utf-8") as f:
@@ -60,64 +146,101 @@ def process_cities_gpt_embeddings():
         
         print(f"✓ Fichier JSON lu: {len(cities_data)} villes")
         
-        # Connexion à la base de données
-        conn = psycopg2.connect(**conn_params)
-        cursor = conn.cursor()
-        
         # Compteurs pour les statistiques
         success_count = 0
         error_count = 0
+        skipped_count = 0
+        deferred_count = 0
         
-        # Parcours de toutes les villes dans le JSON
+        checkpoint = JobCheckpoint("generate_gpt_embeddings")
+        if restart:
+            checkpoint.reset()
+        
+        # Validation des données avant l'encodage
+        valid_cities = []
         for city_data in cities_data:
-            try:
-                city_id = city_data.get("id")
-                city_name = city_data.get("name", "Unknown")
-                categories_gpt = city_data.get("categories_gpt", "")
-                
-                # Validation des données
-                if not city_id or not categories_gpt.strip():
-                    print(f"City {city_id} ({city_name}) : données manquantes, ignoré")
-                    error_count += 1
-                    continue
-                
-                # Génération de l'embedding à partir du texte categories_gpt
-                embedding = generate_embedding_from_text(categories_gpt)
-                
-                # Si l'embedding est vide, passer au suivant
-                if not embedding:
-                    print(f"City {city_id} ({city_name}) : échec de génération de l'embedding")
-                    error_count += 1
-                    continue
-                
-                # Mise à jour de la colonne embedding dans la table cities
-                update_query = """
-                    UPDATE cities 
-                    SET embedding = %s 
-                    WHERE id = %s;
-                """
-                cursor.execute(update_query, (embedding, city_id))
-                conn.commit()
-                
-                # Log de confirmation
-                print(f"✓ City {city_id} ({city_name}) : embedding updated ({len(embedding)} dims)")
-                success_count += 1
-                
-            except Exception as e:
-                print(f"✗ City {city_id} ({city_name}) : erreur - {e}")
-                conn.rollback()
+            city_id = city_data.get("id")
+            city_name = city_data.get("name", "Unknown")
+            categories_gpt = city_data.get("categories_gpt", "")
+            if not city_id or not categories_gpt.strip():
+                print(f"City {city_id} ({city_name}) : données manquantes, ignoré")
                 error_count += 1
                 continue
+            item_hash = input_hash(MODEL_NAME, categories_gpt)
+            state = checkpoint.state(city_id, item_hash)
+            # Déjà écrite lors d'un lancement précédent, avec le même texte et le même modèle
+            if state == SKIPPED:
+                skipped_count += 1
+                continue
+            # Echec récent : reprise différée au prochain lancement
+            if state == DEFERRED:
+                deferred_count += 1
+                continue
+            valid_cities.append((city_id, city_name, categories_gpt, item_hash))
+        if skipped_count or deferred_count:
+            print(f"✓ {skipped_count} villes déjà à jour (journal), {deferred_count} reprises différées, "
+                  f"{len(valid_cities)} à traiter")
+        
+        # Textes triés par longueur : moins de padding dans chaque lot
+        valid_cities.sort(key=lambda city: len(city[2]), reverse=True)
+        cache, pool, step = open_encoder(batch_size, processes)
+        conn = psycopg2.connect(**conn_params)
         
-        # Fermeture des ressources
-        cursor.close()
-        conn.close()
+        def write_one(city_id, text):
+            # Reprise ville par ville : encodage et écriture forment un seul élément du journal
+            stats = bulk_update_embeddings(conn_params, [(city_id, cache.encode_one(text).tolist())], conn=conn)
+            if stats["missing"]:
+                raise LookupError(f"ville {city_id} absente de la table cities")
+        
+        encode_start = time.perf_counter()
+        for offset in range(0, len(valid_cities), step):
+            chunk = valid_cities[offset:offset + step]
+            try:
+                vectors = cache.encode([text for _, _, text, _ in chunk], batch_size=len(chunk))
+            except Exception as e:
+                print(f"  Echec de l'encodage du lot ({e}) : reprise ville par ville")
+                for city_id, city_name, text, item_hash in chunk:
+                    status, _ = checkpoint.process(
+                        city_id, item_hash, lambda: write_one(city_id, text), fatal=(psycopg2.Error,)
+                    )
+                    if status == DONE:
+                        success_count += 1
+                    else:
+                        print(f"City {city_id} ({city_name}) : échec de génération de l'embedding")
+                        error_count += 1
+                continue
+            
+            # Une transaction par étape : COPY dans une table temporaire puis UPDATE ... FROM
+            stats = bulk_update_embeddings(
+                conn_params, [(city_id, vector.tolist()) for (city_id, _, _, _), vector in zip(chunk, vectors)], conn=conn
+            )
+            # Villes absentes de la table : rien n'a été écrit, enregistrées en échec
+            missing = set(stats["missing_ids"])
+            checkpoint.mark_done_many(
+                (city_id, item_hash, None) for city_id, _, _, item_hash in chunk if city_id not in missing
+            )
+            for city_id, city_name, _, item_hash in chunk:
+                if city_id in missing:
+                    print(f"City {city_id} ({city_name}) : absente de la table cities")
+                    checkpoint.mark_failed(city_id, item_hash, "ville absente de la table cities")
+            success_count += len(chunk) - len(missing)
+            error_count += len(missing)
+            
+            done = offset + len(chunk)
+            elapsed = time.perf_counter() - encode_start
+            print(f"  {done}/{len(valid_cities)} villes écrites - {stats['updated']} mises à jour, "
+                  f"{stats['unchanged']} inchangées - {done / elapsed:.1f} phrases/s")
+        encode_elapsed = time.perf_counter() - encode_start
         
         # Statistiques finales
         print(f"\n=== RÉSULTATS ===")
         print(f"✓ Embeddings générés avec succès: {success_count}")
         print(f"✗ Erreurs: {error_count}")
+        print(f"↷ Déjà à jour (journal): {skipped_count}")
+        print(f"↷ Reprises différées (journal): {deferred_count}")
         print(f"Total traité: {success_count + error_count}")
+        if valid_cities and encode_elapsed > 0:
+            print(f"Encodage et écriture: {len(valid_cities)} textes en {encode_elapsed:.2f} s ({len(valid_cities) / encode_elapsed:.1f} phrases/s, lots de {batch_size})")
         print("✓ Traitement terminé")
         
     except FileNotFoundError:
@@ -128,6 +251,11 @@ def process_cities_gpt_embeddings():
         print(f"✗ Erreur de connexion à la base de données : {e}")
     except Exception as e:
         print(f"✗ Erreur inattendue : {e}")
+    finally:
+        if pool is not None:
+            pool.close()
+        if conn is not None:
+            conn.close()
 
 
 def test_embedding_generation():
@@ -156,163 +284,13 @@ if __name__ == "__main__":
     # test_embedding_generation()
     
     # Option 2 : Traiter toutes les villes du fichier cities_categories_gpt.json
-=======
-import psycopg2
-import json
-import os
-from typing import List
-from sentence_transformers import SentenceTransformer
-
-
-def generate_embedding_from_text(text: str) -> List[float]:
-    """
-    Génère un embedding (vecteur) à partir d'un texte en utilisant
-    le modèle sentence-transformers "all-MiniLM-L6-v2".
-    
-    Args:
-        text: Le texte à encoder (categories_gpt)
-        
-    Returns:
-        Une liste de floats représentant le vecteur d'embedding
-    """
-    try:
-        # Chargement du modèle MiniLM
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Génération de l'embedding
-        embedding = model.encode(text)
-        
-        # Conversion en liste Python
-        return embedding.tolist()
-        
-    except Exception as e:
-        print(f"Erreur lors de la génération de l'embedding: {e}")
-        return []
-
-
-def process_cities_gpt_embeddings():
-    """
-    Lit cities_categories_gpt.json et génère les embeddings pour chaque
-    ville en se basant sur le texte categories_gpt.
-    
-    Les embeddings sont stockés dans la colonne 'embedding' de la table 'cities'.
-    """
-    # Paramètres de connexion à PostgreSQL
-    conn_params = {
-        'dbname': 'cities',
-        'user': 'postgres',
-        'password': 'postgres',
-        'host': 'localhost',
-        'port': 5432
-    }
-    
-    # Chemin vers le fichier JSON
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    base_dir = os.path.dirname(script_dir)
-    json_path = os.path.join(base_dir, "cities_categories_gpt.json")
-    
-    try:
-        # Lecture du fichier JSON
-        with open(json_path, "r", encoding="utf-8") as f:
-            cities_data = json.load(f)
-        
-        print(f"✓ Fichier JSON lu: {len(cities_data)} villes")
-        
-        # Connexion à la base de données
-        conn = psycopg2.connect(**conn_params)
-        cursor = conn.cursor()
-        
-        # Compteurs pour les statistiques
-        success_count = 0
-        error_count = 0
-        
-        # Parcours de toutes les villes dans le JSON
-        for city_data in cities_data:
-            try:
-                city_id = city_data.get("id")
-                city_name = city_data.get("name", "Unknown")
-                categories_gpt = city_data.get("categories_gpt", "")
-                
-                # Validation des données
-                if not city_id or not categories_gpt.strip():
-                    print(f"City {city_id} ({city_name}) : données manquantes, ignoré")
-                    error_count += 1
-                    continue
-                
-                # Génération de l'embedding à partir du texte categories_gpt
-                embedding = generate_embedding_from_text(categories_gpt)
-                
-                # Si l'embedding est vide, passer au suivant
-                if not embedding:
-                    print(f"City {city_id} ({city_name}) : échec de génération de l'embedding")
-                    error_count += 1
-                    continue
-                
-                # Mise à jour de la colonne embedding dans la table cities
-                update_query = """
-                    UPDATE cities 
-                    SET embedding = %s 
-                    WHERE id = %s;
-                """
-                cursor.execute(update_query, (embedding, city_id))
-                conn.commit()
-                
-                # Log de confirmation
-                print(f"✓ City {city_id} ({city_name}) : embedding updated ({len(embedding)} dims)")
-                success_count += 1
-                
-            except Exception as e:
-                print(f"✗ City {city_id} ({city_name}) : erreur - {e}")
-                conn.rollback()
-                error_count += 1
-                continue
-        
-        # Fermeture des ressources
-        cursor.close()
-        conn.close()
-        
-        # Statistiques finales
-        print(f"\n=== RÉSULTATS ===")
-        print(f"✓ Embeddings générés avec succès: {success_count}")
-        print(f"✗ Erreurs: {error_count}")
-        print(f"Total traité: {success_count + error_count}")
-        print("✓ Traitement terminé")
-        
-    except FileNotFoundError:
-        print(f"✗ Erreur : fichier {json_path} non trouvé")
-    except json.JSONDecodeError as e:
-        print(f"✗ Erreur de lecture JSON : {e}")
-    except psycopg2.Error as e:
-        print(f"✗ Erreur de connexion à la base de données : {e}")
-    except Exception as e:
-        print(f"✗ Erreur inattendue : {e}")
-
-
-def test_embedding_generation():
-    """
-    Test rapide de la génération d'embedding avec un exemple de texte categories_gpt.
-    """
-    test_text = "Paris is a great choice for travelers seeking historical heritage, landmarks like archaeological site, castle, and cathedral, and religious sites, restaurants serving fish, french, and italian cuisine, and shopping malls."
-    
-    print("=== TEST D'EMBEDDING ===")
-    print(f"Texte de test: {test_text[:100]}...")
-    
-    embedding = generate_embedding_from_text(test_text)
-    
-    if embedding:
-        print(f"✓ Embedding généré avec succès")
-        print(f"Dimension: {len(embedding)}")
-        print(f"Premiers éléments: {embedding[:5]}")
-        print(f"Type: {type(embedding[0])}")
-    else:
-        print("✗ Échec de génération de l'embedding")
-
-
-# Exemple d'utilisation
-if __name__ == "__main__":
-    # Option 1 : Test rapide
-    # test_embedding_generation()
-    
-    # Option 2 : Traiter toutes les villes du fichier cities_categories_gpt.json
->>>>>>> main
-    process_cities_gpt_embeddings()
\ No newline at end of file
+    # Taille des lots et nombre de processus configurables :
+    # python generate_gpt_embeddings.py --batch-size 128 --processes 4
+    batch_size = DEFAULT_BATCH_SIZE
+    if "--batch-size" in sys.argv[1:]:
+        batch_size = int(sys.argv[sys.argv.index("--batch-size") + 1])
+    processes = 1
+    if "--processes" in sys.argv[1:]:
+        processes = int(sys.argv[sys.argv.index("--processes") + 1])
+    # --restart : ignorer le journal et tout retraiter
+    process_cities_gpt_embeddings(batch_size=batch_size, processes=processes, restart="--restart" in sys.argv[1:])
\ No newline at end of file
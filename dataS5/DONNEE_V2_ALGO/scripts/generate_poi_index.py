@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Cache d'embeddings partagé avec algorithme/V2 (les POI déjà encodés ne repassent pas par le modèle)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "algorithme", "V2"))
+from embedding_cache import EmbeddingCache, get_embedding_cache  # noqa: E402
+from encoding_pool import EncodingPool  # noqa: E402
+# Même texte de POI que le scoring multi-vecteurs (IGNORED_ROOTS compris)
+from poi_scoring import poi_text  # noqa: E402
+
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+INDEX_VERSION = 1
+
+
+def generate_poi_index(batch_size: int = 256, processes: int = 1):
+    """
+    Encode tous les POI de cities_geocoded_all.json par lots et écrit l'index
+    vectoriel utilisé par le backend (backend/data/poi_index) :
+
+    - poi_embeddings.npy : (n_pois, 384) float32, lignes normalisées, groupées par ville
+    - city_offsets.npy   : offsets CSR, POI de la ville i = lignes offsets[i]:offsets[i+1]
+    - city_ids.npy       : ids des villes (ordre d'insertion dans la table cities)
+    - pois.json          : métadonnées (nom, ville, catégories, coordonnées) alignées sur les lignes
+
+    Avec processes > 1, les POI inédits sont encodés par un EncodingPool (un modèle
+    par processus, 2 lots par processus à chaque étape).
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    repo_dir = os.path.dirname(os.path.dirname(os.path.dirname(script_dir)))
+    json_path = os.path.join(repo_dir, "dataS5", "DONNE_V1_ALGO", "cities_geocoded_all.json")
+    output_dir = os.path.join(repo_dir, "backend", "data", "poi_index")
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        cities_data = json.load(f)
+
+    pois_meta = []
+    texts = []
+    city_ids = []
+    offsets = [0]
+    for city_id, city in enumerate(cities_data, start=1):
+        city_ids.append(city_id)
+        for poi in city.get("pois") or []:
+            pois_meta.append({
+                "name": poi.get("name"),
+                "city_id": city_id,
+                "city": city.get("city"),
+                "categories": poi.get("categories") or [],
+                "lat": poi.get("lat"),
+                "lon": poi.get("lon"),
+            })
+            texts.append(poi_text(poi))
+        offsets.append(len(texts))
+
+    print(f"✓ Fichier JSON lu: {len(city_ids)} villes, {len(texts)} POI")
+
+    # Encodage par lots via le cache (modèle chargé une seule fois, et seulement pour les POI inédits)
+    pool = EncodingPool(processes, MODEL_NAME, chunksize=batch_size) if processes > 1 else None
+    cache = EmbeddingCache(model_name=MODEL_NAME, encode=pool) if pool else get_embedding_cache(MODEL_NAME)
+    step = batch_size * 2 * processes if pool else batch_size
+    chunks = []
+    start = time.perf_counter()
+    try:
+        for i in range(0, len(texts), step):
+            batch = texts[i:i + step]
+            chunks.append(cache.encode(batch, batch_size=step, normalize=True))
+            done = min(i + step, len(texts))
+            print(f"{done}/{len(texts)} POI encodés ({done / (time.perf_counter() - start):.0f} phrases/s)")
+    finally:
+        if pool:
+            pool.close()
+
+    embeddings = np.vstack(chunks).astype(np.float32) if chunks else np.zeros((0, 384), dtype=np.float32)
+
+    os.makedirs(output_dir, exist_ok=True)
+    np.save(os.path.join(output_dir, "poi_embeddings.npy"), embeddings)
+    np.save(os.path.join(output_dir, "city_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+    np.save(os.path.join(output_dir, "city_ids.npy"), np.asarray(city_ids, dtype=np.int64))
+
+    tmp_path = os.path.join(output_dir, "pois.tmp.json")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "model": MODEL_NAME, "pois": pois_meta}, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(output_dir, "pois.json"))
+
+    print(f"Cache d'embeddings: {cache.stats()}")
+    print(f"\n✓ Index POI écrit dans: {output_dir}")
+
+
+if __name__ == "__main__":
+    # Nombre de processus d'encodage : python generate_poi_index.py --processes 4
+    processes = 1
+    if "--processes" in sys.argv[1:]:
+        processes = int(sys.argv[sys.argv.index("--processes") + 1])
+    generate_poi_index(processes=processes)
@@ -1,6 +1,6 @@
-<<<<<<< HEAD
 import json
 import os
+import sys
 import time
 
 try:
@@ -10,11 +10,34 @@ except Exception as e:
         "deep-translator est requis. Installez-le avec: pip install deep-translator"
     ) from e
 
+# Journal de reprise partagé avec algorithme/V2
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "algorithme", "V2"))
+from job_checkpoint import DONE, SKIPPED, JobCheckpoint, input_hash  # noqa: E402
 
-def translate_categories_gpt():
+TARGET_LANGUAGE = "fr"
+# Résultats partiels réécrits dans le fichier de sortie toutes les FLUSH_EVERY villes
+FLUSH_EVERY = 25
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def translate_categories_gpt(restart=False):
     """
     Traduit en français la valeur de 'categories_gpt' pour chaque ville.
     Crée un nouveau fichier cities_categories_gpt_fr.json.
+
+    Reprise : chaque traduction est enregistrée dans le journal (JobCheckpoint) dès
+    qu'elle est obtenue. Au lancement suivant, les villes dont le texte n'a pas changé
+    ne sont pas retraduites ; les échecs sont retentés (délai exponentiel). Le fichier
+    de sortie est réécrit toutes les FLUSH_EVERY villes.
+
+    Args:
+        restart: Oublier le journal et tout retraduire
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     base_dir = os.path.dirname(script_dir)
@@ -25,7 +48,10 @@ def translate_categories_gpt():
     with open(input_path, "r", encoding="utf-8") as f:
         cities_data = json.load(f)
 
-    translator = GoogleTranslator(source="en", target="fr")
+    translator = GoogleTranslator(source="en", target=TARGET_LANGUAGE)
+    checkpoint = JobCheckpoint("translate_categories_gpt")
+    if restart:
+        checkpoint.reset()
 
     translated_data = []
     total = len(cities_data)
@@ -35,9 +61,14 @@ def translate_categories_gpt():
         if not text:
             translated_text = text
         else:
-            try:
-                translated_text = translator.translate(text)
-            except Exception:
+            status, translated_text = checkpoint.process(
+                city.get("id"), input_hash(TARGET_LANGUAGE, text), lambda: translator.translate(text)
+            )
+            if status == DONE:
+                # Pause entre deux appels à l'API (inutile pour une traduction relue dans le journal)
+                time.sleep(0.1)
+            elif status != SKIPPED:
+                # Echec (ou reprise différée) : texte original, retraduit au prochain lancement
                 translated_text = text
 
         translated_city = {
@@ -50,76 +81,15 @@ def translate_categories_gpt():
         if index % 10 == 0 or index == total:
             print(f"{index}/{total} traduits")
 
-        time.sleep(0.1)
+        if index % FLUSH_EVERY == 0:
+            _write_json_atomic(output_path, translated_data)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(translated_data, f, indent=2, ensure_ascii=False)
+    _write_json_atomic(output_path, translated_data)
 
     print(f"\n✅ Fichier sauvegardé: {output_path}")
+    print(f"Journal: {checkpoint.summary()}")
 
 
 if __name__ == "__main__":
-    translate_categories_gpt()
-=======
-import json
-import os
-import time
-
-try:
-    from deep_translator import GoogleTranslator
-except Exception as e:
-    raise SystemExit(
-        "deep-translator est requis. Installez-le avec: pip install deep-translator"
-    ) from e
-
-
-def translate_categories_gpt():
-    """
-    Traduit en français la valeur de 'categories_gpt' pour chaque ville.
-    Crée un nouveau fichier cities_categories_gpt_fr.json.
-    """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    base_dir = os.path.dirname(script_dir)
-
-    input_path = os.path.join(base_dir, "cities_categories_gpt_final.json")
-    output_path = os.path.join(base_dir, "cities_categories_gpt_fr.json")
-
-    with open(input_path, "r", encoding="utf-8") as f:
-        cities_data = json.load(f)
-
-    translator = GoogleTranslator(source="en", target="fr")
-
-    translated_data = []
-    total = len(cities_data)
-
-    for index, city in enumerate(cities_data, start=1):
-        text = city.get("categories_gpt", "")
-        if not text:
-            translated_text = text
-        else:
-            try:
-                translated_text = translator.translate(text)
-            except Exception:
-                translated_text = text
-
-        translated_city = {
-            "id": city.get("id"),
-            "name": city.get("name"),
-            "categories_gpt": translated_text,
-        }
-        translated_data.append(translated_city)
-
-        if index % 10 == 0 or index == total:
-            print(f"{index}/{total} traduits")
-
-        time.sleep(0.1)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(translated_data, f, indent=2, ensure_ascii=False)
-
-    print(f"\n✅ Fichier sauvegardé: {output_path}")
-
-
-if __name__ == "__main__":
-    translate_categories_gpt()
->>>>>>> main
+    # --restart : ignorer le journal et tout retraduire
+    translate_categories_gpt(restart="--restart" in sys.argv[1:])
@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 import requests
 import time
 from PIL import Image
@@ -12,6 +13,15 @@ OUTPUT_DIR = os.path.join(SCRIPT_DIR, "../../frontend/assets/city_images")
 JS_OUTPUT_PATH = os.path.join(SCRIPT_DIR, "../../frontend/src/data/cityImages.js")
 UNSPLASH_ACCESS_KEY = os.getenv("UNSPLASH_ACCESS_KEY")
 
+# Shared restart journal (algorithme/V2/job_checkpoint.py)
+sys.path.append(os.path.join(SCRIPT_DIR, "..", "..", "..", "algorithme", "V2"))
+from job_checkpoint import DEFERRED, DONE, SKIPPED, JobCheckpoint, input_hash  # noqa: E402
+
+
+class RateLimitError(Exception):
+    """Unsplash quota reached: stop the run (not recorded as a failure)."""
+
+
 # Create directories
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(os.path.dirname(JS_OUTPUT_PATH), exist_ok=True)
@@ -37,7 +47,7 @@ def search_unsplash(query):
             return data['results'][0]['urls']['regular']
     elif response.status_code in [403, 429]:
         print(f"   [API Critical Error] {response.status_code}: Rate Limit Reached or Forbidden.")
-        raise Exception("STOP_script_rate_limit")
+        raise RateLimitError("STOP_script_rate_limit")
     else:
         print(f"   [API Error] {response.status_code}: {response.text}")
     return None
@@ -66,7 +76,18 @@ def download_and_optimize(url, filename):
         print(f"Error processing {url}: {e}")
     return False
 
-def main():
+def fetch_city_image(name, filename):
+    """Search and save one city image. Returns the filename, or None if Unsplash has no image."""
+    url = search_unsplash(name)
+    if not url:
+        return None
+    if not download_and_optimize(url, filename):
+        # Retried by the journal (with backoff)
+        raise IOError(f"download/save failed for {url}")
+    return filename
+
+
+def main(restart=False):
     if not os.path.exists(JSON_PATH):
         print(f"File not found: {JSON_PATH}")
         return
@@ -79,32 +100,44 @@ def main():
     total = len(cities)
     print(f"Found {total} cities to process.")
 
+    # Each processed city is journaled: a restart skips finished cities and retries failures with backoff
+    checkpoint = JobCheckpoint("download_images", max_attempts=2, base_delay=5.0, max_delay=3600.0)
+    if restart:
+        checkpoint.reset()
+
     for i, city in enumerate(cities):
         name = city['name']
         safe_name = name.replace(" ", "_").replace(".", "").replace("-", "_") # clean name for filename
         filename = f"{safe_name}.webp"
+        item_hash = input_hash(name, filename)
+        state = checkpoint.state(name, item_hash)
+        exists = os.path.exists(os.path.join(OUTPUT_DIR, filename))
+        if state == SKIPPED and not exists and checkpoint.result(name) is not None:
+            # Journaled as saved but the .webp was deleted since: download it again
+            checkpoint.forget(name)
+            state = checkpoint.state(name, item_hash)
         
         # Check if already exists to skip
-        if os.path.exists(os.path.join(OUTPUT_DIR, filename)):
+        if exists:
             print(f"[{i+1}/{total}] Skipping {name} (already exists)")
+        elif state == SKIPPED:
+            print(f"[{i+1}/{total}] Skipping {name} (no image on Unsplash, journaled)")
+        elif state == DEFERRED:
+            print(f"[{i+1}/{total}] Skipping {name} (recent failure, retry postponed)")
         else:
             print(f"[{i+1}/{total}] Downloading {name}...")
             try:
-                url = search_unsplash(name)
-                if url:
-                    success = download_and_optimize(url, filename)
-                    if success:
-                        print(f"   -> Saved {filename}")
-                    else:
-                        print(f"   -> Failed to download/save")
+                status, saved = checkpoint.process(
+                    name, item_hash, lambda: fetch_city_image(name, filename), fatal=(RateLimitError,)
+                )
+                if status == DONE:
+                    print(f"   -> Saved {saved}" if saved else "   -> No image found on Unsplash")
                 else:
-                    print(f"   -> No image found on Unsplash")
-            except Exception as e:
-                if "STOP_script_rate_limit" in str(e):
-                    print("\n🛑 ARRÊT D'URGENCE: Limite API atteinte.")
-                    print("Redémarrez le script plus tard avec une nouvelle clé.")
-                    break
-                print(f"   -> Error: {e}")
+                    print(f"   -> Failed to download/save (retried on next run)")
+            except RateLimitError:
+                print("\n🛑 ARRÊT D'URGENCE: Limite API atteinte.")
+                print("Redémarrez le script plus tard avec une nouvelle clé.")
+                break
             
             # Respect API limits (50 requests/hr for free tier generally, but demo is 50/hr)
             # Assuming user has a key, we sleep a bit just in case.
@@ -119,7 +152,7 @@ def main():
     with open(JS_OUTPUT_PATH, 'w', encoding='utf-8') as f:
         f.write(js_mapping)
     
-    print(f"\nProcessing complete!")
+    print(f"\nProcessing complete! Journal: {checkpoint.summary()}")
     print(f"Images saved in: {OUTPUT_DIR}")
     print(f"Mapping file created at: {JS_OUTPUT_PATH}")
 
@@ -130,8 +163,9 @@ if __name__ == "__main__":
         if key:
             UNSPLASH_ACCESS_KEY = key
             os.environ["UNSPLASH_ACCESS_KEY"] = key
-            main()
+            main(restart="--restart" in sys.argv[1:])
         else:
             print("Cannot proceed without API key.")
     else:
-        main()
+        # --restart: ignore the journal and retry every city without an image
+        main(restart="--restart" in sys.argv[1:])